@@ -0,0 +1,105 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from rentoshare.versions import bump_versions, cache_is_shared, get_version
+
+
+def _version_key(user_id):
+    return f'accounts:user:{user_id}:version'
+
+
+def user_version(user_id):
+    return get_version(_version_key(user_id))
+
+
+def bump_user_version(user_id):
+    """Make every process reload user `user_id` on its next request"""
+    bump_versions(_version_key(user_id))
+
+
+def user_cache_enabled():
+    """
+    Whether authenticated users are served from `user_cache`.
+
+    A save only retires the copies other processes hold if they read its
+    version stamp, so the cache needs a cache backend shared by every
+    process. With a process-local one (the default LocMemCache) a
+    deactivated user would stay authenticated elsewhere until their copy
+    expired, so users are loaded on every request instead.
+    """
+    return settings.AUTH_USER_CACHE_SIZE > 0 and cache_is_shared()
+
+
+class UserCache:
+    """
+    Per-process LRU of authenticated users.
+
+    An entry is served for at most AUTH_USER_CACHE_TIMEOUT seconds, and only
+    while the user's version stamp is the one it was loaded under. Callers
+    get copies, so a request changing its `request.user` cannot leak into
+    other requests.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, version):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            user, entry_version, expires = entry
+            if entry_version != version or expires <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+        return copy.copy(user)
+
+    def set(self, user_id, user, version):
+        entry = (copy.copy(user), version, time.monotonic() + settings.AUTH_USER_CACHE_TIMEOUT)
+        with self._lock:
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > settings.AUTH_USER_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that serves token users from `user_cache` instead of a query per request"""
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None or not user_cache_enabled():
+            return super().get_user(validated_token)
+
+        # Read the stamp before loading, so a save racing this request retires what we store
+        version = user_version(user_id)
+        user = user_cache.get(user_id, version)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user, version)
+            return user
+
+        # Cached users passed the user checks when loaded; the revocation check depends on the token
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return user
@@ -0,0 +1,78 @@
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.authentication import CachedJWTAuthentication, user_cache
+from rentoshare.query_budget import ENDPOINTS, Seeder, check_query_budgets
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare per-request query counts of every API endpoint with the per-process '
+        'authenticated-user cache disabled and enabled (runs against a throwaway test database)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100,
+                            help='Rows seeded for each endpoint to render')
+        parser.add_argument('--repeat', type=int, default=2000,
+                            help='Authentications timed per mode')
+
+    def handle(self, *args, **options):
+        if min(options['rows'], options['repeat']) <= 0:
+            raise CommandError('--rows and --repeat must be positive.')
+
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        cache_dir = tempfile.TemporaryDirectory()
+        # The user cache needs a backend shared between processes; files are the one at hand
+        isolated_cache = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                                      'LOCATION': cache_dir.name}}
+        try:
+            with override_settings(CACHES=isolated_cache):
+                seeder = Seeder()
+                counts = {}
+                for label, size in (('uncached', 0), ('cached', None)):
+                    user_cache.clear()
+                    with override_settings(**({'AUTH_USER_CACHE_SIZE': size} if size is not None else {})):
+                        results = check_query_budgets(ENDPOINTS, seeder, row_counts=(options['rows'],))
+                        latency = self.time_authentication(seeder.fixture['consumer'], options['repeat'])
+                    counts[label] = {result['endpoint'].name: result['counts'][options['rows']] for result in results}
+                    self.stdout.write(f'{label:<9} authentication {latency * 1_000_000:8.1f} us/request')
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+            cache_dir.cleanup()
+
+        failures = 0
+        self.stdout.write(f'{"endpoint":<28} {"uncached":>8} {"cached":>8}')
+        for endpoint in ENDPOINTS:
+            before, after = counts['uncached'][endpoint.name], counts['cached'][endpoint.name]
+            expected = before - 1 if endpoint.user else before
+            line = f'{endpoint.name:<28} {before:>8} {after:>8}'
+            if endpoint.user is None:
+                line += '  (anonymous)'
+            if after != expected:
+                failures += 1
+                self.stdout.write(self.style.ERROR(line + '  FAILED'))
+            else:
+                self.stdout.write(line)
+
+        if failures:
+            raise CommandError(f'{failures} authenticated endpoint(s) did not drop the user lookup.')
+        self.stdout.write(self.style.SUCCESS('Every authenticated endpoint runs one query fewer.'))
+
+    def time_authentication(self, user, repeat):
+        request = RequestFactory().get('/', headers={'Authorization': f'Bearer {AccessToken.for_user(user)}'})
+        authentication = CachedJWTAuthentication()
+        authentication.authenticate(request)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            authentication.authenticate(request)
+        return (time.perf_counter() - started) / repeat
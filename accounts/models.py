@@ -48,6 +48,9 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     class Meta:
         db_table = 'users'
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='users_created_idx'),
+        ]
 
     def __str__(self):
         return self.email
\ No newline at end of file
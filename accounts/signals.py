@@ -0,0 +1,16 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.settings import api_settings
+
+from .authentication import bump_user_version
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def retire_cached_user(sender, instance, **kwargs):
+    # Covers is_active, password and profile changes alike; bump after commit
+    # so no request can cache the pre-change row under the new version
+    user_id = getattr(instance, api_settings.USER_ID_FIELD)
+    transaction.on_commit(lambda: bump_user_version(user_id))
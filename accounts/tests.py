@@ -1,3 +1,56 @@
-from django.test import TestCase
+import tempfile
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from rentoshare import query_budget
+from .authentication import CachedJWTAuthentication, user_cache
+from .models import User
+
+
+class CachedAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='user@example.com', password=None, full_name='User', phone='0')
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+        self.request = RequestFactory().get('/', headers={'Authorization': f'Bearer {AccessToken.for_user(self.user)}'})
+
+    def authenticate(self):
+        user, _ = CachedJWTAuthentication().authenticate(self.request)
+        return user
+
+    def shared_cache(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        return override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory.name,
+        }})
+
+    def test_process_local_caches_load_the_user_every_time(self):
+        self.authenticate()
+        with self.assertNumQueries(1):
+            self.authenticate()
+
+    def test_shared_caches_serve_users_until_they_change(self):
+        with self.shared_cache():
+            self.authenticate()
+            with self.assertNumQueries(0):
+                self.assertEqual(self.authenticate(), self.user)
+
+            self.user.is_active = False
+            with self.captureOnCommitCallbacks(execute=True):
+                self.user.save()
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate()
+
+
+class AccountQueryBudgetTests(query_budget.QueryBudgetTestCase):
+    endpoints = query_budget.endpoints_named(
+        'user-badges',
+    )
@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    # Public user endpoints
+    path('badges/', views.user_badges, name='user-badges'),
+]
@@ -1,3 +1,55 @@
-from django.shortcuts import render
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from kyc.models import KYC
+from kyc.serializers import KYCPublicSerializer
+from reviews.models import UserRatingSummary
 
-# Create your views here.
+# Hard cap on user ids per badge lookup
+BADGE_BATCH_LIMIT = 100
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def user_badges(request):
+    """Rating summary and public KYC status for many users at once (e.g. search result cards)"""
+    raw_ids = request.query_params.get('ids', '')
+    try:
+        user_ids = list(dict.fromkeys(int(part) for part in raw_ids.split(',') if part.strip()))
+    except ValueError:
+        return Response(
+            {"detail": "ids must be a comma separated list of user ids."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not user_ids:
+        return Response(
+            {"detail": "At least one user id is required."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(user_ids) > BADGE_BATCH_LIMIT:
+        return Response(
+            {"detail": f"At most {BADGE_BATCH_LIMIT} user ids can be requested at once."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    # Two queries regardless of how many ids were asked for
+    summaries = UserRatingSummary.objects.in_bulk(user_ids)
+    kycs = {
+        kyc.user_id: kyc
+        for kyc in KYC.objects.select_related('user').filter(user_id__in=user_ids)
+    }
+    
+    results = []
+    for user_id in user_ids:
+        summary = summaries.get(user_id) or UserRatingSummary(user_id=user_id)
+        kyc = kycs.get(user_id)
+        results.append({
+            'user_id': user_id,
+            'rating': {
+                'average_rating': summary.average_rating,
+                'total_reviews': summary.review_count,
+                'rating_distribution': summary.rating_distribution
+            },
+            'kyc': KYCPublicSerializer(kyc).data if kyc else None
+        })
+    
+    return Response({'results': results})
@@ -3,7 +3,7 @@ from .models import Dispute
 
 @admin.register(Dispute)
 class DisputeAdmin(admin.ModelAdmin):
-    list_display = ['id', 'transaction', 'raised_by', 'status', 'created_at', 'resolved_at']
+    list_display = ['id', 'transaction', 'raised_by', 'status', 'priority', 'claimed_by', 'created_at', 'resolved_at']
     list_filter = ['status', 'created_at', 'resolved_at']
     search_fields = ['transaction__id', 'raised_by__email', 'reason']
     readonly_fields = ['created_at', 'resolved_at']
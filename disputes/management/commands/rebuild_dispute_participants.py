@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from disputes.participants import rebuild_participants
+
+
+class Command(BaseCommand):
+    help = 'Recompute the dispute participant index from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of participant rows written per INSERT')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive.')
+
+        count = rebuild_participants(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} dispute participant rows'))
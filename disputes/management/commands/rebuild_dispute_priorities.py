@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from disputes.queue import rebuild_priorities
+
+
+class Command(BaseCommand):
+    help = 'Recompute the admin queue priority of every dispute'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of disputes written per UPDATE')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive.')
+
+        count = rebuild_priorities(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt priorities for {count} disputes'))
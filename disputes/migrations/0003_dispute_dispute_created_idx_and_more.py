@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('disputes', '0002_initial'),
+        ('transactions', '0002_transaction_txn_created_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dispute',
+            index=models.Index(fields=['created_at', 'id'], name='dispute_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dispute',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='dispute_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dispute',
+            index=models.Index(fields=['raised_by', 'created_at', 'id'], name='dispute_raiser_created_idx'),
+        ),
+    ]
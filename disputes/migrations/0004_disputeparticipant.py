@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('disputes', '0003_dispute_dispute_created_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DisputeParticipant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('raiser', 'Raiser'), ('vendor', 'Vendor'), ('consumer', 'Consumer')], max_length=10)),
+                ('dispute', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participants', to='disputes.dispute')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dispute_participations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'dispute', 'role')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+def backfill_participants(apps, schema_editor):
+    Dispute = apps.get_model('disputes', 'Dispute')
+    DisputeParticipant = apps.get_model('disputes', 'DisputeParticipant')
+
+    people = Dispute.objects.order_by().values_list(
+        'id', 'raised_by_id', 'transaction__vendor_id', 'transaction__consumer_id'
+    )
+    rows = [
+        DisputeParticipant(dispute_id=dispute_id, user_id=user_id, role=role)
+        for dispute_id, raised_by_id, vendor_id, consumer_id in people
+        for role, user_id in (('raiser', raised_by_id), ('vendor', vendor_id), ('consumer', consumer_id))
+    ]
+    DisputeParticipant.objects.all().delete()
+    DisputeParticipant.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('disputes', '0004_disputeparticipant'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_participants, migrations.RunPython.noop),
+    ]
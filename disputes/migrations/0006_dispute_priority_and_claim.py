@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('disputes', '0005_backfill_disputeparticipant'),
+        ('transactions', '0006_transaction_txn_status_hold_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dispute',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dispute',
+            name='claimed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='claimed_disputes', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='dispute',
+            name='priority',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='dispute',
+            index=models.Index(fields=['status', 'priority', 'id'], name='dispute_queue_idx'),
+        ),
+    ]
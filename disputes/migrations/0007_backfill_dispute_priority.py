@@ -0,0 +1,53 @@
+import math
+from collections import Counter
+from datetime import datetime, timezone
+
+from django.db import migrations
+
+# Frozen copy of the priority rules at the time of this migration
+VALUE_POINTS = 100
+AGE_POINTS_PER_HOUR = 10
+HISTORY_POINTS = 50
+PRIORITY_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def priority_score(total_price, created_at, history):
+    value = VALUE_POINTS * math.log10(1 + max(float(total_price or 0), 0))
+    age = AGE_POINTS_PER_HOUR * (created_at - PRIORITY_EPOCH).total_seconds() / 3600
+    return value - age + HISTORY_POINTS * history
+
+
+def backfill_priorities(apps, schema_editor):
+    Dispute = apps.get_model('disputes', 'Dispute')
+
+    rows = list(Dispute.objects.order_by().values_list(
+        'id', 'created_at', 'transaction__total_price',
+        'transaction__vendor_id', 'transaction__consumer_id',
+    ))
+    per_user = Counter()
+    per_pair = Counter()
+    for _, _, _, vendor_id, consumer_id in rows:
+        parties = frozenset((vendor_id, consumer_id))
+        per_user.update(parties)
+        per_pair[parties] += 1
+
+    disputes = []
+    for pk, created_at, total_price, vendor_id, consumer_id in rows:
+        parties = frozenset((vendor_id, consumer_id))
+        # Disputes sharing a party, by inclusion-exclusion, minus this one
+        shared = sum(per_user[user_id] for user_id in parties)
+        if len(parties) == 2:
+            shared -= per_pair[parties]
+        disputes.append(Dispute(pk=pk, priority=priority_score(total_price, created_at, shared - 1)))
+    Dispute.objects.bulk_update(disputes, ['priority'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('disputes', '0006_dispute_priority_and_claim'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_priorities, migrations.RunPython.noop),
+    ]
@@ -1,15 +1,22 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from rentoshare.snapshots import SnapshotMixin
 from transactions.models import Transaction
 
 User = get_user_model()
 
+# Fields that decide who is a DisputeParticipant
+PARTICIPANT_FIELDS = ('transaction_id', 'raised_by_id')
+
 class DisputeStatus(models.TextChoices):
     OPEN = 'open', 'Open'
     RESOLVED = 'resolved', 'Resolved'
     REJECTED = 'rejected', 'Rejected'
 
-class Dispute(models.Model):
+class Dispute(SnapshotMixin, models.Model):
+    # Who the participant index lists (see disputes.participants)
+    snapshot_fields = PARTICIPANT_FIELDS
+    
     transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE, related_name='disputes')
     raised_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='raised_disputes')
     
@@ -21,8 +28,37 @@ class Dispute(models.Model):
     resolved_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='resolved_disputes')
     resolution_notes = models.TextField(blank=True, null=True)
     
+    # Admin queue position, set on write by disputes.queue (higher is more urgent)
+    priority = models.FloatField(default=0)
+    claimed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='claimed_disputes')
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='dispute_created_idx'),
+            models.Index(fields=['status', 'created_at', 'id'], name='dispute_status_created_idx'),
+            models.Index(fields=['raised_by', 'created_at', 'id'], name='dispute_raiser_created_idx'),
+            models.Index(fields=['status', 'priority', 'id'], name='dispute_queue_idx'),
+        ]
     
     def __str__(self):
         return f"Dispute {self.id} - Transaction {self.transaction.id} ({self.status})"
+
+class ParticipantRole(models.TextChoices):
+    RAISER = 'raiser', 'Raiser'
+    VENDOR = 'vendor', 'Vendor'
+    CONSUMER = 'consumer', 'Consumer'
+
+class DisputeParticipant(models.Model):
+    """Users who can see a dispute, kept in sync by disputes.signals"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='dispute_participations')
+    dispute = models.ForeignKey(Dispute, on_delete=models.CASCADE, related_name='participants')
+    role = models.CharField(max_length=10, choices=ParticipantRole.choices)
+    
+    class Meta:
+        # Leads with user so "disputes visible to user X" is a covering index seek
+        unique_together = [['user', 'dispute', 'role']]
+    
+    def __str__(self):
+        return f"User {self.user_id} is {self.role} of dispute {self.dispute_id}"
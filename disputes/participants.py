@@ -0,0 +1,59 @@
+from django.db import transaction as db_transaction
+
+from .models import Dispute, DisputeParticipant, ParticipantRole
+
+
+def _rows(dispute_id, raised_by_id, vendor_id, consumer_id):
+    return [
+        DisputeParticipant(dispute_id=dispute_id, user_id=user_id, role=role)
+        for role, user_id in (
+            (ParticipantRole.RAISER, raised_by_id),
+            (ParticipantRole.VENDOR, vendor_id),
+            (ParticipantRole.CONSUMER, consumer_id),
+        )
+    ]
+
+
+def _participant_rows(disputes):
+    people = disputes.order_by().values_list(
+        'id', 'raised_by_id', 'transaction__vendor_id', 'transaction__consumer_id'
+    )
+    return [row for values in people for row in _rows(*values)]
+
+
+def sync_participants(disputes, batch_size=1000):
+    """
+    Rewrite the participant rows of every dispute in the `disputes` queryset.
+
+    Three statements however many disputes match: read the raiser and both
+    transaction sides, delete the old rows, insert the new ones.
+    """
+    rows = _participant_rows(disputes)
+    with db_transaction.atomic():
+        DisputeParticipant.objects.filter(dispute_id__in={row.dispute_id for row in rows}).delete()
+        DisputeParticipant.objects.bulk_create(rows, batch_size=batch_size)
+
+
+def rebuild_participants(batch_size=1000):
+    """Recompute the whole participant table from the disputes; returns the number of rows"""
+    rows = _participant_rows(Dispute.objects.all())
+    with db_transaction.atomic():
+        DisputeParticipant.objects.all().delete()
+        DisputeParticipant.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def visible_disputes(user):
+    """Disputes `user` raised or is a transaction party to, found through the participant index"""
+    return Dispute.objects.filter(
+        pk__in=DisputeParticipant.objects.filter(user=user).values('dispute_id')
+    )
+
+
+def involved_disputes(user):
+    """Disputes on transactions where `user` is the vendor or the consumer"""
+    return Dispute.objects.filter(
+        pk__in=DisputeParticipant.objects.filter(
+            user=user, role__in=[ParticipantRole.VENDOR, ParticipantRole.CONSUMER]
+        ).values('dispute_id')
+    )
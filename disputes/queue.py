@@ -0,0 +1,154 @@
+import math
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .models import Dispute, DisputeParticipant, DisputeStatus, ParticipantRole
+
+# Priority points: 100 per tenfold transaction value, 10 per hour waiting and
+# 50 per other dispute involving the same vendor or consumer
+VALUE_POINTS = 100
+AGE_POINTS_PER_HOUR = 10
+HISTORY_POINTS = 50
+# Age is measured from here so stored scores stay small
+PRIORITY_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+# Queue candidates tried by claim_next_dispute before giving up on a busy queue
+CLAIM_NEXT_CANDIDATES = 20
+
+
+class DisputeClaimConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'This dispute is claimed by another admin.'
+    default_code = 'dispute_claimed'
+
+
+def priority_score(total_price, created_at, history):
+    """
+    Queue priority of a dispute, fixed at write time.
+
+    Age is scored by subtracting points for a later `created_at` rather than
+    adding points for time spent waiting. Both give the same order between
+    any two disputes, and the first never goes stale.
+    """
+    value = VALUE_POINTS * math.log10(1 + max(float(total_price or 0), 0))
+    age = AGE_POINTS_PER_HOUR * (created_at - PRIORITY_EPOCH).total_seconds() / 3600
+    return value - age + HISTORY_POINTS * history
+
+
+def _shared_party_disputes(dispute, vendor_id, consumer_id):
+    party_disputes = DisputeParticipant.objects.filter(
+        user_id__in=[vendor_id, consumer_id],
+        role__in=[ParticipantRole.VENDOR, ParticipantRole.CONSUMER],
+    ).exclude(dispute_id=dispute.pk).values('dispute_id')
+    return Dispute.objects.filter(pk__in=party_disputes)
+
+
+def prioritize_new_dispute(dispute):
+    """Score a just-created dispute and raise the score of every other dispute its parties are in"""
+    transaction = dispute.transaction
+    others = _shared_party_disputes(dispute, transaction.vendor_id, transaction.consumer_id)
+    score = priority_score(transaction.total_price, dispute.created_at, others.count())
+    Dispute.objects.filter(pk=dispute.pk).update(priority=score)
+    others.update(priority=F('priority') + HISTORY_POINTS)
+    dispute.priority = score
+
+
+def rebuild_priorities(batch_size=1000):
+    """Recompute every stored priority from scratch; returns the number of disputes"""
+    rows = list(Dispute.objects.order_by().values_list(
+        'id', 'created_at', 'transaction__total_price',
+        'transaction__vendor_id', 'transaction__consumer_id',
+    ))
+    per_user = Counter()
+    per_pair = Counter()
+    for _, _, _, vendor_id, consumer_id in rows:
+        parties = frozenset((vendor_id, consumer_id))
+        per_user.update(parties)
+        per_pair[parties] += 1
+
+    disputes = []
+    for pk, created_at, total_price, vendor_id, consumer_id in rows:
+        parties = frozenset((vendor_id, consumer_id))
+        # Disputes sharing a party, by inclusion-exclusion, minus this one
+        shared = sum(per_user[user_id] for user_id in parties)
+        if len(parties) == 2:
+            shared -= per_pair[parties]
+        disputes.append(Dispute(pk=pk, priority=priority_score(total_price, created_at, shared - 1)))
+    Dispute.objects.bulk_update(disputes, ['priority'], batch_size=batch_size)
+    return len(disputes)
+
+
+def _claimable(admin, now):
+    expired = now - timedelta(seconds=settings.DISPUTE_CLAIM_TIMEOUT)
+    return Q(claimed_by__isnull=True) | Q(claimed_by=admin) | Q(claimed_at__lt=expired)
+
+
+def dispute_queue(admin):
+    """Open disputes `admin` may work on, most urgent first"""
+    return Dispute.objects.filter(
+        Q(status=DisputeStatus.OPEN) & _claimable(admin, timezone.now())
+    ).order_by('-priority', '-id')
+
+
+def _take_claim(dispute, admin, **conditions):
+    now = timezone.now()
+    claimed = Dispute.objects.filter(
+        Q(pk=dispute.pk, **conditions) & _claimable(admin, now)
+    ).update(claimed_by=admin, claimed_at=now)
+    if not claimed:
+        raise DisputeClaimConflict()
+    dispute.claimed_by = admin
+    dispute.claimed_at = now
+    return dispute
+
+
+def claim_dispute(dispute, admin):
+    """
+    Reserve an open dispute for `admin` with one conditional UPDATE.
+
+    Raises DisputeClaimConflict when another admin holds an unexpired claim
+    or the dispute is no longer open. Claiming again refreshes the claim.
+    """
+    return _take_claim(dispute, admin, status=DisputeStatus.OPEN)
+
+
+def claim_next_dispute(admin):
+    """Claim the most urgent dispute nobody else holds; returns None if there is none"""
+    candidates = dispute_queue(admin).exclude(claimed_by=admin).values_list('pk', flat=True)
+    for pk in candidates[:CLAIM_NEXT_CANDIDATES]:
+        dispute = Dispute(pk=pk)
+        try:
+            claim_dispute(dispute, admin)
+        except DisputeClaimConflict:
+            # Another admin got there first; try the next one
+            continue
+        return dispute
+    return None
+
+
+def release_dispute(dispute, admin):
+    """Give up `admin`'s claim on a dispute; raises DisputeClaimConflict if they do not hold it"""
+    released = Dispute.objects.filter(pk=dispute.pk, claimed_by=admin).update(claimed_by=None, claimed_at=None)
+    if not released:
+        raise DisputeClaimConflict('You do not hold a claim on this dispute.')
+    dispute.claimed_by = None
+    dispute.claimed_at = None
+    return dispute
+
+
+def claim_for_change(dispute, admin):
+    """
+    Claim `dispute` for `admin` before changing it, whatever its status.
+
+    The same conditional UPDATE as claim_dispute, so it raises
+    DisputeClaimConflict while another admin holds an unexpired claim. Call
+    it in the atomic block that makes the change: the UPDATE takes the write
+    lock, so no other admin can claim the dispute until the change commits.
+    """
+    return _take_claim(dispute, admin)
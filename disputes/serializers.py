@@ -4,7 +4,7 @@ from transactions.serializers import TransactionSerializer
 from accounts.serializers import UserSerializer
 
 class DisputeSerializer(serializers.ModelSerializer):
-    transaction_id = serializers.IntegerField(source='transaction.id', read_only=True)
+    transaction_id = serializers.IntegerField(read_only=True)
     raised_by_email = serializers.CharField(source='raised_by.email', read_only=True)
     raised_by_name = serializers.CharField(source='raised_by.full_name', read_only=True)
     resolved_by_email = serializers.CharField(source='resolved_by.email', read_only=True)
@@ -44,3 +44,15 @@ class DisputeResolveSerializer(serializers.ModelSerializer):
         if value not in ['resolved', 'rejected']:
             raise serializers.ValidationError("Status must be 'resolved' or 'rejected'")
         return value
+
+class DisputeQueueSerializer(DisputeSerializer):
+    transaction_total_price = serializers.DecimalField(
+        source='transaction.total_price', max_digits=10, decimal_places=2, read_only=True
+    )
+    claimed_by_email = serializers.CharField(source='claimed_by.email', read_only=True)
+    
+    class Meta(DisputeSerializer.Meta):
+        fields = DisputeSerializer.Meta.fields + [
+            'transaction_total_price', 'priority', 'claimed_by', 'claimed_by_email', 'claimed_at'
+        ]
+        read_only_fields = fields
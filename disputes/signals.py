@@ -0,0 +1,47 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from transactions.models import Transaction
+
+from .models import Dispute
+from .participants import sync_participants
+from .queue import prioritize_new_dispute
+from .stats import invalidate_dispute_stats
+
+
+@receiver(post_save, sender=Dispute)
+def update_participants_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created or instance.saved_snapshot != instance.snapshot():
+        sync_participants(Dispute.objects.filter(pk=instance.pk))
+    instance.remember_snapshot()
+
+
+@receiver(post_save, sender=Dispute)
+def prioritize_on_create(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        prioritize_new_dispute(instance)
+
+
+@receiver(pre_save, sender=Transaction)
+def capture_transaction_parties(sender, instance, raw=False, **kwargs):
+    # transactions.signals has already read the stored (vendor, consumer, ...) snapshot
+    snapshot = instance.saved_snapshot
+    instance._previous_parties = snapshot[:2] if snapshot else None
+
+
+@receiver(post_save, sender=Transaction)
+def update_participants_on_transaction_save(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_parties', None)
+    if raw or created or previous is None:
+        return
+    if previous != (instance.vendor_id, instance.consumer_id):
+        sync_participants(Dispute.objects.filter(transaction=instance))
+
+
+@receiver(post_save, sender=Dispute)
+@receiver(post_delete, sender=Dispute)
+def invalidate_stats_cache(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_dispute_stats(instance)
@@ -0,0 +1,33 @@
+from rentoshare.user_stats import cached_user_stats, invalidate_user_stats, status_counts
+from transactions.models import Transaction
+
+from .models import Dispute, DisputeStatus
+from .participants import involved_disputes
+
+CACHE_NAMESPACE = 'disputes'
+
+
+def compute_dispute_stats(user_id):
+    """Dispute counts for one user: one aggregate query per side"""
+    raised = Dispute.objects.filter(raised_by_id=user_id)
+    involved = involved_disputes(user_id)
+    return {
+        'raised_by_me': status_counts(raised, DisputeStatus.values),
+        'involving_me': status_counts(involved, DisputeStatus.values),
+    }
+
+
+def dispute_stats(user_id):
+    return cached_user_stats(CACHE_NAMESPACE, user_id, lambda: compute_dispute_stats(user_id))
+
+
+def invalidate_dispute_stats(dispute):
+    """Forget the cached stats of everyone whose counts include `dispute`"""
+    if Dispute.transaction.is_cached(dispute):
+        participants = [(dispute.transaction.vendor_id, dispute.transaction.consumer_id)]
+    else:
+        participants = Transaction.objects.filter(pk=dispute.transaction_id).values_list('vendor_id', 'consumer_id')
+    user_ids = [dispute.raised_by_id]
+    for vendor_id, consumer_id in participants:
+        user_ids += [vendor_id, consumer_id]
+    invalidate_user_stats(CACHE_NAMESPACE, user_ids)
@@ -1,3 +1,185 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from listings.models import Listing
+from rentoshare import query_budget
+from transactions.models import Transaction
+from .models import Dispute
+
+LIST_URL = '/api/disputes/'
+
+
+def create_user(name, **extra):
+    return User.objects.create_user(
+        email=f'{name}@example.com', password=None, full_name=name.title(), phone='0', **extra
+    )
+
+
+class DisputeVisibilityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = create_user('vendor', role='vendor')
+        cls.consumer = create_user('consumer')
+        cls.outsider = create_user('outsider')
+        listing = Listing.objects.create(
+            user=cls.vendor, title='Tent', description='Two person', listing_type='product'
+        )
+        cls.booking = Transaction.objects.create(
+            listing=listing, vendor=cls.vendor, consumer=cls.consumer,
+            start_date=timezone.now(), end_date=timezone.now(), total_price=10
+        )
+        cls.dispute = Dispute.objects.create(transaction=cls.booking, raised_by=cls.consumer, reason='Torn')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def visible(self, user):
+        self.client.force_authenticate(user)
+        ids = [dispute['id'] for dispute in self.client.get(LIST_URL).data['results']]
+        detail = self.client.get(f'{LIST_URL}{self.dispute.pk}/')
+        self.assertEqual(detail.status_code, 200 if ids else 404)
+        return ids
+
+    def test_parties_see_the_dispute(self):
+        self.assertEqual(self.visible(self.vendor), [self.dispute.pk])
+        self.assertEqual(self.visible(self.consumer), [self.dispute.pk])
+        self.assertEqual(self.visible(self.outsider), [])
+
+    def test_visibility_follows_transaction_parties(self):
+        self.booking.vendor = self.outsider
+        self.booking.save()
+        self.assertEqual(self.visible(self.vendor), [])
+        self.assertEqual(self.visible(self.outsider), [self.dispute.pk])
+        # Still the raiser
+        self.assertEqual(self.visible(self.consumer), [self.dispute.pk])
+
+
+class DisputeClaimTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        vendor = create_user('vendor', role='vendor')
+        consumer = create_user('consumer')
+        cls.admin = create_user('admin', is_staff=True)
+        cls.other_admin = create_user('other', is_staff=True)
+        listing = Listing.objects.create(user=vendor, title='Tent', description='Two person', listing_type='product')
+        booking = Transaction.objects.create(
+            listing=listing, vendor=vendor, consumer=consumer,
+            start_date=timezone.now(), end_date=timezone.now(), total_price=10
+        )
+        cls.dispute = Dispute.objects.create(transaction=booking, raised_by=consumer, reason='Torn')
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def post(self, admin, action):
+        self.client.force_authenticate(admin)
+        return self.client.post(f'{LIST_URL}admin/{self.dispute.pk}/{action}/')
+
+    def resolve(self, admin):
+        self.client.force_authenticate(admin)
+        return self.client.put(
+            f'{LIST_URL}admin/{self.dispute.pk}/resolve/', {'status': 'resolved'}, format='json'
+        )
+
+    def test_claimed_disputes_are_resolved_by_their_holder_only(self):
+        self.assertEqual(self.post(self.admin, 'claim').status_code, 200)
+        self.assertEqual(self.resolve(self.other_admin).status_code, 409)
+        self.assertEqual(self.resolve(self.admin).status_code, 200)
+
+        self.dispute.refresh_from_db()
+        self.assertEqual((self.dispute.status, self.dispute.resolved_by), ('resolved', self.admin))
+        self.assertIsNone(self.dispute.claimed_by)
+
+    def test_resolved_disputes_cannot_be_claimed(self):
+        self.assertEqual(self.resolve(self.admin).status_code, 200)
+        self.assertEqual(self.post(self.other_admin, 'claim').status_code, 409)
+
+
+class DisputeExportTests(TestCase):
+    url = '/api/disputes/admin/list/'
+
+    @classmethod
+    def setUpTestData(cls):
+        vendor = create_user('vendor', role='vendor')
+        cls.consumer = create_user('consumer')
+        cls.admin = create_user('admin', is_staff=True)
+        listing = Listing.objects.create(user=vendor, title='Tent', description='Two person', listing_type='product')
+        booking = Transaction.objects.create(
+            listing=listing, vendor=vendor, consumer=cls.consumer,
+            start_date=timezone.now(), end_date=timezone.now(), total_price=10
+        )
+        cls.old = Dispute.objects.create(transaction=booking, raised_by=cls.consumer, reason='Late')
+        cls.new = Dispute.objects.create(
+            transaction=booking, raised_by=cls.consumer, reason='=HYPERLINK("http://evil.example","x")',
+            resolution_notes='@SUM(A1:A9)'
+        )
+        Dispute.objects.filter(pk=cls.old.pk).update(created_at=timezone.now() - timedelta(days=10))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def export(self, export_format, **params):
+        response = self.client.get(self.url, {'format': export_format, **params})
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_has_a_header_and_one_row_per_dispute(self):
+        rows = list(csv.DictReader(io.StringIO(self.export('csv'))))
+        self.assertEqual([int(row['id']) for row in rows], [self.new.pk, self.old.pk])
+        self.assertEqual(rows[1]['reason'], 'Late')
+        self.assertEqual(rows[1]['raised_by_email'], 'consumer@example.com')
+        self.assertEqual(rows[1]['resolution_notes'], '')
+
+    def test_csv_cells_never_start_a_formula(self):
+        row = next(csv.DictReader(io.StringIO(self.export('csv'))))
+        self.assertEqual(row['reason'], '\'=HYPERLINK("http://evil.example","x")')
+        self.assertEqual(row['resolution_notes'], "'@SUM(A1:A9)")
+
+    def test_ndjson_has_one_object_per_dispute(self):
+        rows = [json.loads(line) for line in self.export('ndjson').splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.new.pk, self.old.pk])
+        # Not a spreadsheet format: values are exported as they are
+        self.assertEqual(rows[0]['reason'], self.new.reason)
+        self.assertEqual(rows[0]['raised_by_name'], 'Consumer')
+
+    def exported_ids(self, export_format, **params):
+        content = self.export(export_format, **params)
+        if export_format == 'csv':
+            return [int(row['id']) for row in csv.DictReader(io.StringIO(content))]
+        return [json.loads(line)['id'] for line in content.splitlines()]
+
+    def test_exports_filter_on_creation_date(self):
+        yesterday = (timezone.now() - timedelta(days=1)).date().isoformat()
+        for export_format in ('csv', 'ndjson'):
+            with self.subTest(format=export_format):
+                self.assertEqual(self.exported_ids(export_format, created_after=yesterday), [self.new.pk])
+                self.assertEqual(self.exported_ids(export_format, created_before=yesterday), [self.old.pk])
+
+    def test_invalid_dates_are_rejected(self):
+        for export_format in ('csv', 'ndjson'):
+            with self.subTest(format=export_format):
+                response = self.client.get(self.url, {'format': export_format, 'created_after': 'last week'})
+                self.assertEqual(response.status_code, 400)
+
+    def test_only_staff_can_export(self):
+        self.client.force_authenticate(self.consumer)
+        self.assertEqual(self.client.get(self.url, {'format': 'csv'}).status_code, 403)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(self.url, {'format': 'ndjson'}).status_code, 401)
+
 
-# Create your tests here.
+class DisputeQueryBudgetTests(query_budget.QueryBudgetTestCase):
+    endpoints = query_budget.endpoints_named(
+        'dispute-list', 'dispute-detail', 'dispute-stats',
+        'admin-dispute-list', 'admin-dispute-queue', 'admin-dispute-detail',
+    )
@@ -12,4 +12,8 @@ urlpatterns = [
     path('admin/list/', views.AdminDisputeListView.as_view(), name='admin-dispute-list'),
     path('admin/<int:pk>/', views.AdminDisputeDetailView.as_view(), name='admin-dispute-detail'),
     path('admin/<int:pk>/resolve/', views.DisputeResolveView.as_view(), name='admin-dispute-resolve'),
+    path('admin/<int:pk>/claim/', views.claim_dispute_view, name='admin-dispute-claim'),
+    path('admin/<int:pk>/release/', views.release_dispute_view, name='admin-dispute-release'),
+    path('admin/queue/', views.AdminDisputeQueueView.as_view(), name='admin-dispute-queue'),
+    path('admin/queue/claim-next/', views.claim_next_dispute_view, name='admin-dispute-claim-next'),
 ]
@@ -2,14 +2,33 @@ from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
-from django.db.models import Q
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from rentoshare.db.locking import write_atomic
+from rentoshare.exports import StreamingExportMixin
+from rentoshare.filters import filter_date_range
+from rentoshare.pagination import PriorityCursorPagination
 from .models import Dispute
+from .participants import visible_disputes
+from .queue import (
+    claim_dispute, claim_for_change, claim_next_dispute,
+    dispute_queue, release_dispute
+)
+from .stats import dispute_stats
 from .serializers import (
-    DisputeSerializer, DisputeCreateSerializer, 
+    DisputeSerializer, DisputeCreateSerializer, DisputeQueueSerializer,
     DisputeDetailSerializer, DisputeResolveSerializer
 )
 
+# Relations rendered by DisputeDetailSerializer
+DISPUTE_DETAIL_RELATIONS = (
+    'transaction__listing', 'transaction__vendor', 'transaction__consumer',
+    'raised_by', 'resolved_by',
+)
+
+# Relations rendered by DisputeQueueSerializer
+DISPUTE_QUEUE_RELATIONS = ('transaction', 'raised_by', 'resolved_by', 'claimed_by')
+
 class DisputeCreateView(generics.CreateAPIView):
     serializer_class = DisputeCreateSerializer
     permission_classes = [IsAuthenticated]
@@ -23,11 +42,7 @@ class DisputeListView(generics.ListAPIView):
     
     def get_queryset(self):
         user = self.request.user
-        return Dispute.objects.filter(
-            Q(raised_by=user) | 
-            Q(transaction__vendor=user) | 
-            Q(transaction__consumer=user)
-        ).order_by('-created_at')
+        return visible_disputes(user).select_related('raised_by', 'resolved_by').order_by('-created_at')
 
 class DisputeDetailView(generics.RetrieveAPIView):
     serializer_class = DisputeDetailSerializer
@@ -35,63 +50,97 @@ class DisputeDetailView(generics.RetrieveAPIView):
     
     def get_queryset(self):
         user = self.request.user
-        return Dispute.objects.filter(
-            Q(raised_by=user) | 
-            Q(transaction__vendor=user) | 
-            Q(transaction__consumer=user)
-        )
+        return visible_disputes(user).select_related(*DISPUTE_DETAIL_RELATIONS)
 
-class AdminDisputeListView(generics.ListAPIView):
-    queryset = Dispute.objects.all()
+class AdminDisputeListView(StreamingExportMixin, generics.ListAPIView):
+    queryset = Dispute.objects.select_related('raised_by', 'resolved_by')
     serializer_class = DisputeSerializer
     permission_classes = [IsAdminUser]
+    export_filename = 'disputes'
+    export_fields = (
+        ('id', 'id'),
+        ('transaction', 'transaction_id'),
+        ('raised_by', 'raised_by_id'),
+        ('raised_by_email', 'raised_by__email'),
+        ('raised_by_name', 'raised_by__full_name'),
+        ('reason', 'reason'),
+        ('status', 'status'),
+        ('created_at', 'created_at'),
+        ('resolved_at', 'resolved_at'),
+        ('resolved_by', 'resolved_by_id'),
+        ('resolved_by_email', 'resolved_by__email'),
+        ('resolution_notes', 'resolution_notes'),
+    )
     
     def get_queryset(self):
         queryset = super().get_queryset()
         dispute_status = self.request.query_params.get('status', None)
         if dispute_status:
             queryset = queryset.filter(status=dispute_status)
+        queryset = filter_date_range(queryset, self.request.query_params)
         return queryset.order_by('-created_at')
 
 class AdminDisputeDetailView(generics.RetrieveAPIView):
-    queryset = Dispute.objects.all()
+    queryset = Dispute.objects.select_related(*DISPUTE_DETAIL_RELATIONS)
     serializer_class = DisputeDetailSerializer
     permission_classes = [IsAdminUser]
 
+class AdminDisputeQueueView(generics.ListAPIView):
+    """Open disputes not claimed by another admin, highest priority first"""
+    serializer_class = DisputeQueueSerializer
+    permission_classes = [IsAdminUser]
+    pagination_class = PriorityCursorPagination
+    
+    def get_queryset(self):
+        return dispute_queue(self.request.user).select_related(*DISPUTE_QUEUE_RELATIONS)
+
 class DisputeResolveView(generics.UpdateAPIView):
     queryset = Dispute.objects.all()
     serializer_class = DisputeResolveSerializer
     permission_classes = [IsAdminUser]
     
     def perform_update(self, serializer):
-        serializer.save(
-            resolved_by=self.request.user,
-            resolved_at=timezone.now()
-        )
+        with write_atomic():
+            # Returns 409 while another admin has the dispute claimed
+            claim_for_change(serializer.instance, self.request.user)
+            # Saved whole, so start from the row as it is now
+            serializer.instance.refresh_from_db()
+            serializer.save(
+                resolved_by=self.request.user,
+                resolved_at=timezone.now(),
+                claimed_by=None,
+                claimed_at=None
+            )
+
+def _queue_response(dispute):
+    dispute = Dispute.objects.select_related(*DISPUTE_QUEUE_RELATIONS).get(pk=dispute.pk)
+    return Response(DisputeQueueSerializer(dispute).data)
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def claim_dispute_view(request, pk):
+    """Claim a dispute so no other admin works on it (409 if someone else holds it)"""
+    dispute = get_object_or_404(Dispute, pk=pk)
+    return _queue_response(claim_dispute(dispute, request.user))
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def release_dispute_view(request, pk):
+    """Hand a claimed dispute back to the queue"""
+    dispute = get_object_or_404(Dispute, pk=pk)
+    return _queue_response(release_dispute(dispute, request.user))
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def claim_next_dispute_view(request):
+    """Claim the most urgent open dispute nobody holds (204 if the queue is empty)"""
+    dispute = claim_next_dispute(request.user)
+    if dispute is None:
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return _queue_response(dispute)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def my_dispute_stats(request):
     """Get dispute statistics for the authenticated user"""
-    user = request.user
-    raised_disputes = Dispute.objects.filter(raised_by=user)
-    involved_disputes = Dispute.objects.filter(
-        Q(transaction__vendor=user) | Q(transaction__consumer=user)
-    )
-    
-    stats = {
-        'raised_by_me': {
-            'total': raised_disputes.count(),
-            'open': raised_disputes.filter(status='open').count(),
-            'resolved': raised_disputes.filter(status='resolved').count(),
-            'rejected': raised_disputes.filter(status='rejected').count(),
-        },
-        'involving_me': {
-            'total': involved_disputes.count(),
-            'open': involved_disputes.filter(status='open').count(),
-            'resolved': involved_disputes.filter(status='resolved').count(),
-            'rejected': involved_disputes.filter(status='rejected').count(),
-        }
-    }
-    
-    return Response(stats)
+    return Response(dispute_stats(request.user.pk))
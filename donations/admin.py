@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import DonationRequest
+from .models import DonationAllocation, DonationQueueEntry, DonationRequest
 
 @admin.register(DonationRequest)
 class DonationRequestAdmin(admin.ModelAdmin):
@@ -16,3 +16,16 @@ class DonationRequestAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at')
         }),
     )
+
+@admin.register(DonationAllocation)
+class DonationAllocationAdmin(admin.ModelAdmin):
+    list_display = ['listing', 'strategy', 'slots', 'closes_at', 'allocated_at']
+    list_filter = ['strategy', 'closes_at', 'allocated_at']
+    readonly_fields = ['allocated_at', 'created_at']
+
+@admin.register(DonationQueueEntry)
+class DonationQueueEntryAdmin(admin.ModelAdmin):
+    list_display = ['id', 'listing', 'user', 'status', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['listing__title', 'user__email']
+    readonly_fields = ['created_at']
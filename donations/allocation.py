@@ -0,0 +1,146 @@
+import logging
+import random
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Min
+from django.utils import timezone
+from rest_framework import serializers
+
+from listings.models import Listing
+from rentoshare.db.locking import write_atomic
+from .models import (
+    AllocationStrategy, DonationAllocation, DonationQueueEntry, DonationRequest,
+    QueueEntryStatus, RequestStatus
+)
+from .resolution import invalidate_after_settling
+
+logger = logging.getLogger(__name__)
+
+
+def open_allocation(listing_id):
+    """The allocation of `listing_id` if its queue still takes entries, else None"""
+    try:
+        listing_id = int(listing_id)
+    except (TypeError, ValueError):
+        return None
+    return DonationAllocation.objects.filter(listing_id=listing_id, allocated_at__isnull=True).first()
+
+
+def check_queue_entry_limit(listing_id, user_id):
+    """Raise ValidationError if `user_id` already holds DONATION_QUEUE_ENTRY_LIMIT waiting entries for the listing"""
+    waiting = DonationQueueEntry.objects.filter(
+        listing_id=listing_id, status=QueueEntryStatus.WAITING, user_id=user_id
+    )
+    if waiting.count() >= settings.DONATION_QUEUE_ENTRY_LIMIT:
+        raise serializers.ValidationError(
+            {'listing': [f'You can queue at most {settings.DONATION_QUEUE_ENTRY_LIMIT} requests for this listing.']}
+        )
+
+
+def _recent_wins(user_ids, now):
+    window_start = now - timedelta(days=settings.DONATION_ALLOCATION_CAP_WINDOW_DAYS)
+    return dict(
+        DonationRequest.objects
+        .filter(user_id__in=user_ids, status=RequestStatus.ACCEPTED, updated_at__gte=window_start)
+        .order_by()
+        .values('user_id')
+        .annotate(count=Count('id'))
+        .values_list('user_id', 'count')
+    )
+
+
+def allocate(allocation, now=None, rng=None, wins=None):
+    """
+    Pick the recipients of one listing from its queue and settle it.
+
+    Each waiting user counts once, however many entries they queued. FIFO
+    ranks users by their first entry, and lottery shuffles them. A user
+    already holding DONATION_ALLOCATION_USER_CAP accepted donations in the
+    cap window is skipped. `wins` carries those counts between listings
+    allocated in the same run. Winners get accepted DonationRequests and
+    all entries are marked won or lost with set-based UPDATEs. Without
+    winners the listing stays active and takes direct requests again.
+    Returns the winning user ids.
+    """
+    now = now or timezone.now()
+    rng = rng or random.SystemRandom()
+    listing_id = allocation.listing_id
+
+    with write_atomic():
+        waiting = DonationQueueEntry.objects.filter(listing_id=listing_id, status=QueueEntryStatus.WAITING)
+        candidates = list(
+            waiting
+            .exclude(user__in=DonationRequest.objects.filter(listing_id=listing_id).values('user'))
+            .order_by()
+            .values('user_id')
+            .annotate(first_entry=Min('id'))
+            .order_by('first_entry')
+            .values_list('user_id', 'first_entry')
+        )
+        if allocation.strategy == AllocationStrategy.LOTTERY:
+            rng.shuffle(candidates)
+
+        if wins is None:
+            wins = {}
+        recent = _recent_wins(waiting.values('user_id'), now)
+        for user_id, _ in candidates:
+            wins.setdefault(user_id, recent.get(user_id, 0))
+
+        winners = {}
+        for user_id, first_entry in candidates:
+            if len(winners) == allocation.slots:
+                break
+            if wins[user_id] < settings.DONATION_ALLOCATION_USER_CAP:
+                winners[user_id] = first_entry
+                wins[user_id] += 1
+
+        messages = dict(DonationQueueEntry.objects.filter(pk__in=winners.values()).values_list('user_id', 'message'))
+        DonationRequest.objects.bulk_create([
+            DonationRequest(listing_id=listing_id, user_id=user_id, message=messages.get(user_id),
+                            status=RequestStatus.ACCEPTED)
+            for user_id in winners
+        ])
+        waiting.filter(user_id__in=list(winners)).update(status=QueueEntryStatus.WON)
+        waiting.update(status=QueueEntryStatus.LOST)
+
+        user_ids = set(winners)
+        if winners:
+            # The listing is given away: settle direct requests the same way acceptance does
+            pending = DonationRequest.objects.filter(listing_id=listing_id, status=RequestStatus.PENDING)
+            user_ids.update(pending.values_list('user_id', flat=True))
+            pending.update(status=RequestStatus.REJECTED, updated_at=now)
+            Listing.objects.filter(pk=listing_id).update(is_active=False)
+        DonationAllocation.objects.filter(pk=listing_id).update(allocated_at=now)
+        owner_id = Listing.objects.filter(pk=listing_id).values_list('user_id', flat=True).first()
+        invalidate_after_settling([listing_id], user_ids | {owner_id})
+
+    allocation.allocated_at = now
+    return list(winners)
+
+
+def allocate_due(batch_size=50, now=None, rng=None):
+    """Allocate every listing whose queue has closed; returns (listings, recipients)"""
+    now = now or timezone.now()
+    started = time.perf_counter()
+    listings = recipients = 0
+    wins = {}
+    while True:
+        due = list(
+            DonationAllocation.objects
+            .filter(allocated_at__isnull=True, closes_at__lte=now)
+            .order_by('closes_at')[:batch_size]
+        )
+        for allocation in due:
+            recipients += len(allocate(allocation, now=now, rng=rng, wins=wins))
+        listings += len(due)
+        if len(due) < batch_size:
+            break
+
+    logger.info(
+        'donation_allocation listings=%d recipients=%d duration_ms=%.1f',
+        listings, recipients, (time.perf_counter() - started) * 1000,
+        extra={'listings': listings, 'recipients': recipients},
+    )
+    return listings, recipients
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from donations.allocation import allocate_due
+
+
+class Command(BaseCommand):
+    help = 'Pick recipients for donation listings whose allocation queue has closed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help='Listings allocated per batch')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep allocating every --interval seconds instead of exiting')
+        parser.add_argument('--interval', type=float, default=60.0,
+                            help='Seconds between runs when --loop is given')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive.')
+        if options['interval'] <= 0:
+            raise CommandError('--interval must be positive.')
+
+        while True:
+            listings, recipients = allocate_due(batch_size=options['batch_size'])
+            self.stdout.write(f'Allocated {listings} listings to {recipients} recipients')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,106 @@
+import random
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import User
+from donations.allocation import allocate
+from donations.models import AllocationStrategy, DonationAllocation, DonationRequest, RequestStatus
+from donations.views import DonationRequestCreateView
+from listings.models import Listing
+
+
+class Command(BaseCommand):
+    help = (
+        'Flood one donation listing with concurrent requests, once with direct '
+        'requests and once in allocation mode, and compare insert throughput'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=300,
+                            help='Number of requesting users')
+        parser.add_argument('--repeat', type=int, default=2,
+                            help='Times each user submits (impatient double clicks)')
+        parser.add_argument('--workers', type=int, default=32,
+                            help='Number of concurrent client threads')
+        parser.add_argument('--slots', type=int, default=5,
+                            help='Recipients picked by the allocator')
+        parser.add_argument('--strategy', choices=AllocationStrategy.values, default=AllocationStrategy.LOTTERY)
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--keep', action='store_true',
+                            help='Keep the generated users, listings and requests')
+
+    def handle(self, *args, **options):
+        if min(options['users'], options['repeat'], options['workers'], options['slots']) <= 0:
+            raise CommandError('--users, --repeat, --workers and --slots must be positive.')
+
+        tag = uuid.uuid4().hex[:8]
+        owner = User.objects.create_user(
+            email=f'queue-owner-{tag}@example.com', password=None, full_name='Queue Owner', phone='0'
+        )
+        users = User.objects.bulk_create([
+            User(email=f'queue-user-{tag}-{i}@example.com', full_name=f'Queue User {i}', phone='0', password='!')
+            for i in range(options['users'])
+        ])
+        direct, queued = [
+            Listing.objects.create(user=owner, title=f'{mode} donation {tag}', description='Donation queue benchmark',
+                                   listing_type='donation')
+            for mode in ('Direct', 'Queued')
+        ]
+        allocation = DonationAllocation.objects.create(
+            listing=queued, strategy=options['strategy'], slots=options['slots'],
+            closes_at=timezone.now() + timedelta(hours=1)
+        )
+
+        try:
+            for listing in (direct, queued):
+                self.flood(listing, users, options['repeat'], options['workers'])
+
+            winners = allocate(allocation, rng=random.Random(options['seed']))
+            accepted = DonationRequest.objects.filter(listing=queued, status=RequestStatus.ACCEPTED).count()
+            expected = min(options['slots'], len(users))
+            self.stdout.write(f'Allocator picked {len(winners)} recipients ({options["strategy"]})')
+            if len(set(winners)) != expected or accepted != expected:
+                raise CommandError(f'Expected {expected} distinct recipients, got {len(set(winners))}.')
+        finally:
+            if not options['keep']:
+                User.objects.filter(pk__in=[user.pk for user in users]).delete()
+                owner.delete()
+        self.stdout.write(self.style.SUCCESS('Allocation picked distinct recipients.'))
+
+    def flood(self, listing, users, repeat, workers):
+        factory = APIRequestFactory()
+        view = DonationRequestCreateView.as_view()
+
+        def submit(user):
+            request = factory.post('/api/donations/create/', {'listing': listing.pk, 'message': 'Please'},
+                                   format='json')
+            force_authenticate(request, user=user)
+            try:
+                return view(request).status_code
+            except Exception:
+                # Lock timeouts and other database errors surface as server errors in production
+                return 500
+            finally:
+                connection.close()
+
+        submissions = [user for user in users for _ in range(repeat)]
+        random.shuffle(submissions)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            codes = Counter(pool.map(submit, submissions))
+        elapsed = time.perf_counter() - started
+
+        stored = codes[201] + codes[202]
+        summary = ', '.join(f'{count}x {code}' for code, count in sorted(codes.items()))
+        self.stdout.write(
+            f'{listing.title}: {len(submissions)} submissions in {elapsed:.2f}s '
+            f'({len(submissions) / elapsed:.0f} req/s, {stored / elapsed:.0f} stored/s): {summary}'
+        )
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0001_initial'),
+        ('listings', '0002_listing_listing_active_created_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='donationrequest',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='donreq_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donationrequest',
+            index=models.Index(fields=['listing', 'created_at', 'id'], name='donreq_listing_created_idx'),
+        ),
+    ]
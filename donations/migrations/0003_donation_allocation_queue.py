@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0002_donationrequest_donreq_user_created_idx_and_more'),
+        ('listings', '0004_listing_geo_cell_listing_latitude_listing_longitude_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DonationAllocation',
+            fields=[
+                ('listing', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='donation_allocation', serialize=False, to='listings.listing')),
+                ('strategy', models.CharField(choices=[('lottery', 'Lottery'), ('fifo', 'First come, first served')], default='lottery', max_length=10)),
+                ('slots', models.PositiveIntegerField(default=1)),
+                ('closes_at', models.DateTimeField()),
+                ('allocated_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['allocated_at', 'closes_at'], name='donalloc_due_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DonationQueueEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('won', 'Won'), ('lost', 'Lost')], default='waiting', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='donation_queue_entries', to='listings.listing')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='donation_queue_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['listing', 'status', 'user', 'id'], name='donqueue_listing_idx'), models.Index(fields=['user', 'created_at', 'id'], name='donqueue_user_created_idx')],
+            },
+        ),
+    ]
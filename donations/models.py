@@ -22,6 +22,59 @@ class DonationRequest(models.Model):
     class Meta:
         unique_together = [['listing', 'user']]
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='donreq_user_created_idx'),
+            models.Index(fields=['listing', 'created_at', 'id'], name='donreq_listing_created_idx'),
+        ]
     
     def __str__(self):
         return f"Donation request for {self.listing.title} by {self.user.email} ({self.status})"
+
+class AllocationStrategy(models.TextChoices):
+    LOTTERY = 'lottery', 'Lottery'
+    FIFO = 'fifo', 'First come, first served'
+
+class DonationAllocation(models.Model):
+    """Allocation mode for a high-demand listing: requests queue up until `closes_at`"""
+    listing = models.OneToOneField(Listing, on_delete=models.CASCADE, primary_key=True, related_name='donation_allocation')
+    strategy = models.CharField(max_length=10, choices=AllocationStrategy.choices, default=AllocationStrategy.LOTTERY)
+    slots = models.PositiveIntegerField(default=1)
+    closes_at = models.DateTimeField()
+    allocated_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['allocated_at', 'closes_at'], name='donalloc_due_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_strategy_display()} allocation for listing {self.listing_id}"
+
+class QueueEntryStatus(models.TextChoices):
+    WAITING = 'waiting', 'Waiting'
+    WON = 'won', 'Won'
+    LOST = 'lost', 'Lost'
+
+class DonationQueueEntry(models.Model):
+    """
+    A request for a listing in allocation mode.
+
+    Append-only with no (listing, user) uniqueness, so concurrent inserts
+    never contend on a unique index; donations.allocation deduplicates users.
+    """
+    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='donation_queue_entries')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='donation_queue_entries')
+    message = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=10, choices=QueueEntryStatus.choices, default=QueueEntryStatus.WAITING)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['listing', 'status', 'user', 'id'], name='donqueue_listing_idx'),
+            models.Index(fields=['user', 'created_at', 'id'], name='donqueue_user_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Queue entry for listing {self.listing_id} by user {self.user_id} ({self.status})"
@@ -0,0 +1,101 @@
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+
+from listings.cache import bump_listing_version
+from listings.models import Listing
+from rentoshare.db.locking import write_atomic
+from rentoshare.user_stats import invalidate_user_stats
+from .models import DonationRequest, RequestStatus
+from .stats import CACHE_NAMESPACE
+
+
+class DonationAlreadyAccepted(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Another request for this listing has already been accepted.'
+    default_code = 'donation_already_accepted'
+
+
+def invalidate_after_settling(listing_ids, user_ids):
+    """Refresh listing and stats caches after set-based updates, which skip their signals"""
+    invalidate_user_stats(CACHE_NAMESPACE, user_ids)
+    listing_ids = set(listing_ids)
+    db_transaction.on_commit(lambda: [bump_listing_version(pk) for pk in listing_ids])
+
+
+def _accept(requests_by_listing, owner_id):
+    """Accept one request per listing, reject their pending siblings and close the listings"""
+    now = timezone.now()
+    listing_ids = list(requests_by_listing)
+    accepted_ids = list(requests_by_listing.values())
+
+    already = (
+        DonationRequest.objects
+        .filter(listing_id__in=listing_ids, status=RequestStatus.ACCEPTED)
+        .exclude(pk__in=accepted_ids)
+        .exists()
+    )
+    if already:
+        raise DonationAlreadyAccepted()
+
+    siblings = DonationRequest.objects.filter(listing_id__in=listing_ids, status=RequestStatus.PENDING)
+    user_ids = set(siblings.values_list('user_id', flat=True))
+    user_ids.update(DonationRequest.objects.filter(pk__in=accepted_ids).values_list('user_id', flat=True))
+
+    DonationRequest.objects.filter(pk__in=accepted_ids).update(status=RequestStatus.ACCEPTED, updated_at=now)
+    rejected = siblings.exclude(pk__in=accepted_ids).update(status=RequestStatus.REJECTED, updated_at=now)
+    Listing.objects.filter(pk__in=listing_ids).update(is_active=False)
+
+    invalidate_after_settling(listing_ids, user_ids | {owner_id})
+    return rejected
+
+
+def accept_donation_request(donation_request):
+    """
+    Accept `donation_request` and settle its listing in one transaction.
+
+    Every other pending request for the listing is rejected and the listing
+    is deactivated, each with a single UPDATE however many requests there
+    are. Raises DonationAlreadyAccepted if the listing was already given to
+    someone else. Returns the number of sibling requests rejected.
+    """
+    with write_atomic():
+        owner_id = Listing.objects.select_for_update().values_list('user_id', flat=True).get(
+            pk=donation_request.listing_id
+        )
+        rejected = _accept({donation_request.listing_id: donation_request.pk}, owner_id)
+    donation_request.status = RequestStatus.ACCEPTED
+    return rejected
+
+
+def bulk_update_status(owner, ids, new_status):
+    """
+    Accept or reject many of `owner`'s received donation requests at once.
+
+    Accepting settles each listing as accept_donation_request does, so at
+    most one id per listing may be accepted. Raises ValidationError for ids
+    that are unknown or not received by `owner`. Returns the number of
+    requests whose status changed, siblings included.
+    """
+    ids = set(ids)
+    with write_atomic():
+        rows = list(DonationRequest.objects.select_for_update().filter(
+            pk__in=ids, listing__user=owner
+        ).values_list('id', 'listing_id', 'user_id'))
+        unknown = ids - {pk for pk, _, _ in rows}
+        if unknown:
+            raise serializers.ValidationError({'ids': [f'Unknown donation requests: {sorted(unknown)}']})
+
+        if new_status == RequestStatus.ACCEPTED:
+            requests_by_listing = {}
+            for pk, listing_id, _ in rows:
+                if requests_by_listing.setdefault(listing_id, pk) != pk:
+                    raise serializers.ValidationError(
+                        {'ids': ['Only one request per listing can be accepted.']}
+                    )
+            return len(rows) + _accept(requests_by_listing, owner.pk)
+
+        DonationRequest.objects.filter(pk__in=ids).update(status=new_status, updated_at=timezone.now())
+        invalidate_after_settling({listing_id for _, listing_id, _ in rows}, {user_id for _, _, user_id in rows} | {owner.pk})
+        return len(rows)
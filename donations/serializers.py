@@ -1,5 +1,7 @@
+from django.utils import timezone
 from rest_framework import serializers
-from .models import DonationRequest
+from .models import DonationAllocation, DonationQueueEntry, DonationRequest
+from rentoshare.bulk import MAX_BULK_IDS
 from listings.serializers import ListingSerializer
 from accounts.serializers import UserSerializer
 
@@ -41,3 +43,43 @@ class DonationRequestStatusUpdateSerializer(serializers.ModelSerializer):
         if value not in ['accepted', 'rejected']:
             raise serializers.ValidationError("Status must be 'accepted' or 'rejected'")
         return value
+
+class DonationRequestBulkStatusSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=MAX_BULK_IDS
+    )
+    status = serializers.ChoiceField(choices=['accepted', 'rejected'])
+
+class DonationAllocationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DonationAllocation
+        fields = ['listing', 'strategy', 'slots', 'closes_at', 'allocated_at', 'created_at']
+        read_only_fields = ['allocated_at', 'created_at']
+    
+    def validate_listing(self, value):
+        if value.user_id != self.context['request'].user.pk:
+            raise serializers.ValidationError("You can only allocate your own listings")
+        if value.listing_type != 'donation':
+            raise serializers.ValidationError("Only donation listings can use allocation mode")
+        return value
+    
+    def validate_slots(self, value):
+        if value < 1:
+            raise serializers.ValidationError("At least one slot is required")
+        return value
+    
+    def validate_closes_at(self, value):
+        if value <= timezone.now():
+            raise serializers.ValidationError("The queue must close in the future")
+        return value
+
+class DonationQueueEntryCreateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DonationQueueEntry
+        fields = ['listing', 'message']
+
+class DonationQueueEntrySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DonationQueueEntry
+        fields = ['id', 'listing', 'user', 'message', 'status', 'created_at']
+        read_only_fields = fields
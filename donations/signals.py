@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import DonationRequest
+from .stats import invalidate_donation_stats
+
+
+@receiver(post_save, sender=DonationRequest)
+@receiver(post_delete, sender=DonationRequest)
+def invalidate_stats_cache(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_donation_stats(instance)
@@ -0,0 +1,29 @@
+from rentoshare.user_stats import cached_user_stats, invalidate_user_stats, status_counts
+from listings.models import Listing
+
+from .models import DonationRequest, RequestStatus
+
+CACHE_NAMESPACE = 'donations'
+
+
+def compute_donation_stats(user_id):
+    """Donation request counts for one user: one aggregate query per side"""
+    made = DonationRequest.objects.filter(user_id=user_id)
+    received = DonationRequest.objects.filter(listing__user_id=user_id)
+    return {
+        'requests_made': status_counts(made, RequestStatus.values),
+        'requests_received': status_counts(received, RequestStatus.values),
+    }
+
+
+def donation_stats(user_id):
+    return cached_user_stats(CACHE_NAMESPACE, user_id, lambda: compute_donation_stats(user_id))
+
+
+def invalidate_donation_stats(donation_request):
+    """Forget the cached stats of the requester and of the listing owner"""
+    if DonationRequest.listing.is_cached(donation_request):
+        owner_ids = [donation_request.listing.user_id]
+    else:
+        owner_ids = list(Listing.objects.filter(pk=donation_request.listing_id).values_list('user_id', flat=True))
+    invalidate_user_stats(CACHE_NAMESPACE, [donation_request.user_id, *owner_ids])
@@ -1,3 +1,175 @@
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from accounts.models import User
+from listings.models import Listing
+from rentoshare import query_budget
+from rentoshare.bulk import MAX_BULK_IDS
+from .allocation import allocate_due
+from .models import DonationAllocation, DonationQueueEntry, DonationRequest, QueueEntryStatus, RequestStatus
+from .views import DonationRequestStatusUpdateView
+
+BULK_URL = '/api/donations/bulk-status/'
+CREATE_URL = '/api/donations/create/'
+ALLOCATION_URL = '/api/donations/allocation/'
+
+
+def create_requesters(count, tag=''):
+    return User.objects.bulk_create([
+        User(email=f'requester{tag}-{i}@example.com', full_name=f'Requester {i}', phone='0', password='!')
+        for i in range(count)
+    ])
+
+
+def create_requested_listing(owner, requesters):
+    listing = Listing.objects.create(user=owner, title='Sofa', description='Three seats', listing_type='donation')
+    DonationRequest.objects.bulk_create([DonationRequest(listing=listing, user=user) for user in requesters])
+    ids = list(DonationRequest.objects.filter(listing=listing).order_by('id').values_list('id', flat=True))
+    return listing, ids
+
+
+class DonationResolutionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password=None, full_name='Owner', phone='0')
+        cls.requesters = create_requesters(MAX_BULK_IDS + 100)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def assertSettled(self, listing, accepted_id):
+        listing.refresh_from_db()
+        self.assertFalse(listing.is_active)
+        statuses = dict(DonationRequest.objects.filter(listing=listing).values_list('id', 'status'))
+        self.assertEqual(statuses.pop(accepted_id), RequestStatus.ACCEPTED)
+        self.assertEqual(set(statuses.values()), {RequestStatus.REJECTED})
+
+    def accept(self, listing, accepted_id):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(
+                f'/api/donations/{accepted_id}/status/', {'status': 'accepted'}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertSettled(listing, accepted_id)
+        return len(context.captured_queries)
+
+    def test_accepting_settles_the_listing_in_fixed_queries(self):
+        listing, ids = create_requested_listing(self.owner, self.requesters[:2])
+        few = self.accept(listing, ids[0])
+        listing, ids = create_requested_listing(self.owner, self.requesters)
+        self.assertEqual(self.accept(listing, ids[0]), few)
+
+    def test_bulk_calls_settle_the_listing(self):
+        listing, ids = create_requested_listing(self.owner, self.requesters)
+        rejected = ids[1:MAX_BULK_IDS + 1]
+        response = self.client.post(BULK_URL, {'ids': rejected, 'status': 'rejected'}, format='json')
+        self.assertEqual(response.data, {'updated': MAX_BULK_IDS})
+        response = self.client.post(BULK_URL, {'ids': ids[:MAX_BULK_IDS + 1], 'status': 'rejected'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(BULK_URL, {'ids': [ids[0]], 'status': 'accepted'}, format='json')
+        self.assertEqual(response.data, {'updated': len(ids) - MAX_BULK_IDS})
+        self.assertSettled(listing, ids[0])
+
+
+class DonationAllocationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password=None, full_name='Owner', phone='0')
+        cls.requester = User.objects.create_user(
+            email='requester@example.com', password=None, full_name='Requester', phone='0'
+        )
+        cls.listing = Listing.objects.create(
+            user=cls.owner, title='Sofa', description='Three seats', listing_type='donation'
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def open_queue(self, closes_in=timedelta(hours=1)):
+        self.client.force_authenticate(self.owner)
+        return self.client.post(ALLOCATION_URL, {
+            'listing': self.listing.pk, 'strategy': 'fifo', 'slots': 1,
+            'closes_at': (timezone.now() + closes_in).isoformat(),
+        }, format='json')
+
+    def request_donation(self, user=None):
+        self.client.force_authenticate(user or self.requester)
+        return self.client.post(CREATE_URL, {'listing': self.listing.pk}, format='json')
+
+    def test_queues_must_close_in_the_future(self):
+        self.assertEqual(self.open_queue(closes_in=-timedelta(minutes=1)).status_code, 400)
+        self.assertEqual(self.open_queue().status_code, 201)
+
+    @override_settings(DONATION_QUEUE_ENTRY_LIMIT=2)
+    def test_queue_entries_per_user_are_limited(self):
+        self.open_queue()
+        self.assertEqual([self.request_donation().status_code for _ in range(3)], [202, 202, 400])
+        self.assertEqual(DonationQueueEntry.objects.filter(user=self.requester).count(), 2)
+
+    def test_allocation_without_winners_reopens_the_listing(self):
+        self.open_queue()
+        self.assertEqual(self.request_donation().status_code, 202)
+        # The only queued user already requested the listing before it was queued
+        DonationRequest.objects.create(listing=self.listing, user=self.requester)
+        DonationAllocation.objects.update(closes_at=timezone.now())
+
+        self.assertEqual(allocate_due(), (1, 0))
+        self.listing.refresh_from_db()
+        self.assertTrue(self.listing.is_active)
+        self.assertEqual(DonationQueueEntry.objects.get().status, QueueEntryStatus.LOST)
+        newcomer = User.objects.create_user(email='new@example.com', password=None, full_name='New', phone='0')
+        self.assertEqual(self.request_donation(newcomer).status_code, 201)
+
+    def test_allocation_with_a_winner_settles_the_listing(self):
+        self.open_queue()
+        self.request_donation()
+        DonationAllocation.objects.update(closes_at=timezone.now())
+
+        self.assertEqual(allocate_due(), (1, 1))
+        self.listing.refresh_from_db()
+        self.assertFalse(self.listing.is_active)
+        self.assertEqual(DonationRequest.objects.get(user=self.requester).status, RequestStatus.ACCEPTED)
+
+
+class ConcurrentAcceptTests(TransactionTestCase):
+    """Parallel accepts of different requests for one listing accept exactly one"""
+    requests = 24
+    workers = 8
+
+    def test_parallel_accepts_settle_the_listing_once(self):
+        owner = User.objects.create_user(email='owner@example.com', password=None, full_name='Owner', phone='0')
+        listing, ids = create_requested_listing(owner, create_requesters(self.requests))
+        factory = APIRequestFactory()
+        view = DonationRequestStatusUpdateView.as_view()
+
+        def accept(pk):
+            request = factory.patch(f'/api/donations/{pk}/status/', {'status': 'accepted'}, format='json')
+            force_authenticate(request, user=owner)
+            try:
+                return view(request, pk=pk).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            codes = list(pool.map(accept, ids))
+
+        self.assertEqual(sorted(set(codes)), [200, 409])
+        self.assertEqual(codes.count(200), 1)
+        accepted = DonationRequest.objects.get(listing=listing, status=RequestStatus.ACCEPTED)
+        self.assertEqual(codes[ids.index(accepted.pk)], 200)
+        self.assertFalse(DonationRequest.objects.filter(listing=listing, status=RequestStatus.PENDING).exists())
+
+
+class DonationQueryBudgetTests(query_budget.QueryBudgetTestCase):
+    endpoints = query_budget.endpoints_named(
+        'donation-request-list', 'donation-request-detail', 'received-donation-requests',
+        'donation-stats', 'listing-donation-requests',
+    )
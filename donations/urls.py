@@ -8,7 +8,10 @@ urlpatterns = [
     path('<int:pk>/', views.DonationRequestDetailView.as_view(), name='donation-request-detail'),
     path('received/', views.ReceivedDonationRequestsView.as_view(), name='received-donation-requests'),
     path('<int:pk>/status/', views.DonationRequestStatusUpdateView.as_view(), name='donation-request-status-update'),
+    path('bulk-status/', views.bulk_update_donation_status, name='donation-request-bulk-status'),
     path('stats/', views.my_donation_stats, name='donation-stats'),
+    path('allocation/', views.DonationAllocationCreateView.as_view(), name='donation-allocation-create'),
+    path('queue/', views.MyDonationQueueEntriesView.as_view(), name='donation-queue-entries'),
     
     # Public donation endpoints
     path('listing/<int:listing_id>/', views.listing_donation_requests, name='listing-donation-requests'),
@@ -1,20 +1,60 @@
-from rest_framework import generics, permissions, status
+from rest_framework import generics, permissions, serializers, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db import IntegrityError, transaction as db_transaction
 from django.db.models import Q
-from .models import DonationRequest
+from rentoshare.db.locking import write_atomic
+from .allocation import check_queue_entry_limit, open_allocation
+from .models import DonationQueueEntry, DonationRequest
+from .resolution import accept_donation_request, bulk_update_status
+from .stats import donation_stats
 from .serializers import (
     DonationRequestSerializer, DonationRequestCreateSerializer,
-    DonationRequestDetailSerializer, DonationRequestStatusUpdateSerializer
+    DonationRequestDetailSerializer, DonationRequestStatusUpdateSerializer,
+    DonationRequestBulkStatusSerializer, DonationAllocationSerializer,
+    DonationQueueEntryCreateSerializer, DonationQueueEntrySerializer
 )
 
 class DonationRequestCreateView(generics.CreateAPIView):
     serializer_class = DonationRequestCreateSerializer
     permission_classes = [IsAuthenticated]
     
+    def create(self, request, *args, **kwargs):
+        if open_allocation(request.data.get('listing')) is None:
+            return super().create(request, *args, **kwargs)
+        
+        # Listing is in allocation mode: queue the request instead (202, decided later)
+        serializer = DonationQueueEntryCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        listing = serializer.validated_data['listing']
+        with write_atomic():
+            # Holds the write lock, so the allocator cannot close the queue in between
+            if open_allocation(listing.pk) is None:
+                raise serializers.ValidationError({'listing': ['Donations for this listing have already been allocated.']})
+            check_queue_entry_limit(listing.pk, request.user.pk)
+            entry = serializer.save(user=request.user)
+        return Response(DonationQueueEntrySerializer(entry).data, status=status.HTTP_202_ACCEPTED)
+    
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        try:
+            with db_transaction.atomic():
+                serializer.save(user=self.request.user)
+        except IntegrityError:
+            raise serializers.ValidationError({'listing': ['You have already requested this listing.']})
+
+class DonationAllocationCreateView(generics.CreateAPIView):
+    """Put one of the user's donation listings in allocation mode"""
+    serializer_class = DonationAllocationSerializer
+    permission_classes = [IsAuthenticated]
+
+class MyDonationQueueEntriesView(generics.ListAPIView):
+    """The user's queued requests for listings in allocation mode"""
+    serializer_class = DonationQueueEntrySerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return DonationQueueEntry.objects.filter(user=self.request.user).order_by('-created_at')
 
 class DonationRequestListView(generics.ListAPIView):
     serializer_class = DonationRequestSerializer
@@ -22,7 +62,7 @@ class DonationRequestListView(generics.ListAPIView):
     
     def get_queryset(self):
         user = self.request.user
-        return DonationRequest.objects.filter(user=user).order_by('-created_at')
+        return DonationRequest.objects.filter(user=user).select_related('listing', 'user').order_by('-created_at')
 
 class DonationRequestDetailView(generics.RetrieveAPIView):
     serializer_class = DonationRequestDetailSerializer
@@ -32,7 +72,7 @@ class DonationRequestDetailView(generics.RetrieveAPIView):
         user = self.request.user
         return DonationRequest.objects.filter(
             Q(user=user) | Q(listing__user=user)
-        )
+        ).select_related('listing__user', 'user')
 
 class ReceivedDonationRequestsView(generics.ListAPIView):
     """View for donation requests received for user's listings"""
@@ -43,7 +83,7 @@ class ReceivedDonationRequestsView(generics.ListAPIView):
         user = self.request.user
         return DonationRequest.objects.filter(
             listing__user=user
-        ).order_by('-created_at')
+        ).select_related('listing', 'user').order_by('-created_at')
 
 class DonationRequestStatusUpdateView(generics.UpdateAPIView):
     serializer_class = DonationRequestStatusUpdateSerializer
@@ -53,35 +93,30 @@ class DonationRequestStatusUpdateView(generics.UpdateAPIView):
         # Only listing owners can update donation request status
         user = self.request.user
         return DonationRequest.objects.filter(listing__user=user)
+    
+    def perform_update(self, serializer):
+        if serializer.validated_data['status'] == 'accepted':
+            # Also rejects the other pending requests and deactivates the listing
+            accept_donation_request(serializer.instance)
+        else:
+            serializer.save()
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_update_donation_status(request):
+    """Accept or reject many donation requests received for the user's listings"""
+    serializer = DonationRequestBulkStatusSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    updated = bulk_update_status(
+        request.user, serializer.validated_data['ids'], serializer.validated_data['status']
+    )
+    return Response({'updated': updated})
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def my_donation_stats(request):
     """Get donation statistics for the authenticated user"""
-    user = request.user
-    
-    # Requests made by user
-    made_requests = DonationRequest.objects.filter(user=user)
-    
-    # Requests received for user's listings
-    received_requests = DonationRequest.objects.filter(listing__user=user)
-    
-    stats = {
-        'requests_made': {
-            'total': made_requests.count(),
-            'pending': made_requests.filter(status='pending').count(),
-            'accepted': made_requests.filter(status='accepted').count(),
-            'rejected': made_requests.filter(status='rejected').count(),
-        },
-        'requests_received': {
-            'total': received_requests.count(),
-            'pending': received_requests.filter(status='pending').count(),
-            'accepted': received_requests.filter(status='accepted').count(),
-            'rejected': received_requests.filter(status='rejected').count(),
-        }
-    }
-    
-    return Response(stats)
+    return Response(donation_stats(request.user.pk))
 
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
@@ -90,7 +125,7 @@ def listing_donation_requests(request, listing_id):
     requests = DonationRequest.objects.filter(
         listing_id=listing_id, 
         status='accepted'
-    ).order_by('-created_at')
+    ).select_related('listing', 'user').order_by('-created_at')
     
     serializer = DonationRequestSerializer(requests, many=True)
     return Response(serializer.data)
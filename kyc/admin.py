@@ -1,12 +1,12 @@
 from django.contrib import admin
-from .models import KYC
+from .models import KYC, DocumentHash
 
 @admin.register(KYC)
 class KYCAdmin(admin.ModelAdmin):
-    list_display = ['user', 'kyc_status', 'document_type', 'is_verified', 'submitted_at']
-    list_filter = ['kyc_status', 'document_type', 'is_verified', 'submitted_at']
+    list_display = ['user', 'kyc_status', 'document_type', 'is_verified', 'possible_duplicate', 'submitted_at']
+    list_filter = ['kyc_status', 'document_type', 'is_verified', 'possible_duplicate', 'submitted_at']
     search_fields = ['user__email', 'user__full_name', 'gov_id_number']
-    readonly_fields = ['submitted_at', 'verified_at']
+    readonly_fields = ['submitted_at', 'verified_at', 'possible_duplicate']
     
     fieldsets = (
         ('User Information', {
@@ -25,7 +25,7 @@ class KYCAdmin(admin.ModelAdmin):
             'fields': ('emergency_contact_name', 'emergency_contact_phone', 'emergency_contact_relation')
         }),
         ('Verification Details', {
-            'fields': ('submitted_at', 'verified_at', 'verified_by', 'rejection_reason')
+            'fields': ('submitted_at', 'verified_at', 'verified_by', 'rejection_reason', 'possible_duplicate')
         }),
     )
     
@@ -34,3 +34,11 @@ class KYCAdmin(admin.ModelAdmin):
         if obj:  # Editing existing object
             readonly_fields.extend(['user', 'gov_id_number', 'document_type'])
         return readonly_fields
+
+
+@admin.register(DocumentHash)
+class DocumentHashAdmin(admin.ModelAdmin):
+    list_display = ['kyc', 'side', 'phash', 'hashed_at']
+    list_filter = ['side']
+    search_fields = ['kyc__user__email']
+    raw_id_fields = ['kyc']
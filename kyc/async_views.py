@@ -0,0 +1,15 @@
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import apublic_status
+
+
+async def kyc_public_status(request, user_id, **kwargs):
+    """kyc_public_status, async"""
+    payload = await apublic_status(user_id)
+    if payload is None:
+        return Response(
+            {"detail": "KYC not found for this user."},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return Response(payload)
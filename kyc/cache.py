@@ -0,0 +1,128 @@
+import asyncio
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from rentoshare.async_db import db
+from rentoshare.routers import primary_reads
+
+from .models import KYC
+from .serializers import KYCPublicSerializer
+
+# Users without a KYC are cached as this marker, so repeated 404s skip the database too
+NOT_FOUND = 'not-found'
+
+HITS_KEY = 'kyc:public:hits'
+MISSES_KEY = 'kyc:public:misses'
+COUNTER_TIMEOUT = None
+
+
+def _key(user_id):
+    return f'kyc:public:{user_id}'
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # First event since the counters were (re)set
+        if not cache.add(key, 1, timeout=COUNTER_TIMEOUT):
+            cache.incr(key)
+
+
+async def _acount(key):
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        if not await cache.aadd(key, 1, timeout=COUNTER_TIMEOUT):
+            await cache.aincr(key)
+
+
+def _entry(kyc):
+    """(cached value, timeout) of a KYC, or of a missing one"""
+    if kyc is None:
+        return NOT_FOUND, settings.KYC_PUBLIC_NOT_FOUND_CACHE_TIMEOUT
+    return KYCPublicSerializer(kyc).data, settings.KYC_PUBLIC_CACHE_TIMEOUT
+
+
+def _store(user_id, kyc):
+    value, timeout = _entry(kyc)
+    cache.set(_key(user_id), value, timeout=timeout)
+    return None if kyc is None else value
+
+
+def _public_kycs(user_id):
+    return KYC.objects.select_related('user').filter(user_id=user_id)
+
+
+def public_status(user_id):
+    """The public KYC payload of `user_id`, or None if they have no KYC, served from cache when possible"""
+    payload = cache.get(_key(user_id))
+    if payload is not None:
+        _count(HITS_KEY)
+        return None if payload == NOT_FOUND else payload
+
+    _count(MISSES_KEY)
+    # Cached for minutes, so read past the replica lag
+    with primary_reads():
+        kyc = _public_kycs(user_id).first()
+    return _store(user_id, kyc)
+
+
+async def apublic_status(user_id):
+    """public_status for async views"""
+    payload = await cache.aget(_key(user_id))
+    if payload is not None:
+        await _acount(HITS_KEY)
+        return None if payload == NOT_FOUND else payload
+
+    def fetch():
+        with primary_reads():
+            return _public_kycs(user_id).first()
+
+    # Counting the miss does not need to wait for the database
+    _, kyc = await asyncio.gather(_acount(MISSES_KEY), db(fetch))
+    value, timeout = _entry(kyc)
+    await cache.aset(_key(user_id), value, timeout=timeout)
+    return None if kyc is None else value
+
+
+def write_public_status(kyc):
+    """Replace the cached public payload of `kyc.user` once the current transaction commits"""
+    transaction.on_commit(lambda: _store(kyc.user_id, kyc))
+
+
+def write_public_statuses(kycs):
+    """write_public_status for many KYCs at once; their users should be loaded with select_related"""
+    payloads = {
+        _key(kyc.user_id): payload
+        for kyc, payload in zip(kycs, KYCPublicSerializer(kycs, many=True).data)
+    }
+    if payloads:
+        transaction.on_commit(
+            lambda: cache.set_many(payloads, timeout=settings.KYC_PUBLIC_CACHE_TIMEOUT)
+        )
+
+
+def invalidate_public_status(user_ids):
+    """Drop the cached public payloads of `user_ids` once the current transaction commits"""
+    keys = [_key(user_id) for user_id in set(user_ids) if user_id is not None]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def cache_stats():
+    """Hit and miss counts of the public status cache since they were last reset"""
+    counts = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits, misses = counts.get(HITS_KEY, 0), counts.get(MISSES_KEY, 0)
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / lookups, 4) if lookups else None,
+    }
+
+
+def reset_cache_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
@@ -0,0 +1,199 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils._os import safe_join
+
+from .models import DocumentHash, DocumentSide, KYC
+from .phash import hash_documents
+
+logger = logging.getLogger(__name__)
+
+# Multi-index hashing: two hashes within distance d < BANDS differ in at most
+# d bands, so they share at least one band exactly (pigeonhole). Looking up
+# each band with an index seek finds every candidate.
+BANDS = 4
+BAND_BITS = 16
+BAND_MASK = (1 << BAND_BITS) - 1
+HASH_BITS = BANDS * BAND_BITS
+
+_pool = None
+_store_pool = None
+_pool_lock = threading.Lock()
+
+
+def hashing_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned workers never inherit the parent's database connections
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.KYC_HASH_WORKERS, mp_context=multiprocessing.get_context('spawn')
+            )
+    return _pool
+
+
+def storing_pool():
+    global _store_pool
+    with _pool_lock:
+        if _store_pool is None:
+            # One thread with its own connection writes every result, away from request threads
+            _store_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='kyc-hash-store')
+    return _store_pool
+
+
+def submit_hashing(jobs):
+    """Hash `jobs` in the pool, starting a new pool if a worker of the current one died"""
+    global _pool
+    try:
+        return hashing_pool().submit(hash_documents, jobs)
+    except BrokenProcessPool:
+        with _pool_lock:
+            _pool = None
+        return hashing_pool().submit(hash_documents, jobs)
+
+
+def split_bands(value):
+    return [(value >> (BAND_BITS * i)) & BAND_MASK for i in range(BANDS)]
+
+
+def _to_signed(value):
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def _to_unsigned(value):
+    return value & ((1 << HASH_BITS) - 1)
+
+
+def document_path(name):
+    """Local file of a stored document name, or None if it is not under KYC_DOCUMENT_ROOT"""
+    if not name or '://' in name:
+        return None
+    try:
+        return safe_join(settings.KYC_DOCUMENT_ROOT, name)
+    except SuspiciousFileOperation:
+        return None
+
+
+def document_jobs(kyc):
+    # Plain values only: workers must unpickle jobs without loading Django
+    sides = ((DocumentSide.FRONT.value, kyc.document_front_picture), (DocumentSide.BACK.value, kyc.document_back_picture))
+    return [(kyc.pk, side, path) for side, name in sides if (path := document_path(name))]
+
+
+def store_hashes(kyc_ids, results):
+    """Replace the stored hashes of `kyc_ids` with `(kyc_id, side, hash)` results"""
+    rows = [
+        DocumentHash(kyc_id=kyc_id, side=side, phash=_to_signed(value),
+                     **{f'band{i}': band for i, band in enumerate(split_bands(value))})
+        for kyc_id, side, value in results if value is not None
+    ]
+    with transaction.atomic():
+        DocumentHash.objects.filter(kyc_id__in=kyc_ids).delete()
+        DocumentHash.objects.bulk_create(rows)
+    return len(rows)
+
+
+def flag_duplicates(kyc_ids):
+    """Set possible_duplicate on `kyc_ids` from their stored hashes; returns the flagged ids"""
+    flagged = [kyc_id for kyc_id in kyc_ids if kyc_duplicates(KYC(pk=kyc_id))]
+    KYC.objects.filter(pk__in=flagged).update(possible_duplicate=True)
+    KYC.objects.filter(pk__in=kyc_ids).exclude(pk__in=flagged).update(possible_duplicate=False)
+    return flagged
+
+
+def _store_finished(kyc_ids, future):
+    # Runs on the storing thread, never on a request thread
+    try:
+        store_hashes(kyc_ids, future.result())
+        flag_duplicates(kyc_ids)
+    except Exception:
+        logger.exception('Storing document hashes of KYC %s failed', kyc_ids)
+    finally:
+        connection.close()
+
+
+def queue_document_hashing(kyc):
+    """Hash `kyc`'s documents in the process pool once the current transaction commits"""
+    kyc_id = kyc.pk
+    jobs = document_jobs(kyc)
+
+    def submit():
+        try:
+            future = submit_hashing(jobs)
+        except BrokenProcessPool:
+            # The submission stays unhashed until rebuild_document_hashes runs
+            logger.exception('Cannot queue document hashing of KYC %s', kyc_id)
+            return
+        # A future that is already done runs its callback right here, on the request thread
+        future.add_done_callback(lambda done: storing_pool().submit(_store_finished, [kyc_id], done))
+
+    transaction.on_commit(submit)
+
+
+def rebuild_document_hashes(batch_size=100, rehash=False):
+    """Hash and flag the documents of every KYC not yet indexed (all of them with `rehash`); returns the KYC count"""
+    kycs = KYC.objects.order_by('pk').only('pk', 'document_front_picture', 'document_back_picture')
+    if not rehash:
+        kycs = kycs.filter(document_hashes__isnull=True)
+    batches = []
+    last_pk = 0
+    while True:
+        batch = list(kycs.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+        batches.append(([kyc.pk for kyc in batch], [job for kyc in batch for job in document_jobs(kyc)]))
+
+    futures = [(kyc_ids, submit_hashing(jobs)) for kyc_ids, jobs in batches]
+    for kyc_ids, future in futures:
+        store_hashes(kyc_ids, future.result())
+        flag_duplicates(kyc_ids)
+    return sum(len(kyc_ids) for kyc_ids, _ in batches)
+
+
+def band_candidates(value):
+    """Stored hashes sharing at least one band with `value`"""
+    shares_band = Q()
+    for i, band in enumerate(split_bands(value)):
+        shares_band |= Q(**{f'band{i}': band})
+    return DocumentHash.objects.filter(shares_band)
+
+
+def near_duplicates(value, max_distance=None, exclude_kyc_id=None):
+    """
+    Stored documents whose hash is within `max_distance` bits of `value`.
+
+    Returns `(kyc_id, side, distance)` tuples, closest first. The lookup is
+    one query of BANDS index seeks, whatever the number of stored hashes.
+    """
+    if max_distance is None:
+        max_distance = settings.KYC_DUPLICATE_MAX_DISTANCE
+    if not 0 <= max_distance < BANDS:
+        raise ValueError(f'max_distance must be between 0 and {BANDS - 1}.')
+
+    candidates = band_candidates(value)
+    if exclude_kyc_id is not None:
+        candidates = candidates.exclude(kyc_id=exclude_kyc_id)
+
+    matches = []
+    for kyc_id, side, stored in candidates.values_list('kyc_id', 'side', 'phash'):
+        distance = (value ^ _to_unsigned(stored)).bit_count()
+        if distance <= max_distance:
+            matches.append((kyc_id, side, distance))
+    return sorted(matches, key=lambda match: (match[2], match[0]))
+
+
+def kyc_duplicates(kyc):
+    """Other KYCs whose document images nearly match one of `kyc`'s"""
+    found = []
+    for side, stored in kyc.document_hashes.values_list('side', 'phash'):
+        for kyc_id, matched_side, distance in near_duplicates(_to_unsigned(stored), exclude_kyc_id=kyc.pk):
+            found.append({'side': side, 'kyc': kyc_id, 'matched_side': matched_side, 'distance': distance})
+    return sorted(found, key=lambda match: (match['distance'], match['kyc']))
@@ -0,0 +1,98 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from accounts.models import User
+from kyc.duplicates import BANDS, HASH_BITS, band_candidates, near_duplicates, store_hashes
+from kyc.models import KYC, DocumentHash, DocumentSide
+from rentoshare.query_budget import full_scans
+
+
+class Command(BaseCommand):
+    help = (
+        'Index random document hashes in a throwaway test database and compare '
+        'banded near-duplicate lookups with a full scan'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kycs', type=int, default=100000,
+                            help='KYCs seeded, each with a front and a back hash')
+        parser.add_argument('--lookups', type=int, default=200)
+        parser.add_argument('--max-distance', type=int, default=BANDS - 1)
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if min(options['kycs'], options['lookups']) <= 0:
+            raise CommandError('--kycs and --lookups must be positive.')
+        if not 0 <= options['max_distance'] < BANDS:
+            raise CommandError(f'--max-distance must be between 0 and {BANDS - 1}.')
+
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            rng = random.Random(options['seed'])
+            hashes = self.seed(rng, options['kycs'])
+            self.compare(rng, hashes, options['lookups'], options['max_distance'])
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+    def seed(self, rng, count):
+        started = time.perf_counter()
+        users = User.objects.bulk_create([
+            User(email=f'kyc-{i}@benchmark.test', full_name=f'KYC {i}', phone='0', password='!')
+            for i in range(count)
+        ], batch_size=1000)
+        kycs = KYC.objects.bulk_create([
+            KYC(user=user, gov_id_number=str(i), document_type='national_id',
+                document_front_picture=f'{i}-front.jpg', permanent_address='Benchmark')
+            for i, user in enumerate(users)
+        ], batch_size=1000)
+        hashes = [
+            (kyc.pk, side, rng.getrandbits(HASH_BITS))
+            for kyc in kycs for side in (DocumentSide.FRONT, DocumentSide.BACK)
+        ]
+        for start in range(0, len(hashes), 10000):
+            store_hashes([], hashes[start:start + 10000])
+        self.stdout.write(f'Indexed {len(hashes)} hashes in {time.perf_counter() - started:.1f}s')
+        return hashes
+
+    def compare(self, rng, hashes, lookups, max_distance):
+        probes = []
+        for _ in range(lookups):
+            kyc_id, side, value = rng.choice(hashes)
+            for bit in rng.sample(range(HASH_BITS), max_distance):
+                value ^= 1 << bit
+            probes.append(((kyc_id, side), value))
+
+        scans = full_scans(str(band_candidates(probes[0][1]).values_list('kyc_id', 'side', 'phash').query))
+        if scans:
+            raise CommandError(f'Banded lookup scans a table: {scans}')
+
+        started = time.perf_counter()
+        for expected, value in probes:
+            found = {(kyc_id, side) for kyc_id, side, _ in near_duplicates(value, max_distance)}
+            if expected not in found:
+                raise CommandError(f'Banded lookup missed {expected}.')
+        banded = (time.perf_counter() - started) / lookups * 1000
+
+        started = time.perf_counter()
+        scan_lookups = min(lookups, 5)
+        for expected, value in probes[:scan_lookups]:
+            found = {
+                (kyc_id, side)
+                for kyc_id, side, stored in DocumentHash.objects.values_list('kyc_id', 'side', 'phash').iterator()
+                if (value ^ (stored & ((1 << HASH_BITS) - 1))).bit_count() <= max_distance
+            }
+            if expected not in found:
+                raise CommandError(f'Full scan missed {expected}.')
+        scanned = (time.perf_counter() - started) / scan_lookups * 1000
+
+        self.stdout.write(f'Lookups within {max_distance} bits of {len(hashes)} hashes')
+        self.stdout.write(f'  {"banded index seeks":<20} {banded:10.3f} ms/lookup')
+        self.stdout.write(f'  {"full scan":<20} {scanned:10.3f} ms/lookup')
+
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from kyc.duplicates import rebuild_document_hashes
+
+
+class Command(BaseCommand):
+    help = 'Hash the document images of KYCs missing from the duplicate index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Number of KYCs hashed per worker task')
+        parser.add_argument('--all', action='store_true',
+                            help='Rehash every KYC, not only those without hashes')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive.')
+
+        count = rebuild_document_hashes(batch_size=options['batch_size'], rehash=options['all'])
+        self.stdout.write(self.style.SUCCESS(f'Hashed the documents of {count} KYCs'))
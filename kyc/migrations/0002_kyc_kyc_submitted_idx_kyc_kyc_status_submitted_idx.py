@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kyc', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='kyc',
+            index=models.Index(fields=['submitted_at', 'id'], name='kyc_submitted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kyc',
+            index=models.Index(fields=['kyc_status', 'submitted_at', 'id'], name='kyc_status_submitted_idx'),
+        ),
+    ]
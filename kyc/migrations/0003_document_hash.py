@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kyc', '0002_kyc_kyc_submitted_idx_kyc_kyc_status_submitted_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentHash',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('side', models.CharField(choices=[('front', 'Front'), ('back', 'Back')], max_length=5)),
+                ('phash', models.BigIntegerField()),
+                ('band0', models.PositiveIntegerField()),
+                ('band1', models.PositiveIntegerField()),
+                ('band2', models.PositiveIntegerField()),
+                ('band3', models.PositiveIntegerField()),
+                ('hashed_at', models.DateTimeField(auto_now=True)),
+                ('kyc', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='document_hashes', to='kyc.kyc')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['band0'], name='kyc_dochash_band0_idx'), models.Index(fields=['band1'], name='kyc_dochash_band1_idx'), models.Index(fields=['band2'], name='kyc_dochash_band2_idx'), models.Index(fields=['band3'], name='kyc_dochash_band3_idx')],
+                'unique_together': {('kyc', 'side')},
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kyc', '0003_document_hash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kyc',
+            name='possible_duplicate',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='kyc',
+            index=models.Index(fields=['possible_duplicate', 'submitted_at', 'id'], name='kyc_duplicate_submitted_idx'),
+        ),
+    ]
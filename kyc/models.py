@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
+from rentoshare.snapshots import SnapshotMixin
 
 User = get_user_model()
 
@@ -19,7 +20,13 @@ class KYCStatus(models.TextChoices):
     REJECTED = 'rejected', 'Rejected'
     UNDER_REVIEW = 'under_review', 'Under Review'
 
-class KYC(models.Model):
+# Fields whose images are fingerprinted for duplicate detection (see kyc.duplicates)
+DOCUMENT_FIELDS = ('document_front_picture', 'document_back_picture')
+
+class KYC(SnapshotMixin, models.Model):
+    # Which images were hashed, so saves only rehash changed documents
+    snapshot_fields = DOCUMENT_FIELDS
+    
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='kyc')
     gov_id_number = models.CharField(max_length=50)
     document_type = models.CharField(max_length=20, choices=DocumentType.choices)
@@ -48,11 +55,50 @@ class KYC(models.Model):
     verified_at = models.DateTimeField(blank=True, null=True)
     verified_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='verified_kycs')
     rejection_reason = models.TextField(blank=True, null=True)
+    # Set once the documents are hashed, if they nearly match another KYC's (see kyc.duplicates)
+    possible_duplicate = models.BooleanField(default=False)
     
     class Meta:
         unique_together = [['gov_id_number', 'document_type']]
+        indexes = [
+            models.Index(fields=['submitted_at', 'id'], name='kyc_submitted_idx'),
+            models.Index(fields=['kyc_status', 'submitted_at', 'id'], name='kyc_status_submitted_idx'),
+            models.Index(fields=['possible_duplicate', 'submitted_at', 'id'], name='kyc_duplicate_submitted_idx'),
+        ]
         verbose_name = 'KYC'
         verbose_name_plural = 'KYCs'
     
     def __str__(self):
         return f"KYC for {self.user.email} - {self.kyc_status}"
+
+class DocumentSide(models.TextChoices):
+    FRONT = 'front', 'Front'
+    BACK = 'back', 'Back'
+
+class DocumentHash(models.Model):
+    """
+    64-bit perceptual hash of one KYC document image.
+    
+    The hash is also stored as four 16-bit bands, each indexed, so near
+    duplicates are found with index seeks (see kyc.duplicates).
+    """
+    kyc = models.ForeignKey(KYC, on_delete=models.CASCADE, related_name='document_hashes')
+    side = models.CharField(max_length=5, choices=DocumentSide.choices)
+    phash = models.BigIntegerField()  # Stored signed to fit SQLite integers
+    band0 = models.PositiveIntegerField()
+    band1 = models.PositiveIntegerField()
+    band2 = models.PositiveIntegerField()
+    band3 = models.PositiveIntegerField()
+    hashed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = [['kyc', 'side']]
+        indexes = [
+            models.Index(fields=['band0'], name='kyc_dochash_band0_idx'),
+            models.Index(fields=['band1'], name='kyc_dochash_band1_idx'),
+            models.Index(fields=['band2'], name='kyc_dochash_band2_idx'),
+            models.Index(fields=['band3'], name='kyc_dochash_band3_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.side} document hash for KYC {self.kyc_id}"
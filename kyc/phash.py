@@ -0,0 +1,49 @@
+"""
+Perceptual hashing of document images.
+
+This module runs inside hashing worker processes, so it imports neither
+Django nor the rest of the app. Pillow is imported on first use: the app
+starts without it, and only duplicate detection fails.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+HASH_SIZE = 8
+
+
+def dhash(path):
+    """
+    64-bit difference hash of the image at `path`.
+
+    The image is shrunk to 9x8 grayscale, and each bit records whether a
+    pixel is brighter than its right neighbour. Re-encoding, resizing and
+    small edits flip only a few bits, so copies of one photo stay within a
+    small Hamming distance of each other.
+    """
+    from PIL import Image
+
+    with Image.open(path) as image:
+        pixels = image.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.LANCZOS).tobytes()
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = value << 1 | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hash_documents(jobs):
+    """Hash `(kyc_id, side, path)` jobs; images that cannot be read or decoded hash to None"""
+    from PIL import Image
+
+    results = []
+    for kyc_id, side, path in jobs:
+        try:
+            value = dhash(path)
+        except (OSError, ValueError, SyntaxError, Image.DecompressionBombError) as exc:
+            # Missing, truncated, malformed or oversized files
+            logger.warning('Cannot hash %s document of KYC %s (%s): %s', side, kyc_id, path, exc)
+            value = None
+        results.append((kyc_id, side, value))
+    return results
@@ -0,0 +1,53 @@
+from django.utils import timezone
+from rest_framework import serializers
+
+from rentoshare.db.locking import write_atomic
+from .cache import write_public_statuses
+from .models import KYC, KYCStatus
+
+
+def bulk_review(admin, decisions):
+    """
+    Apply many admin decisions to KYC submissions in one transaction.
+
+    Each decision is a dict with `id`, `kyc_status` and an optional
+    `rejection_reason`, already validated like a single status update.
+    `verified_by`, `verified_at` and `is_verified` are set as
+    KYCStatusUpdateView does. Every id is checked before anything is
+    written. Those fields only depend on the decision, so they are written
+    with one UPDATE per status, and the per-row rejection reasons with one
+    bulk_update. Raises ValidationError for unknown ids. Returns the number
+    of KYCs updated.
+    """
+    now = timezone.now()
+    by_id = {decision['id']: decision for decision in decisions}
+    with write_atomic():
+        kycs = list(KYC.objects.select_related('user').filter(pk__in=by_id))
+        unknown = set(by_id) - {kyc.pk for kyc in kycs}
+        if unknown:
+            raise serializers.ValidationError({'reviews': [f'Unknown KYC ids: {sorted(unknown)}']})
+
+        ids_by_status = {}
+        with_reason = []
+        for kyc in kycs:
+            decision = by_id[kyc.pk]
+            approved = decision['kyc_status'] == KYCStatus.APPROVED
+            kyc.kyc_status = decision['kyc_status']
+            kyc.verified_by = admin
+            kyc.verified_at = now if approved else None
+            kyc.is_verified = approved
+            ids_by_status.setdefault(kyc.kyc_status, []).append(kyc.pk)
+            if 'rejection_reason' in decision:
+                kyc.rejection_reason = decision['rejection_reason']
+                with_reason.append(kyc)
+
+        for kyc_status, ids in ids_by_status.items():
+            approved = kyc_status == KYCStatus.APPROVED
+            KYC.objects.filter(pk__in=ids).update(
+                kyc_status=kyc_status, verified_by=admin,
+                verified_at=now if approved else None, is_verified=approved,
+            )
+        KYC.objects.bulk_update(with_reason, ['rejection_reason'])
+        # Set-based updates skip post_save, so write the public statuses through here
+        write_public_statuses(kycs)
+    return len(kycs)
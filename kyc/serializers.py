@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import KYC
+from rentoshare.bulk import MAX_BULK_IDS
+from .models import KYC, KYCStatus
 
 class KYCSerializer(serializers.ModelSerializer):
     user_email = serializers.CharField(source='user.email', read_only=True)
@@ -17,6 +18,11 @@ class KYCSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'user', 'is_verified', 'submitted_at', 'verified_at', 'verified_by']
 
+class KYCAdminSerializer(KYCSerializer):
+    class Meta(KYCSerializer.Meta):
+        fields = KYCSerializer.Meta.fields + ['possible_duplicate']
+        read_only_fields = KYCSerializer.Meta.read_only_fields + ['possible_duplicate']
+
 class KYCCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = KYC
@@ -37,6 +43,27 @@ class KYCStatusUpdateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Rejection reason is required when rejecting KYC.")
         return data
 
+class KYCReviewDecisionSerializer(serializers.Serializer):
+    id = serializers.IntegerField(min_value=1)
+    kyc_status = serializers.ChoiceField(
+        choices=[KYCStatus.APPROVED, KYCStatus.REJECTED, KYCStatus.UNDER_REVIEW]
+    )
+    rejection_reason = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+    def validate(self, data):
+        if data.get('kyc_status') == 'rejected' and not data.get('rejection_reason'):
+            raise serializers.ValidationError("Rejection reason is required when rejecting KYC.")
+        return data
+
+class KYCBulkReviewSerializer(serializers.Serializer):
+    reviews = KYCReviewDecisionSerializer(many=True, allow_empty=False, max_length=MAX_BULK_IDS)
+
+    def validate_reviews(self, value):
+        ids = [decision['id'] for decision in value]
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError("Each KYC can only be reviewed once per request.")
+        return value
+
 class KYCPublicSerializer(serializers.ModelSerializer):
     """Public serializer for KYC status - only shows basic verification info"""
     user_email = serializers.CharField(source='user.email', read_only=True)
@@ -0,0 +1,34 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import User
+from .cache import invalidate_public_status, write_public_status
+from .duplicates import queue_document_hashing
+from .models import KYC
+
+
+@receiver(post_save, sender=KYC)
+def refresh_public_status(sender, instance, **kwargs):
+    # Write-through: a new KYC also replaces a cached 404
+    write_public_status(instance)
+
+
+@receiver(post_save, sender=KYC)
+def hash_changed_documents(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created or instance.saved_snapshot != instance.snapshot():
+        queue_document_hashing(instance)
+    instance.remember_snapshot()
+
+
+@receiver(post_delete, sender=KYC)
+def forget_public_status(sender, instance, **kwargs):
+    invalidate_public_status([instance.user_id])
+
+
+@receiver(post_save, sender=User)
+def forget_public_email(sender, instance, created, **kwargs):
+    # The public payload carries the user's email
+    if not created:
+        invalidate_public_status([instance.pk])
@@ -1,3 +1,201 @@
-from django.test import TestCase
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from accounts.models import User
+from rentoshare import query_budget
+from rentoshare.bulk import MAX_BULK_IDS
+from .duplicates import storing_pool
+from .models import KYC, DocumentHash, KYCStatus
+from .phash import dhash, hash_documents
+from .views import bulk_review_kyc
+
+BULK_REVIEW_URL = '/api/kyc/admin/bulk-review/'
+
+DECISIONS = [KYCStatus.APPROVED, KYCStatus.REJECTED, KYCStatus.UNDER_REVIEW]
+
+
+def create_admin(name='admin'):
+    return User.objects.create_superuser(email=f'{name}@example.com', password=None, full_name='Admin', phone='0')
+
+
+def create_kycs(count):
+    users = User.objects.bulk_create([
+        User(email=f'kyc-user-{i}@example.com', full_name=f'KYC User {i}', phone='0', password='!')
+        for i in range(count)
+    ])
+    return KYC.objects.bulk_create([
+        KYC(user=user, gov_id_number=str(i), document_type='national_id',
+            document_front_picture='front.jpg', permanent_address='Somewhere')
+        for i, user in enumerate(users)
+    ])
+
+
+def decisions(kycs):
+    return [
+        {'id': kyc.pk, 'kyc_status': DECISIONS[i % len(DECISIONS)], 'rejection_reason': 'Unreadable'}
+        for i, kyc in enumerate(kycs)
+    ]
+
+
+class KYCBulkReviewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_admin()
+        cls.kycs = create_kycs(MAX_BULK_IDS + 1)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def review(self, kycs):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(BULK_REVIEW_URL, {'reviews': decisions(kycs)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'updated': len(kycs)})
+        return len(context.captured_queries)
+
+    def test_a_full_batch_costs_about_what_a_small_one_does(self):
+        few = self.review(self.kycs[:len(DECISIONS)])
+        # SQLite's parameter limit splits the per-row rejection reasons into two statements
+        self.assertLessEqual(self.review(self.kycs[:MAX_BULK_IDS]), few + 1)
+
+        reviewed = KYC.objects.filter(pk__in=[kyc.pk for kyc in self.kycs[:MAX_BULK_IDS]])
+        approved = reviewed.filter(is_verified=True, verified_by=self.admin, verified_at__isnull=False)
+        self.assertEqual(approved.count(), len(range(0, MAX_BULK_IDS, len(DECISIONS))))
+        self.assertEqual(set(reviewed.values_list('rejection_reason', flat=True)), {'Unreadable'})
+
+    def test_batches_are_limited(self):
+        response = self.client.post(BULK_REVIEW_URL, {'reviews': decisions(self.kycs)}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(KYC.objects.exclude(kyc_status=KYCStatus.PENDING).exists())
+
+
+class ConcurrentBulkReviewTests(TransactionTestCase):
+    """Bulk reviews from several admins at once all apply, none fails on the database lock"""
+    batches = 12
+    batch_size = 50
+    workers = 4
+
+    def test_parallel_bulk_reviews(self):
+        admins = [create_admin(f'admin-{i}') for i in range(self.workers)]
+        kycs = create_kycs(self.batches * self.batch_size)
+        factory = APIRequestFactory()
+
+        def review(batch):
+            request = factory.post(BULK_REVIEW_URL, {
+                'reviews': decisions(kycs[batch * self.batch_size:(batch + 1) * self.batch_size]),
+            }, format='json')
+            force_authenticate(request, user=admins[batch % len(admins)])
+            try:
+                return bulk_review_kyc(request).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            codes = list(pool.map(review, range(self.batches)))
+
+        self.assertEqual(codes, [200] * self.batches)
+        self.assertFalse(KYC.objects.filter(kyc_status=KYCStatus.PENDING).exists())
+
+
+def save_image(path, shade=0):
+    image = Image.new('L', (64, 48))
+    image.putdata([(x * 4 + y * 2 + shade) % 256 for y in range(48) for x in range(64)])
+    image.save(path)
+
+
+class DocumentHashingTests(SimpleTestCase):
+    def test_unreadable_images_hash_to_none(self):
+        with tempfile.TemporaryDirectory() as root:
+            good, truncated, junk, malformed = (
+                Path(root) / name for name in ('good.png', 'truncated.png', 'junk.png', 'malformed.ppm')
+            )
+            save_image(good)
+            truncated.write_bytes(good.read_bytes()[:60])
+            junk.write_bytes(b'not an image')
+            malformed.write_bytes(b'P6\n5 5\n0\n')
+            jobs = [(1, 'front', str(good)), (1, 'back', str(truncated)), (2, 'front', str(junk)),
+                    (2, 'back', str(malformed)), (3, 'front', str(Path(root) / 'missing.png'))]
+            with self.assertLogs('kyc.phash', 'WARNING'):
+                results = hash_documents(jobs)
+        self.assertIsInstance(results[0][2], int)
+        self.assertEqual([value for _, _, value in results[1:]], [None] * 4)
+
+    def test_pillow_is_only_needed_to_hash(self):
+        # In a fresh interpreter where Pillow cannot be imported
+        script = (
+            "import sys; sys.modules['PIL'] = None\n"
+            "from kyc.phash import hash_documents\n"
+            "try:\n    hash_documents([(1, 'front', 'id.png')])\n"
+            "except ImportError:\n    sys.exit(3)\n"
+        )
+        result = subprocess.run([sys.executable, '-c', script], cwd=settings.BASE_DIR)
+        self.assertEqual(result.returncode, 3)
+
+
+class DuplicateFlaggingTests(TransactionTestCase):
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+        save_image(Path(self.root.name) / 'id.png')
+        save_image(Path(self.root.name) / 'other.png', shade=97)
+        settings_override = override_settings(KYC_DOCUMENT_ROOT=self.root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def submit(self, name, picture):
+        user = User.objects.create_user(email=f'{name}@example.com', password=None, full_name=name, phone='0')
+        return KYC.objects.create(
+            user=user, gov_id_number=name, document_type='national_id',
+            document_front_picture=picture, permanent_address='Somewhere'
+        )
+
+    def wait_until_hashed(self, *kycs):
+        deadline = time.monotonic() + 60
+        while DocumentHash.objects.filter(kyc__in=kycs).count() < len(kycs):
+            self.assertLess(time.monotonic(), deadline, 'Documents were not hashed in time')
+            time.sleep(0.05)
+        # Flagging follows the stored hashes on the same thread
+        storing_pool().submit(lambda: None).result()
+
+    def test_copied_documents_are_flagged(self):
+        original = self.submit('original', 'id.png')
+        self.wait_until_hashed(original)
+        copy = self.submit('copy', 'id.png')
+        other = self.submit('other', 'other.png')
+        self.wait_until_hashed(copy, other)
+
+        flags = dict(KYC.objects.values_list('pk', 'possible_duplicate'))
+        self.assertEqual(flags, {original.pk: False, copy.pk: True, other.pk: False})
+
+    def test_finished_hashes_are_stored_off_the_request_thread(self):
+        done = Future()
+        with mock.patch('kyc.duplicates.submit_hashing', return_value=done):
+            kyc = self.submit('user', 'id.png')
+        done.set_result([(kyc.pk, 'front', dhash(Path(self.root.name) / 'id.png'))])
+        self.wait_until_hashed(kyc)
+
+        # Already done: add_done_callback runs on this thread, which must keep its connection
+        with mock.patch('kyc.duplicates.submit_hashing', return_value=done):
+            kyc.document_front_picture = 'other.png'
+            kyc.save()
+        storing_pool().submit(lambda: None).result()
+        self.assertIsNotNone(connection.connection)
+
+
+class KYCQueryBudgetTests(query_budget.QueryBudgetTestCase):
+    endpoints = query_budget.endpoints_named(
+        'admin-kyc-list', 'kyc-public-status',
+    )
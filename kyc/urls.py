@@ -10,4 +10,7 @@ urlpatterns = [
     # Admin KYC endpoints
     path('admin/list/', views.KYCListView.as_view(), name='admin-kyc-list'),
     path('admin/<int:pk>/status/', views.KYCStatusUpdateView.as_view(), name='admin-kyc-status-update'),
+    path('admin/<int:pk>/duplicates/', views.kyc_document_duplicates, name='admin-kyc-duplicates'),
+    path('admin/bulk-review/', views.bulk_review_kyc, name='admin-kyc-bulk-review'),
+    path('admin/cache-stats/', views.kyc_public_cache_stats, name='admin-kyc-cache-stats'),
 ]
@@ -2,10 +2,16 @@ from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from rentoshare.pagination import SubmittedAtCursorPagination
+from .cache import cache_stats, public_status
+from .duplicates import kyc_duplicates
 from .models import KYC
+from .review import bulk_review
 from .serializers import (
-    KYCSerializer, KYCCreateSerializer, KYCStatusUpdateSerializer, KYCPublicSerializer
+    KYCSerializer, KYCAdminSerializer, KYCCreateSerializer, KYCStatusUpdateSerializer,
+    KYCBulkReviewSerializer
 )
 
 class KYCCreateView(generics.CreateAPIView):
@@ -21,7 +27,7 @@ class KYCDetailView(generics.RetrieveUpdateAPIView):
     
     def get_object(self):
         try:
-            return KYC.objects.get(user=self.request.user)
+            return KYC.objects.select_related('user').get(user=self.request.user)
         except KYC.DoesNotExist:
             return None
     
@@ -36,15 +42,18 @@ class KYCDetailView(generics.RetrieveUpdateAPIView):
         return Response(serializer.data)
 
 class KYCListView(generics.ListAPIView):
-    queryset = KYC.objects.all()
-    serializer_class = KYCSerializer
+    queryset = KYC.objects.select_related('user')
+    serializer_class = KYCAdminSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = SubmittedAtCursorPagination
     
     def get_queryset(self):
         queryset = super().get_queryset()
         kyc_status = self.request.query_params.get('status', None)
         if kyc_status:
             queryset = queryset.filter(kyc_status=kyc_status)
+        if self.request.query_params.get('possible_duplicate') == 'true':
+            queryset = queryset.filter(possible_duplicate=True)
         return queryset
 
 class KYCStatusUpdateView(generics.UpdateAPIView):
@@ -59,16 +68,40 @@ class KYCStatusUpdateView(generics.UpdateAPIView):
             is_verified=serializer.validated_data.get('kyc_status') == 'approved'
         )
 
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def bulk_review_kyc(request):
+    """Approve, reject or mark under review many KYC submissions at once"""
+    serializer = KYCBulkReviewSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    updated = bulk_review(request.user, serializer.validated_data['reviews'])
+    return Response({'updated': updated})
+
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def kyc_public_status(request, user_id):
     """Public endpoint to check KYC verification status of a user"""
-    try:
-        kyc = KYC.objects.get(user_id=user_id)
-        serializer = KYCPublicSerializer(kyc)
-        return Response(serializer.data)
-    except KYC.DoesNotExist:
+    payload = public_status(user_id)
+    if payload is None:
         return Response(
             {"detail": "KYC not found for this user."}, 
             status=status.HTTP_404_NOT_FOUND
         )
+    return Response(payload)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def kyc_document_duplicates(request, pk):
+    """Other KYCs whose document images nearly match this one's"""
+    kyc = get_object_or_404(KYC, pk=pk)
+    return Response({
+        'kyc': kyc.pk,
+        'hashed': kyc.document_hashes.exists(),
+        'matches': kyc_duplicates(kyc),
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def kyc_public_cache_stats(request):
+    """Hit and miss counters of the public KYC status cache"""
+    return Response(cache_stats())
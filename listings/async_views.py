@@ -0,0 +1,45 @@
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from rest_framework.response import Response
+
+from rentoshare.async_db import db
+from rentoshare.async_views import drf_view
+from .cache import aconditional_response, alist_version, alisting_version, detail_etag, list_etag
+from .models import Listing
+from .views import ListingViewSet
+
+
+def _viewset(request, action, **kwargs):
+    view = drf_view(ListingViewSet, request, **kwargs)
+    view.action = action
+    return view
+
+
+async def listing_list(request, **kwargs):
+    """ListingViewSet.list, async"""
+    version = await alist_version()
+
+    async def render():
+        view = _viewset(request, 'list', **kwargs)
+        page = await view.paginator.apaginate_queryset(view.get_queryset(), view.request, view=view)
+        return view.get_paginated_response(view.get_serializer(page, many=True).data)
+
+    return await aconditional_response(request, list_etag(request, version), version, render)
+
+
+async def listing_detail(request, pk, **kwargs):
+    """ListingViewSet.retrieve, async"""
+    version = await alisting_version(pk)
+
+    async def render():
+        view = _viewset(request, 'retrieve', pk=pk, **kwargs)
+        # The errors get_object() turns into 404s
+        try:
+            listing = await db(view.get_queryset().get, pk=pk)
+        except Listing.DoesNotExist:
+            raise Http404(f'No {Listing._meta.object_name} matches the given query.')
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        return Response(view.get_serializer(listing).data)
+
+    return await aconditional_response(request, detail_etag(pk, version), version, render)
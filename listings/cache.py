@@ -0,0 +1,121 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from rentoshare.routers import primary_reads
+from rentoshare.versions import aget_version, bump_versions, get_version
+
+# Bumping a version stamp changes the ETag of every response derived from
+# it, which also makes the cached copies unreachable.
+LIST_VERSION_KEY = 'listings:version'
+
+
+def _detail_version_key(pk):
+    return f'listings:{pk}:version'
+
+
+def list_version():
+    return get_version(LIST_VERSION_KEY)
+
+
+def listing_version(pk):
+    return get_version(_detail_version_key(pk))
+
+
+async def alist_version():
+    return await aget_version(LIST_VERSION_KEY)
+
+
+async def alisting_version(pk):
+    return await aget_version(_detail_version_key(pk))
+
+
+def bump_listing_version(pk):
+    """Invalidate cached list pages and the detail response of listing `pk`"""
+    bump_listing_versions([pk])
+
+
+def bump_listing_versions(pks):
+    """Invalidate cached list pages and the detail responses of the listings `pks`"""
+    bump_versions(LIST_VERSION_KEY, *(_detail_version_key(pk) for pk in pks))
+
+
+def list_etag(request, version):
+    digest = hashlib.sha1(f'{version}:{request.build_absolute_uri()}'.encode()).hexdigest()
+    return quote_etag(f'listings-{digest}')
+
+
+def detail_etag(pk, version):
+    return quote_etag(f'listing-{pk}-{version}')
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return '*' in etags or etag in etags
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return if_modified_since is not None and last_modified <= if_modified_since
+
+
+def _conditional_headers(etag, version):
+    last_modified = version // 1_000_000_000
+    headers = {'ETag': etag, 'Last-Modified': http_date(last_modified), 'Cache-Control': 'no-cache'}
+    return last_modified, headers
+
+
+def _response_key(etag):
+    return f'listings:response:{etag}'
+
+
+def conditional_response(request, etag, version, render):
+    """
+    Answer a listing read from its version stamp alone when possible.
+
+    Returns 304 if the client already holds `etag`, otherwise the cached
+    response body for `etag`, and only calls `render()` (serializer and
+    database) on a cache miss. Successful renders are cached under the ETag.
+    """
+    last_modified, headers = _conditional_headers(etag, version)
+
+    if _not_modified(request, etag, last_modified):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    key = _response_key(etag)
+    data = cache.get(key)
+    if data is not None:
+        return Response(data, headers=headers)
+
+    # The render is cached under the new version; it must not come from a lagging replica
+    with primary_reads():
+        response = render()
+    if response.status_code == status.HTTP_200_OK:
+        cache.set(key, response.data, timeout=settings.LISTING_CACHE_TIMEOUT)
+        for header, value in headers.items():
+            response[header] = value
+    return response
+
+
+async def aconditional_response(request, etag, version, render):
+    """conditional_response for async views; `render` is a coroutine function"""
+    last_modified, headers = _conditional_headers(etag, version)
+
+    if _not_modified(request, etag, last_modified):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    key = _response_key(etag)
+    data = await cache.aget(key)
+    if data is not None:
+        return Response(data, headers=headers)
+
+    with primary_reads():
+        response = await render()
+    if response.status_code == status.HTTP_200_OK:
+        await cache.aset(key, response.data, timeout=settings.LISTING_CACHE_TIMEOUT)
+        for header, value in headers.items():
+            response[header] = value
+    return response
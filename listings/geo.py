@@ -0,0 +1,118 @@
+import math
+
+from django.db.models import F, Q, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Listings are bucketed into a fixed lat/lng grid; geo_cell = row * GRID_COLUMNS + col.
+# A radius query only touches the handful of cells overlapping its bounding box,
+# each row of which is one contiguous range on the geo_cell index.
+CELL_SIZE_DEG = 0.1
+GRID_ROWS = int(180 / CELL_SIZE_DEG)
+GRID_COLUMNS = int(360 / CELL_SIZE_DEG)
+
+DEFAULT_RADIUS_KM = 10.0
+MAX_RADIUS_KM = 100.0
+
+
+def grid_cell(latitude, longitude):
+    """Return the grid cell a coordinate falls into, or None without coordinates"""
+    if latitude is None or longitude is None:
+        return None
+    row = min(int((latitude + 90) / CELL_SIZE_DEG), GRID_ROWS - 1)
+    col = min(int((longitude + 180) / CELL_SIZE_DEG), GRID_COLUMNS - 1)
+    return row * GRID_COLUMNS + col
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    Return (min_lat, max_lat, min_lng, max_lng) enclosing the circle.
+
+    Longitudes are not wrapped, so min_lng may be below -180 or max_lng
+    above 180 when the circle crosses the antimeridian.
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    delta_lat = math.degrees(angular)
+    min_lat = latitude - delta_lat
+    max_lat = latitude + delta_lat
+    if min_lat <= -90 or max_lat >= 90:
+        # The circle covers a pole, so every longitude is in range
+        return max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0
+    delta_lng = math.degrees(math.asin(math.sin(angular) / math.cos(math.radians(latitude))))
+    return min_lat, max_lat, longitude - delta_lng, longitude + delta_lng
+
+
+def _longitude_spans(min_lng, max_lng):
+    if max_lng - min_lng >= 360:
+        return [(-180.0, 180.0)]
+    if min_lng < -180:
+        return [(min_lng + 360, 180.0), (-180.0, max_lng)]
+    if max_lng > 180:
+        return [(min_lng, 180.0), (-180.0, max_lng - 360)]
+    return [(min_lng, max_lng)]
+
+
+def nearby_listings(queryset, latitude, longitude, radius_km):
+    """
+    Restrict `queryset` to listings within `radius_km` of the point.
+
+    Candidates are narrowed with index range scans over the grid cells of
+    the bounding box, then filtered on an exact haversine distance which is
+    annotated as `distance_km` for ordering.
+    """
+    min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+    spans = _longitude_spans(min_lng, max_lng)
+
+    first_row = grid_cell(min_lat, 0) // GRID_COLUMNS
+    last_row = grid_cell(max_lat, 0) // GRID_COLUMNS
+    cells = Q()
+    for row in range(first_row, last_row + 1):
+        for low, high in spans:
+            first_col = grid_cell(0, low) % GRID_COLUMNS
+            last_col = grid_cell(0, high) % GRID_COLUMNS
+            cells |= Q(geo_cell__range=(row * GRID_COLUMNS + first_col, row * GRID_COLUMNS + last_col))
+
+    longitudes = Q()
+    for low, high in spans:
+        longitudes |= Q(longitude__range=(low, high))
+
+    lat_rad = math.radians(latitude)
+    lng_rad = math.radians(longitude)
+    a = (
+        Power(Sin((Radians(F('latitude')) - Value(lat_rad)) / 2), 2) +
+        Value(math.cos(lat_rad)) * Cos(Radians(F('latitude'))) *
+        Power(Sin((Radians(F('longitude')) - Value(lng_rad)) / 2), 2)
+    )
+    distance = Value(2 * EARTH_RADIUS_KM) * ASin(Least(Sqrt(a), Value(1.0)))
+
+    return queryset.filter(
+        cells, longitudes, latitude__range=(min_lat, max_lat)
+    ).annotate(
+        distance_km=distance
+    ).filter(distance_km__lte=radius_km)
+
+
+def parse_near(near, radius_km=None):
+    """
+    Parse `near=lat,lng` and `radius_km` query parameters.
+
+    Raises ValueError with a user-facing message on malformed input.
+    """
+    try:
+        latitude, longitude = (float(part) for part in near.split(','))
+    except ValueError:
+        raise ValueError("near must be given as 'latitude,longitude'.")
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError('near is out of range.')
+
+    if radius_km in (None, ''):
+        radius_km = DEFAULT_RADIUS_KM
+    else:
+        try:
+            radius_km = float(radius_km)
+        except ValueError:
+            raise ValueError('radius_km must be a number.')
+    if not 0 < radius_km <= MAX_RADIUS_KM:
+        raise ValueError(f'radius_km must be between 0 and {MAX_RADIUS_KM:g}.')
+    return latitude, longitude, radius_km
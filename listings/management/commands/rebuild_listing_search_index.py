@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from listings.search import fts_enabled, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for listings in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Number of listings indexed per transaction')
+
+    def handle(self, *args, **options):
+        if not fts_enabled():
+            raise CommandError('The listing search index is only available on SQLite.')
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive.')
+
+        total = rebuild_index(batch_size=options['batch_size'], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt search index for {total} listings'))
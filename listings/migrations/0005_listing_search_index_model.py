@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0004_listing_geo_cell_listing_latitude_listing_longitude_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingSearchIndex',
+            fields=[
+                ('listing', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='listings.listing')),
+            ],
+            options={
+                'db_table': 'listings_fts',
+                'managed': False,
+            },
+        ),
+    ]
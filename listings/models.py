@@ -1,5 +1,7 @@
 from django.db import models
 from django.conf import settings
+from django.core.validators import MinValueValidator, MaxValueValidator
+from .geo import grid_cell
 
 class Listing(models.Model):
     LISTING_TYPES = [
@@ -18,6 +20,15 @@ class Listing(models.Model):
     listing_type = models.CharField(max_length=10, choices=LISTING_TYPES)
     price_per_day = models.FloatField(null=True, blank=True)
     location = models.TextField(blank=True, null=True)
+    latitude = models.FloatField(
+        null=True, blank=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)]
+    )
+    longitude = models.FloatField(
+        null=True, blank=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)]
+    )
+    geo_cell = models.BigIntegerField(null=True, blank=True, editable=False)  # See listings.geo
     images = models.JSONField(default=list, blank=True)  # Store image URLs/paths
     is_active = models.BooleanField(default=True)
     available_from = models.DateTimeField(null=True, blank=True)
@@ -28,6 +39,38 @@ class Listing(models.Model):
     class Meta:
         db_table = 'listings'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_active', 'created_at', 'id'], name='listing_active_created_idx'),
+            models.Index(fields=['user', 'created_at', 'id'], name='listing_user_created_idx'),
+            models.Index(fields=['geo_cell', 'latitude', 'longitude'], name='listing_geo_cell_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.title} - {self.user.email}"
\ No newline at end of file
+        return f"{self.title} - {self.user.email}"
+
+    def save(self, *args, **kwargs):
+        self.geo_cell = grid_cell(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geo_cell'}
+        super().save(*args, **kwargs)
+
+class ListingSearchIndex(models.Model):
+    """
+    A row of the listings_fts full-text index (SQLite only, see listings.search).
+
+    Unmanaged and never written to: triggers keep the index in sync. It only
+    lets searches join the index to listings.
+    """
+    listing = models.OneToOneField(
+        Listing,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        related_name='search_index'
+    )
+
+    class Meta:
+        managed = False
+        db_table = 'listings_fts'
@@ -0,0 +1,132 @@
+import re
+
+from django.db import connection, transaction
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+# External-content FTS5 table mirroring listings.title / description / location.
+# It is created and kept in sync by triggers in migration 0003 (SQLite only);
+# CREATE_SQL repeats that migration's statements for rebuild_index.
+FTS_TABLE = 'listings_fts'
+
+# bm25() column weights: title, description, location
+BM25_WEIGHTS = (10.0, 1.0, 4.0)
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+CREATE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description, location,
+        content='listings', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON listings BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description, location)
+        VALUES (new.id, new.title, new.description, new.location);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON listings BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, location)
+        VALUES ('delete', old.id, old.title, old.description, old.location);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description, location ON listings BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, location)
+        VALUES ('delete', old.id, old.title, old.description, old.location);
+        INSERT INTO {FTS_TABLE}(rowid, title, description, location)
+        VALUES (new.id, new.title, new.description, new.location);
+    END
+    """,
+]
+
+
+def fts_enabled():
+    """The FTS index only exists on SQLite; other backends fall back to LIKE scans"""
+    return connection.vendor == 'sqlite'
+
+
+def build_match_expression(query):
+    """
+    Turn free user input into a safe FTS5 MATCH expression.
+
+    Every word becomes a quoted prefix term and terms are ANDed, so
+    "drill kath" matches "Electric Drill ... Kathmandu" and FTS5 operators
+    typed by the user are never interpreted.
+    """
+    tokens = TOKEN_RE.findall(query)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search_listings(queryset, query):
+    """
+    Restrict `queryset` to listings matching `query`.
+
+    Matches are annotated with a `search_rank` to order by: on SQLite the
+    bm25 score from the FTS index (lower is better), elsewhere 0.
+    """
+    no_rank = Value(0.0, output_field=FloatField())
+    expression = build_match_expression(query)
+    if not expression:
+        # Still annotated: the paginator orders by the rank even when nothing can match
+        return queryset.none().annotate(search_rank=no_rank)
+
+    if not fts_enabled():
+        condition = Q()
+        for token in TOKEN_RE.findall(query):
+            condition &= (
+                Q(title__icontains=token) |
+                Q(description__icontains=token) |
+                Q(location__icontains=token)
+            )
+        return queryset.filter(condition).annotate(search_rank=no_rank)
+
+    weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+    # Joining the index (ListingSearchIndex) puts it in FROM, where MATCH and bm25() can use it
+    return queryset.filter(
+        RawSQL(f'{FTS_TABLE} MATCH %s', [expression], output_field=BooleanField()),
+        search_index__isnull=False,
+    ).annotate(
+        search_rank=RawSQL(f'bm25({FTS_TABLE}, {weights})', [], output_field=FloatField()),
+    )
+
+
+def rebuild_index(batch_size=5000, stdout=None):
+    """Repopulate the FTS index from the listings table, one batch per transaction"""
+    with connection.cursor() as cursor:
+        for statement in CREATE_SQL:
+            cursor.execute(statement)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')")
+
+    last_id = 0
+    total = 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT MAX(id), COUNT(*) FROM "
+                "(SELECT id FROM listings WHERE id > %s ORDER BY id LIMIT %s)",
+                [last_id, batch_size],
+            )
+            upper_id, count = cursor.fetchone()
+            if not count:
+                break
+            cursor.execute(
+                f"""
+                INSERT INTO {FTS_TABLE}(rowid, title, description, location)
+                SELECT id, title, description, location FROM listings
+                WHERE id > %s AND id <= %s
+                """,
+                [last_id, upper_id],
+            )
+        last_id = upper_id
+        total += count
+        if stdout is not None:
+            stdout.write(f"Indexed {total} listings (up to id {last_id})")
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return total
@@ -1,16 +1,29 @@
 from rest_framework import serializers
 from .models import Listing
 
-class ListingSerializer(serializers.ModelSerializer):
+class CoordinatesMixin:
+    """Validates that a listing's latitude and longitude are set (or cleared) together"""
+
+    def validate(self, data):
+        latitude = data.get('latitude', getattr(self.instance, 'latitude', None))
+        longitude = data.get('longitude', getattr(self.instance, 'longitude', None))
+        if (latitude is None) != (longitude is None):
+            raise serializers.ValidationError("Latitude and longitude must be provided together.")
+        return super().validate(data)
+
+class ListingSerializer(CoordinatesMixin, serializers.ModelSerializer):
     user_email = serializers.EmailField(source='user.email', read_only=True)
     user_name = serializers.CharField(source='user.full_name', read_only=True)
+    # Only present on `?near=` searches
+    distance_km = serializers.FloatField(read_only=True)
 
     class Meta:
         model = Listing
         fields = [
             'id', 'user', 'user_email', 'user_name', 'title', 'description',
-            'listing_type', 'price_per_day', 'location', 'images', 'is_active',
-            'available_from', 'available_to', 'extra_details', 'created_at'
+            'listing_type', 'price_per_day', 'location', 'latitude', 'longitude',
+            'distance_km', 'images', 'is_active', 'available_from', 'available_to',
+            'extra_details', 'created_at'
         ]
         read_only_fields = ['id', 'created_at', 'user']
 
@@ -19,12 +32,13 @@ class ListingSerializer(serializers.ModelSerializer):
         validated_data['user'] = self.context['request'].user
         return super().create(validated_data)
 
-class ListingCreateSerializer(serializers.ModelSerializer):
+class ListingCreateSerializer(CoordinatesMixin, serializers.ModelSerializer):
     class Meta:
         model = Listing
         fields = [
             'title', 'description', 'listing_type', 'price_per_day',
-            'location', 'images', 'available_from', 'available_to', 'extra_details'
+            'location', 'latitude', 'longitude', 'images', 'available_from',
+            'available_to', 'extra_details'
         ]
 
     def create(self, validated_data):
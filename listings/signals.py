@@ -0,0 +1,33 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import User
+from .cache import bump_listing_version, bump_listing_versions
+from .models import Listing
+
+# User fields the listing payloads embed
+EMBEDDED_USER_FIELDS = {'email', 'full_name'}
+
+
+@receiver(post_save, sender=Listing)
+@receiver(post_delete, sender=Listing)
+def invalidate_listing_cache(sender, instance, **kwargs):
+    # Bump after commit so no reader can cache pre-change rows under the new version
+    pk = instance.pk
+    transaction.on_commit(lambda: bump_listing_version(pk))
+
+
+@receiver(post_save, sender=User)
+def invalidate_owner_listings(sender, instance, created, update_fields=None, **kwargs):
+    # Saves of other fields only, such as last_login on every login, leave the payloads as they were
+    if created or (update_fields is not None and not EMBEDDED_USER_FIELDS & set(update_fields)):
+        return
+    user_id = instance.pk
+
+    def bump():
+        pks = list(Listing.objects.filter(user_id=user_id).values_list('pk', flat=True))
+        if pks:
+            bump_listing_versions(pks)
+
+    transaction.on_commit(bump)
@@ -1,3 +1,249 @@
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from accounts.models import User
+from rentoshare import query_budget
+from .cache import LIST_VERSION_KEY, list_version
+from .models import Listing
+from .search import search_listings
+
+LIST_URL = '/api/listings/api/listings/'
+
+
+class ListingSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = User.objects.create_user(
+            email='vendor@example.com', password='secret', full_name='Vendor', phone='9800000000'
+        )
+        cls.drill = Listing.objects.create(
+            user=cls.vendor, title='Electric Drill', description='Power tool',
+            listing_type='product', location='Kathmandu'
+        )
+        cls.ladder = Listing.objects.create(
+            user=cls.vendor, title='Ladder', description='Aluminium ladder, fits a drill bag',
+            listing_type='product', location='Pokhara'
+        )
+        Listing.objects.create(user=cls.vendor, title='Camera', description='DSLR', listing_type='service')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def search(self, query, **params):
+        response = self.client.get(LIST_URL, {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [listing['id'] for listing in response.data['results']]
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.search('drill'), [self.drill.pk, self.ladder.pk])
+
+    def test_words_are_prefixes_and_all_required(self):
+        self.assertEqual(self.search('dri kath'), [self.drill.pk])
+
+    def test_index_follows_edits_and_deletes(self):
+        self.ladder.title = 'Drill ladder'
+        self.ladder.save()
+        self.drill.delete()
+        self.assertEqual(self.search('drill'), [self.ladder.pk])
+
+    def test_pages_through_matches(self):
+        response = self.client.get(LIST_URL, {'q': 'drill', 'page_size': 1})
+        self.assertEqual([listing['id'] for listing in response.data['results']], [self.drill.pk])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([listing['id'] for listing in response.data['results']], [self.ladder.pk])
+        self.assertIsNone(response.data['next'])
+
+    def test_queries_without_words_match_nothing(self):
+        for query in ('!', '"', '"OR*(', '-'):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), [])
+
+    def test_results_carry_a_rank_even_when_empty(self):
+        queryset = search_listings(Listing.objects.all(), '!')
+        self.assertEqual(list(queryset.order_by('search_rank', 'id')), [])
+
+
+class ListingCoordinatesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = User.objects.create_user(
+            email='vendor@example.com', password='secret', full_name='Vendor', phone='9800000000'
+        )
+        cls.listing = Listing.objects.create(
+            user=cls.vendor, title='Tent', description='Two person', listing_type='product',
+            latitude=27.7, longitude=85.3
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.vendor)
+
+    def test_create_needs_both_coordinates(self):
+        data = {'title': 'Bike', 'description': 'City bike', 'listing_type': 'product'}
+        response = self.client.post(LIST_URL, {**data, 'latitude': 27.7}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(LIST_URL, {**data, 'latitude': 27.7, 'longitude': 85.3}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_update_checks_against_the_stored_coordinates(self):
+        url = f'{LIST_URL}{self.listing.pk}/'
+        response = self.client.patch(url, {'latitude': None}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.patch(url, {'latitude': None, 'longitude': None}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+
+class ListingRadiusSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = User.objects.create_user(
+            email='vendor@example.com', password='secret', full_name='Vendor', phone='9800000000'
+        )
+
+        def listing(title, latitude=None, longitude=None):
+            return Listing.objects.create(
+                user=cls.vendor, title=title, description='-', listing_type='product',
+                latitude=latitude, longitude=longitude
+            )
+
+        # Kathmandu, about 5km and 25km from it, and nowhere
+        cls.center = listing('Center', 27.7172, 85.3240)
+        cls.near = listing('Near', 27.7172, 85.3747)
+        cls.far = listing('Far', 27.9422, 85.3240)
+        listing('Without coordinates')
+        cls.east = listing('East of the antimeridian', 0, 179.95)
+        cls.pole = listing('By the north pole', 89.95, 10)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def search(self, near, **params):
+        return self.client.get(LIST_URL, {'near': near, **params})
+
+    def found(self, near, **params):
+        response = self.search(near, **params)
+        self.assertEqual(response.status_code, 200)
+        return [(listing['id'], listing['distance_km']) for listing in response.data['results']]
+
+    def test_nearest_first_within_the_default_radius(self):
+        found = self.found('27.7172,85.3240')
+        self.assertEqual([pk for pk, _ in found], [self.center.pk, self.near.pk])
+        self.assertAlmostEqual(found[0][1], 0, places=3)
+        self.assertAlmostEqual(found[1][1], 5.0, delta=0.1)
+
+    def test_radius_widens_the_search(self):
+        found = self.found('27.7172,85.3240', radius_km=30)
+        self.assertEqual([pk for pk, _ in found], [self.center.pk, self.near.pk, self.far.pk])
+        self.assertAlmostEqual(found[2][1], 25.0, delta=0.1)
+
+    def test_radius_is_bounded(self):
+        for radius_km in ('0', '-5', '100.5', 'wide'):
+            with self.subTest(radius_km=radius_km):
+                self.assertEqual(self.search('27.7172,85.3240', radius_km=radius_km).status_code, 400)
+        self.assertEqual(self.search('27.7172,85.3240', radius_km=100).status_code, 200)
+        for near in ('27.7', '91,85', '27.7,181', 'here'):
+            with self.subTest(near=near):
+                self.assertEqual(self.search(near).status_code, 400)
+
+    def test_search_wraps_across_the_antimeridian(self):
+        found = self.found('0,-179.95', radius_km=20)
+        self.assertEqual([pk for pk, _ in found], [self.east.pk])
+        self.assertAlmostEqual(found[0][1], 11.1, delta=0.1)
+
+    def test_search_wraps_across_the_pole(self):
+        found = self.found('89.95,-170', radius_km=20)
+        self.assertEqual([pk for pk, _ in found], [self.pole.pk])
+        self.assertAlmostEqual(found[0][1], 11.1, delta=0.1)
+
+
+class ListingCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = User.objects.create_user(
+            email='vendor@example.com', password='secret', full_name='Vendor', phone='9800000000'
+        )
+        cls.listing = Listing.objects.create(
+            user=cls.vendor, title='Tent', description='Two person', listing_type='product'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_cached_payloads_follow_owner_changes(self):
+        detail_url = f'{LIST_URL}{self.listing.pk}/'
+        self.assertEqual(self.client.get(detail_url).data['user_name'], 'Vendor')
+        self.assertEqual(self.client.get(LIST_URL).data['results'][0]['user_email'], 'vendor@example.com')
+
+        self.vendor.full_name = 'Renamed'
+        self.vendor.email = 'renamed@example.com'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vendor.save()
+        self.assertEqual(self.client.get(detail_url).data['user_name'], 'Renamed')
+        self.assertEqual(self.client.get(LIST_URL).data['results'][0]['user_email'], 'renamed@example.com')
+
+    def test_matching_etags_get_an_empty_304(self):
+        for url in (LIST_URL, f'{LIST_URL}{self.listing.pk}/'):
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                response = self.client.get(url, headers={'If-None-Match': etag})
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+                self.assertEqual(response['ETag'], etag)
+
+    def writes(self):
+        """Each listing write, run through the API as the owner with its on_commit bumps"""
+        client = APIClient()
+        client.force_authenticate(self.vendor)
+        data = {'title': 'Bike', 'description': 'City bike', 'listing_type': 'product'}
+        yield 'create', lambda: self.assertEqual(client.post(LIST_URL, data, format='json').status_code, 201)
+        # Resumed once the create has run
+        created_url = f"{LIST_URL}{Listing.objects.latest('pk').pk}/"
+        toggle_url = f'{LIST_URL}{self.listing.pk}/toggle_active/'
+        yield 'toggle_active', lambda: self.assertEqual(client.patch(toggle_url).status_code, 200)
+        yield 'delete', lambda: self.assertEqual(client.delete(created_url).status_code, 204)
+
+    def test_writes_change_the_list_etag(self):
+        etag = self.client.get(LIST_URL)['ETag']
+        for name, write in self.writes():
+            with self.subTest(write=name):
+                with self.captureOnCommitCallbacks(execute=True):
+                    write()
+                response = self.client.get(LIST_URL, headers={'If-None-Match': etag})
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+                etag = response['ETag']
+
+    def test_writes_change_the_list_last_modified(self):
+        # Last-Modified has a resolution of one second: start from a stamp set a while ago
+        cache.set(LIST_VERSION_KEY, list_version() - 10_000_000_000)
+        last_modified = self.client.get(LIST_URL)['Last-Modified']
+        self.assertEqual(self.client.get(LIST_URL, headers={'If-Modified-Since': last_modified}).status_code, 304)
+        for name, write in self.writes():
+            with self.subTest(write=name):
+                with self.captureOnCommitCallbacks(execute=True):
+                    write()
+                response = self.client.get(LIST_URL, headers={'If-Modified-Since': last_modified})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    self.client.get(LIST_URL, headers={'If-Modified-Since': response['Last-Modified']}).status_code, 304
+                )
+                # Later writes may land within the same second as this one
+                cache.set(LIST_VERSION_KEY, list_version() - 10_000_000_000)
+                last_modified = self.client.get(LIST_URL)['Last-Modified']
+
+    def test_other_user_fields_keep_the_cache(self):
+        version = list_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vendor.save(update_fields=['last_login'])
+        self.assertEqual(list_version(), version)
+
+
+class ListingQueryBudgetTests(query_budget.QueryBudgetTestCase):
+    endpoints = query_budget.endpoints_named(
+        'listing-list', 'listing-detail', 'listing-mine',
+    )
@@ -2,8 +2,13 @@ from django.shortcuts import render
 
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rentoshare.pagination import RankedCursorPagination
+from .cache import conditional_response, detail_etag, list_etag, list_version, listing_version
+from .geo import nearby_listings, parse_near
 from .models import Listing
+from .search import search_listings
 from .serializers import ListingSerializer, ListingCreateSerializer
 
 class ListingViewSet(viewsets.ModelViewSet):
@@ -16,18 +21,65 @@ class ListingViewSet(viewsets.ModelViewSet):
         return ListingSerializer
 
     def get_queryset(self):
-        queryset = Listing.objects.filter(is_active=True)
+        queryset = Listing.objects.filter(is_active=True).select_related('user')
         listing_type = self.request.query_params.get('type', None)
         if listing_type is not None:
             queryset = queryset.filter(listing_type=listing_type)
+        if self.action == 'list' and self.search_query:
+            queryset = search_listings(queryset, self.search_query)
+        near = self.near_point
+        if self.action == 'list' and near is not None:
+            queryset = nearby_listings(queryset, *near)
         return queryset
 
+    @property
+    def search_query(self):
+        return self.request.query_params.get('q', '').strip()
+
+    @property
+    def near_point(self):
+        """(latitude, longitude, radius_km) from `?near=lat,lng&radius_km=`, if given"""
+        near = self.request.query_params.get('near')
+        if not near:
+            return None
+        try:
+            return parse_near(near, self.request.query_params.get('radius_km'))
+        except ValueError as exc:
+            raise ValidationError({'near': [str(exc)]})
+
+    @property
+    def paginator(self):
+        # Radius searches are ordered by distance and text searches by relevance
+        if not hasattr(self, '_paginator') and self.action == 'list':
+            if self.near_point is not None:
+                self._paginator = RankedCursorPagination(rank_field='distance_km')
+            elif self.search_query:
+                self._paginator = RankedCursorPagination(rank_field='search_rank')
+        return super().paginator
+
+    def list(self, request, *args, **kwargs):
+        # Served from the cache (or as a 304) until any listing changes
+        version = list_version()
+        return conditional_response(
+            request, list_etag(request, version), version,
+            lambda: super(ListingViewSet, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = self.kwargs['pk']
+        version = listing_version(pk)
+        return conditional_response(
+            request, detail_etag(pk, version), version,
+            lambda: super(ListingViewSet, self).retrieve(request, *args, **kwargs)
+        )
+
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def my_listings(self, request):
         """Get current user's listings"""
-        listings = Listing.objects.filter(user=request.user)
-        serializer = self.get_serializer(listings, many=True)
-        return Response(serializer.data)
+        listings = Listing.objects.filter(user=request.user).select_related('user')
+        page = self.paginate_queryset(listings)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=['patch'], permission_classes=[permissions.IsAuthenticated])
     def toggle_active(self, request, pk=None):
@@ -2,6 +2,8 @@
 ASGI config for rentoshare project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Optional: deployments serve rentoshare.wsgi, which benchmark_async_reads
+measures faster for this project.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -10,7 +12,15 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 import os
 
 from django.core.asgi import get_asgi_application
+from django.core.handlers.asgi import ASGIRequest
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rentoshare.settings')
 
+
+class AsyncViewsRequest(ASGIRequest):
+    # Resolve against the URLs with async views for the public reads
+    urlconf = 'rentoshare.urls_async'
+
+
 application = get_asgi_application()
+application.request_class = AsyncViewsRequest
@@ -0,0 +1,127 @@
+"""
+Async execution path for the read-heavy public endpoints.
+
+Under ASGI (see rentoshare.asgi) requests resolve against
+rentoshare.urls_async: the regular URL configuration, with the async views
+of a few public reads swapped in by URL name. Those views await the
+database and the cache, so a request waiting on either does not hold a
+worker thread. They answer GET and HEAD only; every other method
+on the same URL still goes to the DRF view. Under WSGI nothing changes.
+
+The async views reuse the DRF views' querysets, paginators and serializers
+and always render JSON. They run their queries with
+rentoshare.async_db.db() and authenticate with the configured
+DEFAULT_AUTHENTICATION_CLASSES, so a token of an inactive or deleted user
+gets the same 401 as from the DRF views.
+
+This path is optional: gunicorn serves rentoshare.wsgi, which measured
+faster for the same endpoints (see benchmark_async_reads).
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse
+from django.urls import URLPattern, URLResolver
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+
+from .async_db import db
+
+ASYNC_METHODS = ('GET', 'HEAD')
+
+
+def json_response(data, status=200, headers=None):
+    return HttpResponse(
+        JSONRenderer().render(data), status=status, headers=headers, content_type='application/json'
+    )
+
+
+def render(response):
+    """Render what an async view returned; DRF Responses become JSON"""
+    if not isinstance(response, Response):
+        return response
+    headers = {name: value for name, value in response.items() if name.lower() != 'content-type'}
+    return json_response(response.data, response.status_code, headers)
+
+
+def drf_view(view_class, request, *args, **kwargs):
+    """
+    An instance of DRF view `view_class` set up for `request` as dispatch() would.
+
+    Enough for get_queryset(), paginator and get_serializer(). Nothing here
+    authenticates, so only use it for views open to anonymous users.
+    """
+    return view_class(
+        request=Request(request), args=args, kwargs=kwargs, format_kwarg=kwargs.get('format'), headers={}
+    )
+
+
+def authenticate(request):
+    """
+    Authenticate `request` with the configured authentication classes, as the DRF views do.
+
+    Raises the 401 they would for a bad token or one of an inactive or
+    deleted user; anonymous requests pass.
+    """
+    authenticators = [authentication() for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    try:
+        # Evaluating `user` runs the authenticators
+        Request(request, authenticators=authenticators).user
+    except APIException as exc:
+        if authenticators:
+            exc.auth_header = authenticators[0].authenticate_header(request)
+        raise
+
+
+def error_response(exc):
+    response = exception_handler(exc, {})
+    if response is None:
+        raise exc
+    return render(response)
+
+
+def read_view(async_view, sync_view):
+    """Serve GET and HEAD with `async_view` and every other method with `sync_view`"""
+    fallback = sync_to_async(sync_view)
+
+    async def view(request, *args, **kwargs):
+        if request.method not in ASYNC_METHODS:
+            return await fallback(request, *args, **kwargs)
+        try:
+            # The views serve anonymous users too, so authenticating (which may query the user,
+            # unless the authentication cache has it) and the view's own reads run side by side
+            outcomes = await asyncio.gather(
+                db(authenticate, request), async_view(request, *args, **kwargs), return_exceptions=True
+            )
+            # A bad token wins over whatever the view raised, as in the DRF views
+            for outcome in outcomes:
+                if isinstance(outcome, BaseException):
+                    raise outcome
+            return render(outcomes[1])
+        except (APIException, Http404) as exc:
+            return error_response(exc)
+
+    # Token authenticated, like the DRF views it stands in for
+    view.csrf_exempt = True
+    return view
+
+
+def async_urlpatterns(patterns, views):
+    """Copy of `patterns` where each pattern named in `views` is answered by that async view"""
+    swapped = []
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            pattern = URLResolver(
+                pattern.pattern, async_urlpatterns(pattern.url_patterns, views),
+                pattern.default_kwargs, pattern.app_name, pattern.namespace,
+            )
+        elif pattern.name in views:
+            pattern = URLPattern(
+                pattern.pattern, read_view(views[pattern.name], pattern.callback), pattern.default_args, pattern.name
+            )
+        swapped.append(pattern)
+    return swapped
@@ -0,0 +1,11 @@
+from itertools import islice
+
+# Ids per bulk API call and per `IN (...)` list, below SQLite's parameter limit
+MAX_BULK_IDS = 500
+
+
+def chunked(items, size=MAX_BULK_IDS):
+    """Successive lists of at most `size` of `items`"""
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
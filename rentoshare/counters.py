@@ -0,0 +1,47 @@
+"""
+Per-user counter rows kept up to date incrementally.
+
+Stats tables such as transactions.UserTransactionStats and
+reviews.UserRatingSummary have one row per user, keyed by `user_id`, and
+are changed by adding signed deltas, computed from the snapshot a row is
+replacing and the one replacing it (see rentoshare.snapshots).
+"""
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import F
+
+
+def combine_deltas(*deltas_by_user):
+    """Sum {user_id: {field: delta}} mappings into one"""
+    combined = defaultdict(lambda: defaultdict(int))
+    for user_deltas in deltas_by_user:
+        for user_id, deltas in user_deltas.items():
+            for field, value in deltas.items():
+                combined[user_id][field] += value
+    return combined
+
+
+def apply_deltas(model, deltas_by_user):
+    """Add {user_id: {field: delta}} to `model`'s counter rows, all of them or none"""
+    with db_transaction.atomic(savepoint=False):
+        for user_id, deltas in deltas_by_user.items():
+            deltas = {field: value for field, value in deltas.items() if value}
+            if deltas:
+                increment(model, user_id, deltas)
+
+
+def increment(model, user_id, deltas):
+    """Add `deltas` to `user_id`'s row of `model`, creating it on the first increment"""
+    updates = {field: F(field) + value for field, value in deltas.items()}
+    if model.objects.filter(user_id=user_id).update(**updates):
+        return
+    if any(value < 0 for value in deltas.values()):
+        # Nothing to take away from, e.g. the user is being deleted
+        return
+    try:
+        with db_transaction.atomic():
+            model.objects.create(user_id=user_id, **deltas)
+    except IntegrityError:
+        # Another request created the row first
+        model.objects.filter(user_id=user_id).update(**updates)
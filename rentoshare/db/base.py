@@ -0,0 +1,35 @@
+"""
+SQLite backend tuned for serving the API.
+
+Every new connection switches the database to WAL, so readers never wait
+for a writer and a writer never waits for readers, and applies the
+pragmas below. OPTIONS['pragmas'] overrides or extends them per database.
+With CONN_MAX_AGE each thread keeps its connection between requests, so
+this setup is paid once per connection rather than once per request.
+"""
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    # Durable across application crashes; only a power loss can drop the last commits
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Negative sizes are KiB: 64 MiB of page cache per connection
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.pragmas = {**DEFAULT_PRAGMAS, **kwargs.pop('pragmas', {})}
+        # Match SQLite's own busy handler to the driver timeout (seconds)
+        self.pragmas.setdefault('busy_timeout', int(kwargs.get('timeout', 5) * 1000))
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
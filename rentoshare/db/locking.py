@@ -0,0 +1,31 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+@contextmanager
+def write_atomic(using=None):
+    """
+    An atomic block that holds the database write lock from its first statement.
+
+    For read-then-write blocks that must not interleave with each other,
+    such as checking a listing is free before booking it. SQLite only has
+    a database-wide lock and ignores select_for_update(), so the outermost
+    block begins with `BEGIN IMMEDIATE`: concurrent callers queue on the
+    busy timeout instead of one failing when its read snapshot turns stale.
+    Other backends run a plain atomic block; lock the rows read inside with
+    select_for_update(). Nested in another atomic block, the outer one's
+    lock mode applies.
+    """
+    connection = connections[using or DEFAULT_DB_ALIAS]
+    immediate = connection.vendor == 'sqlite' and not connection.in_atomic_block
+    if immediate:
+        # Connecting resets transaction_mode from the settings
+        connection.ensure_connection()
+        mode, connection.transaction_mode = connection.transaction_mode, 'IMMEDIATE'
+    try:
+        with transaction.atomic(using=using):
+            yield
+    finally:
+        if immediate:
+            connection.transaction_mode = mode
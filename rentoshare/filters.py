@@ -0,0 +1,37 @@
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+
+def _parse_bound(value, end_of_day):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            return None
+        parsed = datetime.combine(day, time.max if end_of_day else time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def filter_date_range(queryset, query_params, field='created_at'):
+    """
+    Apply `?created_after=` / `?created_before=` (inclusive, ISO date or datetime)
+    to `queryset`. A bare date for created_before covers that whole day.
+    """
+    bounds = {'created_after': (f'{field}__gte', False), 'created_before': (f'{field}__lte', True)}
+    for param, (lookup, end_of_day) in bounds.items():
+        value = query_params.get(param)
+        if not value:
+            continue
+        try:
+            parsed = _parse_bound(value, end_of_day)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError({param: ['Enter a valid ISO 8601 date or datetime.']})
+        queryset = queryset.filter(**{lookup: parsed})
+    return queryset
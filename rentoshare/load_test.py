@@ -0,0 +1,146 @@
+"""
+Local load driver.
+
+Sends requests to the in-process WSGI or ASGI application the way a
+server would, from many concurrent clients, and summarises their
+latencies. A request is a `(path, headers, body)` triple: a GET, or a
+POST of `body` as JSON when it is not None. Used by the load_test and
+benchmark_async_reads commands.
+"""
+import asyncio
+import io
+import json
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+
+
+def gets(paths, headers=None):
+    """GET requests for `paths`, all sent with `headers`"""
+    return [(path, headers, None) for path in paths]
+
+
+def _encode(headers, body):
+    """The method, headers and payload bytes of a request"""
+    if body is None:
+        return 'GET', dict(headers or {}), b''
+    payload = json.dumps(body).encode()
+    return 'POST', {**(headers or {}), 'Content-Type': 'application/json', 'Content-Length': str(len(payload))}, payload
+
+
+def wsgi_request(application, path, headers=None, body=None):
+    """Send a request to a WSGI application as a server thread would; returns (status, body)"""
+    method, headers, payload = _encode(headers, body)
+    path, _, query = path.partition('?')
+    environ = {
+        'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+        'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'testserver', 'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(payload), 'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+    }
+    for name, value in headers.items():
+        name = name.upper().replace('-', '_')
+        environ[name if name in ('CONTENT_TYPE', 'CONTENT_LENGTH') else 'HTTP_' + name] = value
+    started = []
+    body = application(environ, lambda status, headers, exc_info=None: started.append(status))
+    try:
+        content = b''.join(body)
+    finally:
+        # Sends request_finished, which recycles the thread's database connections
+        body.close()
+    return int(started[0].split()[0]), content
+
+
+async def asgi_request(application, path, headers=None, body=None):
+    """Send a request to an ASGI application as a server would; returns (status, body)"""
+    method, headers, payload = _encode(headers, body)
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+        'root_path': '', 'headers': [(b'host', b'testserver')] + [
+            (name.lower().encode(), value.encode()) for name, value in headers.items()
+        ],
+        'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+    }
+    disconnected = asyncio.Event()
+    body_sent = False
+    response = {'status': None, 'body': []}
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': payload, 'more_body': False}
+        # The client stays connected until the response is complete
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+        elif message['type'] == 'http.response.body':
+            response['body'].append(message.get('body', b''))
+
+    await application(scope, receive, send)
+    disconnected.set()
+    return response['status'], b''.join(response['body'])
+
+
+def drive(send, items, requests, clients):
+    """
+    Send `requests` requests, cycling through `items`, from `clients` clients.
+
+    Each client sends its next request as soon as the last one is answered.
+    `send(item)` must return an awaitable of (status, body). Returns
+    (latencies in seconds, responses that were not 2xx, seconds taken).
+    """
+    latencies = []
+    errors = 0
+    remaining = requests
+    next_item = cycle(items)
+
+    async def client():
+        nonlocal errors, remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            status, _ = await send(next(next_item))
+            latencies.append(time.perf_counter() - started)
+            errors += not 200 <= status < 300
+
+    async def run():
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(clients)))
+        return time.perf_counter() - started
+
+    seconds = asyncio.run(run())
+    return latencies, errors, seconds
+
+
+def drive_wsgi(application, items, requests, clients, threads):
+    """drive() a WSGI application served by `threads` worker threads; requests beyond them queue"""
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        def send(item):
+            return asyncio.get_running_loop().run_in_executor(pool, wsgi_request, application, *item)
+        return drive(send, items, requests, clients)
+
+
+def drive_asgi(application, items, requests, clients):
+    return drive(lambda item: asgi_request(application, *item), items, requests, clients)
+
+
+def summarize(latencies, errors, seconds):
+    """Throughput and latency percentiles of one drive() run, as stored in a load test baseline"""
+    percentiles = statistics.quantiles(latencies, n=100)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'requests_per_second': round(len(latencies) / seconds, 1),
+        'p50_ms': round(percentiles[49] * 1000, 2),
+        'p95_ms': round(percentiles[94] * 1000, 2),
+        'p99_ms': round(percentiles[98] * 1000, 2),
+    }
@@ -0,0 +1,250 @@
+"""
+Per-endpoint request metrics.
+
+MetricsMiddleware times every request and records, under its resolved URL
+name, the wall time, the time spent in database queries, the number of
+queries and the response size into fixed-bucket histograms. It also sends
+the timings to the client in a Server-Timing header. Streaming responses
+(the CSV and NDJSON exports) run their queries while the body is sent,
+after the middleware has returned, so for them only the time to the first
+byte is recorded and sent. `render_metrics()` exposes everything in the
+Prometheus text format (see rentoshare.views).
+
+Background jobs, such as the payment hold sweep, record each run with
+`registry.record_job()`: its duration and the number of items it handled.
+
+Queries are counted by a wrapper every database connection gets when it
+opens, so queries run on other threads for the request (async views, see
+rentoshare.async_views) are counted too. Metrics are kept per process:
+with several worker processes, scrape each one.
+"""
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+UNRESOLVED = '<unresolved>'
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+BYTES_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_request_stats = contextvars.ContextVar('request_stats', default=None)
+
+
+def time_query(execute, sql, params, many, context):
+    stats = _request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_seconds += time.perf_counter() - started
+        stats.queries += 1
+
+
+def track_queries(connection, **kwargs):
+    if time_query not in connection.execute_wrappers:
+        # Outermost, and out of the way of `with connection.execute_wrapper()` blocks, which pop the last one
+        connection.execute_wrappers.insert(0, time_query)
+
+
+class Histogram:
+    """Observation counts per bucket (not cumulative) plus their sum, for one label set"""
+    __slots__ = ('counts', 'total')
+
+    def __init__(self, buckets):
+        # The last slot counts observations above every bucket (+Inf)
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+
+
+class MetricsRegistry:
+    # name -> (help, buckets), in the order record() takes the observations
+    HISTOGRAMS = {
+        'http_request_duration_seconds': ('Wall time of requests', SECONDS_BUCKETS),
+        'http_request_db_seconds': ('Time requests spent in database queries (streaming responses excluded)',
+                                    SECONDS_BUCKETS),
+        'http_request_queries': ('Database queries run per request (streaming responses excluded)', QUERY_BUCKETS),
+        'http_response_size_bytes': ('Size of response bodies (streaming responses excluded)', BYTES_BUCKETS),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+        self._responses = {}
+        self._jobs = {}
+        self._job_items = {}
+
+    def record(self, endpoint, method, status, seconds, db_seconds, queries, size):
+        observations = (seconds, db_seconds, queries, size)
+        # Find the buckets outside the lock; only the increments need it
+        slots = [
+            bisect_left(buckets, value) if value is not None else None
+            for (_, buckets), value in zip(self.HISTOGRAMS.values(), observations)
+        ]
+        key = (endpoint, method)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [Histogram(buckets) for _, buckets in self.HISTOGRAMS.values()]
+            for histogram, slot, value in zip(series, slots, observations):
+                if slot is not None:
+                    histogram.counts[slot] += 1
+                    histogram.total += value
+            response_key = (endpoint, method, status)
+            self._responses[response_key] = self._responses.get(response_key, 0) + 1
+
+    def record_job(self, job, seconds, items):
+        """Record one run of the background job `job` that handled `items` items"""
+        slot = bisect_left(SECONDS_BUCKETS, seconds)
+        with self._lock:
+            histogram = self._jobs.get(job)
+            if histogram is None:
+                histogram = self._jobs[job] = Histogram(SECONDS_BUCKETS)
+            histogram.counts[slot] += 1
+            histogram.total += seconds
+            self._job_items[job] = self._job_items.get(job, 0) + items
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self._responses.clear()
+            self._jobs.clear()
+            self._job_items.clear()
+
+    def snapshot(self):
+        with self._lock:
+            series = {
+                key: [(list(histogram.counts), histogram.total) for histogram in histograms]
+                for key, histograms in self._series.items()
+            }
+            jobs = {job: (list(histogram.counts), histogram.total) for job, histogram in self._jobs.items()}
+            return series, dict(self._responses), jobs, dict(self._job_items)
+
+
+registry = MetricsRegistry()
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _histogram_lines(metric, labels, buckets, counts, total):
+    lines = []
+    cumulative = 0
+    for bound, count in zip(buckets, counts):
+        cumulative += count
+        lines.append(f'{metric}_bucket{{{labels},le="{_number(bound)}"}} {cumulative}')
+    cumulative += counts[-1]
+    lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {cumulative}')
+    lines.append(f'{metric}_sum{{{labels}}} {_number(total)}')
+    lines.append(f'{metric}_count{{{labels}}} {cumulative}')
+    return lines
+
+
+def render_metrics(prefix='rentoshare'):
+    """Everything recorded so far, in the Prometheus text exposition format"""
+    series, responses, jobs, job_items = registry.snapshot()
+    lines = []
+    for index, (name, (help_text, buckets)) in enumerate(MetricsRegistry.HISTOGRAMS.items()):
+        metric = f'{prefix}_{name}'
+        lines += [f'# HELP {metric} {help_text}, by URL name.', f'# TYPE {metric} histogram']
+        for (endpoint, method), histograms in sorted(series.items()):
+            counts, total = histograms[index]
+            labels = f'endpoint="{_label(endpoint)}",method="{_label(method)}"'
+            lines += _histogram_lines(metric, labels, buckets, counts, total)
+
+    metric = f'{prefix}_http_responses_total'
+    lines += [f'# HELP {metric} Responses sent, by URL name and status code.', f'# TYPE {metric} counter']
+    for (endpoint, method, status), count in sorted(responses.items()):
+        lines.append(
+            f'{metric}{{endpoint="{_label(endpoint)}",method="{_label(method)}",status="{status}"}} {count}'
+        )
+
+    metric = f'{prefix}_job_duration_seconds'
+    lines += [f'# HELP {metric} Wall time of background job runs, by job.', f'# TYPE {metric} histogram']
+    for job, (counts, total) in sorted(jobs.items()):
+        lines += _histogram_lines(metric, f'job="{_label(job)}"', SECONDS_BUCKETS, counts, total)
+
+    metric = f'{prefix}_job_items_total'
+    lines += [f'# HELP {metric} Items background jobs handled, by job.', f'# TYPE {metric} counter']
+    for job, count in sorted(job_items.items()):
+        lines.append(f'{metric}{{job="{_label(job)}"}} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """Record per-endpoint metrics and add a Server-Timing header; list it first in MIDDLEWARE"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        connection_created.connect(track_queries)
+        # Connections this thread opened before the middleware loaded
+        for connection in connections.all(initialized_only=True):
+            track_queries(connection)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        self.finish(request, response, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        self.finish(request, response, stats, time.perf_counter() - started)
+        return response
+
+    def finish(self, request, response, stats, seconds):
+        match = request.resolver_match
+        endpoint = match.view_name if match is not None else UNRESOLVED
+        if response.streaming:
+            # Its queries have not run yet; a zero would pass for a cheap request
+            registry.record(endpoint, request.method, response.status_code, seconds, None, None, None)
+            response['Server-Timing'] = f'app;dur={seconds * 1000:.1f}'
+            return
+        registry.record(
+            endpoint, request.method, response.status_code,
+            seconds, stats.db_seconds, stats.queries, len(response.content),
+        )
+        response['Server-Timing'] = (
+            f'app;dur={seconds * 1000:.1f}, db;dur={stats.db_seconds * 1000:.1f};desc="queries: {stats.queries}"'
+        )
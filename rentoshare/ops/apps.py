@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class OpsConfig(AppConfig):
+    """Project-wide operations: benchmarks, load tests and the read replica, no models"""
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'rentoshare.ops'
+    label = 'ops'
@@ -0,0 +1,91 @@
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.asgi import get_asgi_application
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from rentoshare.load_test import asgi_request, drive_asgi, drive_wsgi, gets, summarize, wsgi_request
+from rentoshare.query_budget import ENDPOINTS, Seeder
+from rentoshare.urls_async import ASYNC_VIEWS
+
+ASYNC_ENDPOINTS = [endpoint for endpoint in ENDPOINTS if endpoint.name in ASYNC_VIEWS]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare requests per second and latency of the public read endpoints served by the '
+        'synchronous views over WSGI and by the async views over ASGI, at the same number of '
+        'concurrent clients (runs against a throwaway test database)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=500, help='Concurrent clients')
+        parser.add_argument('--requests', type=int, default=5000, help='Requests per server')
+        parser.add_argument('--threads', type=int, default=32,
+                            help='Worker threads of the WSGI server (requests beyond them queue)')
+        parser.add_argument('--rows', type=int, default=100, help='Rows seeded for each endpoint to render')
+
+    def handle(self, *args, **options):
+        if min(options['clients'], options['requests'], options['threads'], options['rows']) <= 0:
+            raise CommandError('--clients, --requests, --threads and --rows must be positive.')
+
+        # Imported here: each builds its handler, which loads the middleware
+        from rentoshare.asgi import application as asgi_application
+        from rentoshare.wsgi import application as wsgi_application
+        # ASGI with the regular URLs, where the DRF views run in a thread per request
+        sync_asgi_application = get_asgi_application()
+
+        # Served as in production: DEBUG would also log every query
+        setup_test_environment(debug=False)
+        with tempfile.TemporaryDirectory() as directory:
+            # A file database, so each server thread opens its own connections as in production
+            connections['default'].settings_dict['TEST']['NAME'] = str(Path(directory) / 'benchmark.sqlite3')
+            runner = DiscoverRunner(verbosity=0, interactive=False)
+            old_config = runner.setup_databases()
+            isolated_cache = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                          'LOCATION': 'benchmark-async-reads'}}
+            try:
+                with override_settings(CACHES=isolated_cache):
+                    fixture = Seeder()(options['rows'])
+                    paths = [endpoint.resolve_path(fixture) for endpoint in ASYNC_ENDPOINTS]
+                    self.check_parity(wsgi_application, asgi_application, paths)
+                    items, requests, clients = gets(paths), options['requests'], options['clients']
+                    results = {
+                        'wsgi': summarize(*drive_wsgi(wsgi_application, items, requests, clients, options['threads'])),
+                        'asgi sync': summarize(*drive_asgi(sync_asgi_application, items, requests, clients)),
+                        'asgi': summarize(*drive_asgi(asgi_application, items, requests, clients)),
+                    }
+            finally:
+                connections.close_all()
+                runner.teardown_databases(old_config)
+                connections['default'].settings_dict['TEST']['NAME'] = None
+                teardown_test_environment()
+
+        self.stdout.write(f'{options["clients"]} clients, endpoints: {", ".join(ASYNC_VIEWS)}')
+        for label, result in results.items():
+            self.stdout.write(
+                f"{label:<9} {result['requests_per_second']:8.0f} requests/s  p50 {result['p50_ms']:8.1f}ms  "
+                f"p99 {result['p99_ms']:8.1f}ms  {result['errors']} errors"
+            )
+        throughput = {label: result['requests_per_second'] for label, result in results.items()}
+        self.stdout.write(self.style.SUCCESS(
+            f"Async views: {throughput['asgi'] / throughput['asgi sync']:.2f}x the throughput of the DRF views "
+            f"under ASGI, {throughput['asgi'] / throughput['wsgi']:.2f}x their throughput under WSGI"
+        ))
+
+    def check_parity(self, wsgi_application, asgi_application, paths):
+        """Both servers must answer every endpoint with the same status and body"""
+        for path in paths:
+            cache.clear()
+            wsgi_status, wsgi_body = wsgi_request(wsgi_application, path)
+            cache.clear()
+            asgi_status, asgi_body = asyncio.run(asgi_request(asgi_application, path))
+            if wsgi_status != asgi_status or json.loads(wsgi_body) != json.loads(asgi_body):
+                raise CommandError(f'WSGI and ASGI disagree on {path}: {wsgi_status} vs {asgi_status}')
+        cache.clear()
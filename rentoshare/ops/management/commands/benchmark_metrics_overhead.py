@@ -0,0 +1,79 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import resolve
+
+from rentoshare.metrics import MetricsMiddleware, registry, time_query
+
+BUDGET_MICROSECONDS = 50
+PATH = '/api/listings/api/listings/'
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure what MetricsMiddleware adds to a request that runs a few queries, and fail '
+        f'above {BUDGET_MICROSECONDS}us (runs against a throwaway test database)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000, help='Requests timed per mode')
+        parser.add_argument('--queries', type=int, default=2, help='Queries each request runs')
+
+    def handle(self, *args, **options):
+        if options['requests'] <= 0 or options['queries'] < 0:
+            raise CommandError('--requests must be positive and --queries not negative.')
+
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            plain, instrumented = self.compare(options['requests'], options['queries'])
+        finally:
+            if time_query in connection.execute_wrappers:
+                connection.execute_wrappers.remove(time_query)
+            registry.reset()
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        overhead = (instrumented - plain) * 1_000_000
+        self.stdout.write(f'plain        {plain * 1_000_000:8.1f} us/request')
+        self.stdout.write(f'instrumented {instrumented * 1_000_000:8.1f} us/request')
+        line = f'Metrics overhead: {overhead:.1f} us/request with {options["queries"]} queries'
+        if overhead > BUDGET_MICROSECONDS:
+            raise CommandError(f'{line}, over the {BUDGET_MICROSECONDS} us budget.')
+        self.stdout.write(self.style.SUCCESS(f'{line} (budget {BUDGET_MICROSECONDS} us)'))
+
+    def compare(self, requests, queries):
+        request = RequestFactory().get(PATH)
+        request.resolver_match = resolve(PATH)
+        body = b'x' * 2000
+
+        def view(request):
+            with connection.cursor() as cursor:
+                for _ in range(queries):
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+            return HttpResponse(body)
+
+        # Warm up the connection before either mode is timed
+        view(request)
+        plain = self.time(view, request, requests)
+        # The middleware wraps this thread's open connection as it loads
+        instrumented = self.time(MetricsMiddleware(view), request, requests)
+        return plain, instrumented
+
+    def time(self, handler, request, requests):
+        # Best of three runs, to keep scheduler noise out of a microsecond difference
+        best = None
+        for _ in range(3):
+            started = time.perf_counter()
+            for _ in range(requests):
+                handler(request)
+            elapsed = (time.perf_counter() - started) / requests
+            best = elapsed if best is None else min(best, elapsed)
+        return best
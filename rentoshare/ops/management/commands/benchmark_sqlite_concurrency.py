@@ -0,0 +1,131 @@
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from accounts.models import User
+from listings.models import Listing
+
+# The database settings before rentoshare.db: rollback journal, a connection per request
+BASELINE = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'CONN_MAX_AGE': 0,
+    'OPTIONS': {'transaction_mode': 'IMMEDIATE', 'timeout': 20},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Run concurrent listing reads and writes against a scratch SQLite file with the '
+        'baseline and the configured database settings, and compare throughput'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8, help='Reader threads')
+        parser.add_argument('--writers', type=int, default=4, help='Writer threads')
+        parser.add_argument('--seconds', type=float, default=5, help='Duration of each run')
+        parser.add_argument('--rows', type=int, default=5000, help='Listings seeded before each run')
+
+    def handle(self, *args, **options):
+        if min(options['readers'], options['writers'], options['rows']) <= 0 or options['seconds'] <= 0:
+            raise CommandError('--readers, --writers, --seconds and --rows must be positive.')
+
+        configured = {key: value for key, value in settings.DATABASES['default'].items() if key != 'NAME'}
+        # Model signals still defer work through the default alias; keep that off the real database
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                results = self.compare(directory, configured, options)
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        for label, (reads, writes, errors, seconds) in results.items():
+            self.stdout.write(
+                f'{label:<11} {reads / seconds:9.0f} reads/s {writes / seconds:8.0f} writes/s  {errors} errors'
+            )
+        baseline, configured = results['baseline'], results['configured']
+        gain = (configured[0] + configured[1]) / max(baseline[0] + baseline[1], 1)
+        self.stdout.write(self.style.SUCCESS(f'Configured database: {gain:.1f}x the baseline throughput'))
+
+    def compare(self, directory, configured, options):
+        results = {}
+        for label, config in (('baseline', BASELINE), ('configured', configured)):
+            alias = f'benchmark_{label}'
+            self.add_database(alias, config, Path(directory) / f'{label}.sqlite3')
+            try:
+                self.seed(alias, options['rows'])
+                results[label] = self.run(alias, options['readers'], options['writers'], options['seconds'])
+            finally:
+                connections[alias].close()
+                del connections.settings[alias]
+        return results
+
+    def add_database(self, alias, config, path):
+        # configure_settings fills in every default for a one-database mapping
+        connections.settings[alias] = connections.configure_settings({'default': {**config, 'NAME': path}})['default']
+        with connections[alias].schema_editor() as editor:
+            editor.create_model(User)
+            editor.create_model(Listing)
+
+    def seed(self, alias, rows):
+        owner = User.objects.using(alias).create(email='owner@benchmark.test', full_name='Owner', phone='0')
+        Listing.objects.using(alias).bulk_create([
+            Listing(user=owner, title=f'Listing {i}', description='Benchmark listing', listing_type='rent',
+                    price_per_day=10)
+            for i in range(rows)
+        ], batch_size=1000)
+
+    def run(self, alias, readers, writers, seconds):
+        owner_id = User.objects.using(alias).values_list('pk', flat=True).first()
+        stop = threading.Event()
+        lock = threading.Lock()
+        totals = {'reads': 0, 'writes': 0, 'errors': 0}
+
+        def read():
+            return list(Listing.objects.using(alias).filter(is_active=True).order_by('-id')[:20])
+
+        def write():
+            with transaction.atomic(using=alias):
+                Listing.objects.using(alias).create(
+                    user_id=owner_id, title='New listing', description='Benchmark write', listing_type='rent',
+                    price_per_day=10
+                )
+
+        def worker(operation, counter):
+            done = errors = 0
+            try:
+                while not stop.is_set():
+                    try:
+                        operation()
+                        done += 1
+                    except OperationalError:
+                        errors += 1
+                    # What request_finished does: close the connection unless CONN_MAX_AGE keeps it
+                    connections[alias].close_if_unusable_or_obsolete()
+            finally:
+                connections[alias].close()
+                with lock:
+                    totals[counter] += done
+                    totals['errors'] += errors
+
+        threads = (
+            [threading.Thread(target=worker, args=(read, 'reads')) for _ in range(readers)] +
+            [threading.Thread(target=worker, args=(write, 'writes')) for _ in range(writers)]
+        )
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return totals['reads'], totals['writes'], totals['errors'], time.perf_counter() - started
@@ -0,0 +1,131 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from accounts.models import User
+from disputes.models import Dispute, DisputeStatus
+from disputes.participants import rebuild_participants
+from disputes.stats import compute_dispute_stats, dispute_stats
+from donations.models import DonationRequest, RequestStatus
+from donations.stats import compute_donation_stats, donation_stats
+from listings.models import Listing
+from transactions.models import Transaction
+
+
+def legacy_dispute_stats(user_id):
+    """The former my_dispute_stats body: eight count() queries"""
+    raised = Dispute.objects.filter(raised_by_id=user_id)
+    involved = Dispute.objects.filter(Q(transaction__vendor_id=user_id) | Q(transaction__consumer_id=user_id))
+    return {
+        'raised_by_me': {'total': raised.count(), **{s: raised.filter(status=s).count() for s in DisputeStatus.values}},
+        'involving_me': {'total': involved.count(), **{s: involved.filter(status=s).count() for s in DisputeStatus.values}},
+    }
+
+
+def legacy_donation_stats(user_id):
+    """The former my_donation_stats body: eight count() queries"""
+    made = DonationRequest.objects.filter(user_id=user_id)
+    received = DonationRequest.objects.filter(listing__user_id=user_id)
+    return {
+        'requests_made': {'total': made.count(), **{s: made.filter(status=s).count() for s in RequestStatus.values}},
+        'requests_received': {'total': received.count(), **{s: received.filter(status=s).count() for s in RequestStatus.values}},
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed disputes and donation requests into a throwaway test database and compare '
+        'the query count and latency of the old and new dispute/donation stats'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--rows', type=int, default=20000,
+                            help='Number of disputes and of donation requests to seed')
+        parser.add_argument('--repeat', type=int, default=50,
+                            help='Stats lookups timed per implementation')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if min(options['users'], options['rows'], options['repeat']) <= 0:
+            raise CommandError('--users, --rows and --repeat must be positive.')
+
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        isolated_cache = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                      'LOCATION': 'benchmark-user-stats'}}
+        try:
+            with override_settings(CACHES=isolated_cache):
+                user_ids = self.seed(random.Random(options['seed']), options['users'], options['rows'])
+                self.compare('dispute stats', user_ids, options['repeat'],
+                             legacy_dispute_stats, compute_dispute_stats, dispute_stats)
+                self.compare('donation stats', user_ids, options['repeat'],
+                             legacy_donation_stats, compute_donation_stats, donation_stats)
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+    def seed(self, rng, user_count, rows):
+        users = User.objects.bulk_create([
+            User(email=f'stats-{i}@benchmark.test', full_name=f'Stats {i}', phone='0', password='!')
+            for i in range(user_count)
+        ])
+        now = timezone.now()
+        listings = Listing.objects.bulk_create([
+            Listing(user=rng.choice(users), title=f'Listing {i}', description='Benchmark listing',
+                    listing_type='donation', price_per_day=10)
+            for i in range(rows)
+        ], batch_size=1000)
+        transactions = Transaction.objects.bulk_create([
+            Transaction(listing=listing, vendor=listing.user, consumer=rng.choice(users),
+                        start_date=now, end_date=now + timedelta(days=1), total_price=10)
+            for listing in listings
+        ], batch_size=1000)
+        Dispute.objects.bulk_create([
+            Dispute(transaction=transaction, reason='Benchmark dispute',
+                    raised_by_id=rng.choice((transaction.vendor_id, transaction.consumer_id)),
+                    status=rng.choice(DisputeStatus.values))
+            for transaction in transactions
+        ], batch_size=1000)
+        rebuild_participants()
+        DonationRequest.objects.bulk_create([
+            DonationRequest(listing=listing, user=rng.choice(users), status=rng.choice(RequestStatus.values))
+            for listing in listings
+        ], batch_size=1000, ignore_conflicts=True)
+        return [user.pk for user in users]
+
+    def measure(self, user_ids, repeat, stats):
+        queries = 0
+        started = time.perf_counter()
+        for i in range(repeat):
+            with CaptureQueriesContext(connection) as context:
+                stats(user_ids[i % len(user_ids)])
+            queries += len(context.captured_queries)
+        elapsed = time.perf_counter() - started
+        return queries / repeat, elapsed / repeat * 1000
+
+    def compare(self, name, user_ids, repeat, legacy, aggregated, cached):
+        for user_id in user_ids[:repeat]:
+            if legacy(user_id) != aggregated(user_id):
+                raise CommandError(f'{name}: results differ for user {user_id}.')
+
+        cache.clear()
+        cached_ids = user_ids[:min(len(user_ids), 10)]
+        for user_id in cached_ids:
+            cached(user_id)
+
+        self.stdout.write(name)
+        for label, stats, ids in (('count() per status', legacy, user_ids),
+                                  ('conditional aggregate', aggregated, user_ids),
+                                  ('cached', cached, cached_ids)):
+            queries, latency = self.measure(ids, repeat, stats)
+            self.stdout.write(f'  {label:<24} {queries:4.1f} queries  {latency:8.3f} ms/request')
@@ -0,0 +1,311 @@
+import asyncio
+import json
+from datetime import timedelta
+from pathlib import Path
+from urllib.parse import urlencode
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count, Max
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from disputes.models import Dispute, DisputeParticipant, ParticipantRole
+from disputes.participants import visible_disputes
+from disputes.queue import dispute_queue
+from donations.models import DonationRequest
+from kyc.models import KYC, DocumentType
+from listings.models import Listing
+from rentoshare.load_test import asgi_request, drive_asgi, drive_wsgi, gets, summarize, wsgi_request
+from rentoshare.query_budget import ENDPOINTS
+from reviews.models import Review
+from transactions.models import Transaction, UserTransactionStats
+
+# Tables whose sizes are stored with a baseline, so comparisons are like for like
+COUNTED_MODELS = (User, Listing, Transaction, Dispute, Review, DonationRequest, KYC)
+
+# Days of rows the export scenarios ask for, as an admin's routine export would
+EXPORT_DAYS = 30
+
+
+def _search(fixture):
+    # The item a title ends with, e.g. "drill" of "Heavy duty electric drill"
+    return '/api/listings/api/listings/?' + urlencode({'q': fixture['listing'].title.split()[-1]})
+
+
+def _near(fixture):
+    listing = fixture['located_listing']
+    return '/api/listings/api/listings/?' + urlencode({'near': f'{listing.latitude},{listing.longitude}',
+                                                       'radius_km': 10})
+
+
+def _export(url, export_format):
+    def path(fixture):
+        created_after = (timezone.now() - timedelta(days=EXPORT_DAYS)).date().isoformat()
+        return f'{url}?' + urlencode({'format': export_format, 'created_after': created_after})
+    return path
+
+
+# Read paths loaded besides the query budget endpoints: name -> (user loaded as, path for the fixture)
+READ_SCENARIOS = {
+    'listing-search': (None, _search),
+    'listing-near': (None, _near),
+    'admin-transaction-export-csv': ('admin', _export('/api/transactions/admin/list/', 'csv')),
+    'admin-transaction-export-ndjson': ('admin', _export('/api/transactions/admin/list/', 'ndjson')),
+    'admin-dispute-export-csv': ('admin', _export('/api/disputes/admin/list/', 'csv')),
+    'admin-dispute-export-ndjson': ('admin', _export('/api/disputes/admin/list/', 'ndjson')),
+}
+
+# Endpoints loaded with --writes, named as their URLs; each request creates or claims a row
+WRITE_ENDPOINTS = {
+    'transaction-create': '/api/transactions/create/',
+    'review-create': '/api/reviews/create/',
+    'dispute-create': '/api/disputes/create/',
+    'kyc-create': '/api/kyc/create/',
+    'admin-dispute-claim-next': '/api/disputes/admin/queue/claim-next/',
+}
+
+
+def bearer(user):
+    return {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Load every read endpoint, search, geo search and export, and with --writes the booking, '
+        'review, dispute and KYC submissions and dispute claims, from concurrent clients against '
+        'the current database, report throughput '
+        'and p50/p95/p99 latency per endpoint and save them as a JSON baseline '
+        '(fill the database with seed_synthetic_data first)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--server', choices=('wsgi', 'asgi'), default='wsgi', help='Application to serve from')
+        parser.add_argument('--clients', type=int, default=32, help='Concurrent clients')
+        parser.add_argument('--requests', type=int, default=500, help='Requests per endpoint')
+        parser.add_argument('--threads', type=int, default=32,
+                            help='Worker threads of the WSGI server (requests beyond them queue)')
+        parser.add_argument('--writes', action='store_true',
+                            help='Also load the write endpoints; every request adds a row to the database '
+                                 'or claims an open dispute')
+        parser.add_argument('--endpoint', action='append', dest='endpoints', metavar='NAME',
+                            help='Only load this endpoint (repeatable); names as in rentoshare.query_budget.ENDPOINTS, '
+                                 'READ_SCENARIOS or WRITE_ENDPOINTS')
+        parser.add_argument('--output', default='load-baseline.json',
+                            help='File the results are written to (empty to skip)')
+        parser.add_argument('--compare', metavar='BASELINE',
+                            help='Earlier results to compare with; fails on p95 regressions beyond --tolerance')
+        parser.add_argument('--tolerance', type=float, default=20.0,
+                            help='Percent a p95 latency may grow over --compare before it counts as a regression')
+
+    def handle(self, *args, **options):
+        if min(options['clients'], options['threads']) <= 0 or options['requests'] < 2:
+            raise CommandError('--clients and --threads must be positive and --requests at least 2.')
+        # (name, user loaded as, path for the fixture)
+        reads = [(endpoint.name, endpoint.user, endpoint.resolve_path) for endpoint in ENDPOINTS] + [
+            (name, user, path) for name, (user, path) in READ_SCENARIOS.items()
+        ]
+        writes = list(WRITE_ENDPOINTS) if options['writes'] else []
+        if options['endpoints']:
+            unknown = set(options['endpoints']) - {name for name, _, _ in reads} - set(WRITE_ENDPOINTS)
+            if unknown:
+                raise CommandError(f'Unknown endpoints: {", ".join(sorted(unknown))}')
+            reads = [read for read in reads if read[0] in options['endpoints']]
+            writes = [name for name in WRITE_ENDPOINTS if name in options['endpoints']]
+        baseline = None
+        if options['compare']:
+            try:
+                baseline = json.loads(Path(options['compare']).read_text())
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'Cannot read {options["compare"]}: {exc}')
+
+        fixture = self.pick_fixture()
+        rows = {model._meta.label: model.objects.count() for model in COUNTED_MODELS}
+        # Built up front, so their queries are not timed; one more for the warm-up
+        write_requests = {name: self.write_requests(name, fixture, options['requests'] + 1) for name in writes}
+        # Imported here: building the handler loads the middleware
+        if options['server'] == 'asgi':
+            from rentoshare.asgi import application
+        else:
+            from rentoshare.wsgi import application
+
+        # Served as in production: DEBUG would also log every query
+        setup_test_environment(debug=False)
+        results = {}
+        try:
+            for name, user, path_for in reads:
+                path = path_for(fixture)
+                [request] = gets([path], bearer(fixture[user]) if user else None)
+                results[name] = {'path': path, **self.load(application, request, [request], options)}
+                self.write_result(name, results[name], baseline)
+            for name, (warm_up, *requests) in write_requests.items():
+                results[name] = {
+                    'path': WRITE_ENDPOINTS[name], **self.load(application, warm_up, requests, options)
+                }
+                self.write_result(name, results[name], baseline)
+        finally:
+            connections.close_all()
+            teardown_test_environment()
+
+        failed = [name for name, result in results.items() if result['errors']]
+        if failed:
+            raise CommandError(f'Non-2xx responses from {", ".join(failed)}; no baseline written.')
+        if options['output']:
+            Path(options['output']).write_text(json.dumps({
+                'created_at': timezone.now().isoformat(),
+                'server': options['server'],
+                'clients': options['clients'],
+                'requests': options['requests'],
+                'rows': rows,
+                'endpoints': results,
+            }, indent=2) + '\n')
+            self.stdout.write(f'Wrote {options["output"]}')
+
+        if baseline is None:
+            self.stdout.write(self.style.SUCCESS(f'Loaded {len(results)} endpoints.'))
+            return
+        if baseline.get('rows') != rows or any(baseline.get(key) != options[key] for key in ('server', 'clients')):
+            self.stdout.write(self.style.WARNING(
+                'The baseline was measured on different row counts, server or number of clients.'
+            ))
+        regressions = [
+            name for name, result in results.items()
+            if name in baseline['endpoints'] and
+            result['p95_ms'] > baseline['endpoints'][name]['p95_ms'] * (1 + options['tolerance'] / 100)
+        ]
+        if regressions:
+            raise CommandError(
+                f'p95 latency grew more than {options["tolerance"]:g}% on {", ".join(regressions)}.'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'No endpoint regressed more than {options["tolerance"]:g}% at p95 against {options["compare"]}.'
+        ))
+
+    def pick_fixture(self):
+        """The users and objects the endpoints are loaded as and with: the busiest ones, the worst case"""
+        vendor_id = (
+            Listing.objects.order_by().values('user').annotate(listings=Count('pk'))
+            .order_by('-listings').values_list('user', flat=True).first()
+        )
+        # The busiest consumer who can see a dispute, so the dispute endpoints have one to show
+        consumer_id = (
+            UserTransactionStats.objects
+            .filter(user__in=DisputeParticipant.objects.filter(role=ParticipantRole.CONSUMER).values('user'))
+            .order_by('-consumer_total').values_list('user', flat=True).first()
+        )
+        vendor = User.objects.filter(pk=vendor_id).first()
+        consumer = User.objects.filter(pk=consumer_id).first()
+        # On an active listing: anonymous users get a 404 for inactive ones
+        donation_request = (
+            DonationRequest.objects.filter(listing__user=vendor, listing__is_active=True).order_by('-pk').first()
+        )
+        fixture = {
+            'vendor': vendor,
+            'consumer': consumer,
+            'admin': User.objects.filter(is_staff=True, is_active=True).order_by('pk').first(),
+            'listing': (
+                donation_request.listing if donation_request
+                else Listing.objects.filter(user=vendor, is_active=True).first()
+            ),
+            'located_listing': Listing.objects.filter(is_active=True, latitude__isnull=False).order_by('pk').first(),
+            'transaction': Transaction.objects.filter(consumer=consumer).first(),
+            'dispute': visible_disputes(consumer).first() if consumer else None,
+            'donation_request': donation_request,
+            'reviewers': list(User.objects.filter(kyc__isnull=False).order_by('-pk')[:100]),
+        }
+        missing = [name for name, value in fixture.items() if not value]
+        if missing:
+            raise CommandError(
+                f'Nothing to load as {", ".join(missing)}; fill the database with seed_synthetic_data first.'
+            )
+        return fixture
+
+    def write_requests(self, name, fixture, count):
+        """`count` requests to write endpoint `name`, each creating a different row"""
+        build = {
+            'transaction-create': self.bookings,
+            'review-create': self.reviews,
+            'dispute-create': self.disputes,
+            'kyc-create': self.kyc_submissions,
+            'admin-dispute-claim-next': self.claims,
+        }[name]
+        return [(WRITE_ENDPOINTS[name], bearer(user), body) for user, body in build(fixture, count)]
+
+    def bookings(self, fixture, count):
+        """Back to back days after the last booking of the busiest vendor's listings, so none conflict"""
+        listings = list(Listing.objects.filter(user=fixture['vendor'], is_active=True).order_by('pk')[:100])
+        last_end = Transaction.objects.filter(listing__in=listings).aggregate(last=Max('end_date'))['last']
+        now = timezone.now()
+        first_day = max(last_end or now, now).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        for i in range(count):
+            start = first_day + timedelta(days=i // len(listings))
+            yield fixture['consumer'], {
+                'listing': listings[i % len(listings)].pk,
+                'start_date': start.isoformat(), 'end_date': (start + timedelta(days=1)).isoformat(),
+            }
+
+    def disputes(self, fixture, count):
+        consumer = fixture['consumer']
+        transactions = list(
+            Transaction.objects.filter(consumer=consumer).order_by('-pk').values_list('pk', flat=True)[:100]
+        )
+        for i in range(count):
+            yield consumer, {'transaction': transactions[i % len(transactions)], 'reason': 'Load test dispute'}
+
+    def reviews(self, fixture, count):
+        """One review of the busiest vendor from each user who has not reviewed them yet"""
+        vendor = fixture['vendor']
+        users = User.objects.exclude(pk=vendor.pk).exclude(reviews_given__reviewed=vendor)
+        for user in self.spare_users(users, count, 'review-create'):
+            yield user, {'reviewed': vendor.pk, 'rating': 1 + user.pk % 5, 'comment': 'Load test review'}
+
+    def kyc_submissions(self, fixture, count):
+        for user in self.spare_users(User.objects.filter(kyc__isnull=True), count, 'kyc-create'):
+            yield user, {
+                'gov_id_number': f'LOAD-{user.pk}', 'document_type': DocumentType.NATIONAL_ID,
+                'document_front_picture': f'https://documents.example.com/kyc/{user.pk}/front.jpg',
+                'permanent_address': 'Load test address',
+            }
+
+    def claims(self, fixture, count):
+        """Every active admin in turn, as when several work the queue at once; each claim takes one dispute"""
+        admins = list(User.objects.filter(is_staff=True, is_active=True).order_by('pk'))
+        open_disputes = dispute_queue(fixture['admin']).count()
+        if open_disputes < count:
+            raise CommandError(
+                f'Only {open_disputes} open disputes are left for admin-dispute-claim-next; '
+                'seed more disputes or lower --requests.'
+            )
+        for i in range(count):
+            yield admins[i % len(admins)], {}
+
+    def spare_users(self, users, count, name):
+        users = list(users.filter(is_active=True).order_by('pk')[:count])
+        if len(users) < count:
+            raise CommandError(f'Only {len(users)} users are left for {name}; seed more users or lower --requests.')
+        return users
+
+    def load(self, application, warm_up, requests, options):
+        # Warm up first, as a running server would be: open connections, fill caches
+        if options['server'] == 'asgi':
+            asyncio.run(asgi_request(application, *warm_up))
+            run = drive_asgi(application, requests, options['requests'], options['clients'])
+        else:
+            wsgi_request(application, *warm_up)
+            run = drive_wsgi(application, requests, options['requests'], options['clients'], options['threads'])
+        return summarize(*run)
+
+    def write_result(self, name, result, baseline):
+        line = (
+            f"{name:<32} {result['requests_per_second']:8.0f} requests/s  p50 {result['p50_ms']:7.1f}ms  "
+            f"p95 {result['p95_ms']:7.1f}ms  p99 {result['p99_ms']:7.1f}ms"
+        )
+        before = baseline['endpoints'].get(name) if baseline else None
+        if before:
+            line += f"  p95 {(result['p95_ms'] / before['p95_ms'] - 1) * 100:+.0f}%"
+        if result['errors']:
+            self.stdout.write(self.style.ERROR(f"{line}  {result['errors']} errors"))
+        else:
+            self.stdout.write(line)
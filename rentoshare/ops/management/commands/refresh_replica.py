@@ -0,0 +1,31 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from rentoshare.replica import refresh_replica
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary database to the read replica file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep refreshing every --interval seconds instead of exiting')
+        parser.add_argument('--interval', type=float, default=settings.REPLICA_REFRESH_INTERVAL,
+                            help='Seconds between refreshes when --loop is given')
+
+    def handle(self, *args, **options):
+        if options['interval'] <= 0:
+            raise CommandError('--interval must be positive.')
+
+        while True:
+            try:
+                seconds = refresh_replica()
+            except ImproperlyConfigured as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(f'Refreshed the replica in {seconds * 1000:.0f}ms')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,78 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from rentoshare.replica import refresh_replica
+from rentoshare.routers import replica_available
+from rentoshare.synthetic import SyntheticData
+
+# (option, what create_<option> makes, default count)
+COUNTS = (
+    ('users', 'users', 10_000),
+    ('listings', 'listings', 50_000),
+    ('transactions', 'transactions', 100_000),
+    ('disputes', 'disputes', 2_000),
+    ('reviews', 'reviews', 40_000),
+    ('donation_requests', 'donation requests', 20_000),
+    ('kycs', 'KYCs', 4_000),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-generate realistic users, listings, transactions, disputes, reviews, donation '
+        'requests and KYCs into the database, then rebuild the derived tables'
+    )
+
+    def add_arguments(self, parser):
+        for option, label, default in COUNTS:
+            parser.add_argument(f'--{option.replace("_", "-")}', type=int, default=default,
+                                help=f'Number of {label} to create')
+        parser.add_argument('--admins', type=int, default=5,
+                            help='Staff accounts created besides --users; they resolve disputes and review KYCs')
+        parser.add_argument('--days', type=int, default=730, help='Days of history the data spans')
+        parser.add_argument('--password', default='rentoshare', help='Password of every created account')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Number of rows inserted per transaction')
+
+    def handle(self, *args, **options):
+        if min(options[option] for option, _, _ in COUNTS) < 0 or options['admins'] < 0:
+            raise CommandError('Counts must not be negative.')
+        if options['batch_size'] <= 0 or options['days'] <= 0:
+            raise CommandError('--batch-size and --days must be positive.')
+
+        data = SyntheticData(
+            seed=options['seed'], days=options['days'], password=options['password'],
+            batch_size=options['batch_size'], stdout=self.stdout if options['verbosity'] > 1 else None,
+        )
+        started = time.perf_counter()
+        # DEBUG would keep thousands of multi-kilobyte INSERTs in connection.queries
+        with override_settings(DEBUG=False):
+            for option, label, _ in COUNTS:
+                step_started = time.perf_counter()
+                if option == 'users':
+                    made = data.create_users(options['users'], admins=options['admins'])
+                else:
+                    made = getattr(data, f'create_{option}')(options[option])
+                line = f'Created {made} {label} in {time.perf_counter() - step_started:.1f}s'
+                if made < options[option]:
+                    # Only rows generated in this run are drawn on, e.g. reviews need completed bookings
+                    self.stdout.write(self.style.WARNING(f'{line}, fewer than the {options[option]} asked for'))
+                else:
+                    self.stdout.write(line)
+
+            for table, count in data.rebuild_derived().items():
+                self.stdout.write(f'Rebuilt {count} {table}')
+        # Cached lists, stats and statuses predate the new rows, and no signal invalidated them
+        cache.clear()
+        if replica_available():
+            self.stdout.write(f'Refreshed the replica in {refresh_replica():.1f}s')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded the database in {time.perf_counter() - started:.0f}s. Accounts have emails '
+            f'@{data.domain} and the password "{options["password"]}"; '
+            f'{options["admins"]} of them are staff.'
+        ))
@@ -0,0 +1,297 @@
+import io
+import json
+import re
+import time
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from disputes.models import Dispute
+from kyc.models import KYC
+from listings.models import Listing
+from listings.search import FTS_TABLE, search_listings
+from rentoshare import routers
+from rentoshare.load_test import drive_wsgi, gets
+from rentoshare.metrics import registry, render_metrics
+from rentoshare.ops.management.commands.load_test import READ_SCENARIOS, Command as LoadTestCommand, bearer
+from rentoshare.pagination import KeysetCursorPagination, RankedCursorPagination
+from rentoshare.query_budget import ENDPOINTS
+from reviews.stats import find_mismatches
+from transactions.models import Transaction, UserTransactionStats
+
+
+def cursor(payload):
+    return urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+class PaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        vendor = User.objects.create_user(email='vendor@example.com', password=None, full_name='Vendor', phone='0')
+        listings = [
+            Listing.objects.create(user=vendor, title=f'Listing {i}', description='-', listing_type='product')
+            for i in range(7)
+        ]
+        # Five listings share one timestamp, so pages must break ties on the id
+        now = timezone.now()
+        for i, listing in enumerate(listings):
+            Listing.objects.filter(pk=listing.pk).update(created_at=now - timedelta(minutes=max(i - 4, 0)))
+        cls.newest_first = list(Listing.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def page(self, paginator, url):
+        request = Request(self.factory.get(url))
+        rows = paginator.paginate_queryset(Listing.objects.all(), request)
+        return [listing.pk for listing in rows], paginator.get_next_link(), paginator.get_previous_link()
+
+    def test_pages_forwards_and_back_without_gaps_or_repeats(self):
+        pages, url = [], '/listings/?page_size=2'
+        while url:
+            rows, url, previous_url = self.page(KeysetCursorPagination(), url)
+            pages.append(rows)
+        self.assertEqual([pk for rows in pages for pk in rows], self.newest_first)
+
+        url = previous_url
+        for expected in reversed(pages[:-1]):
+            rows, _, url = self.page(KeysetCursorPagination(), url)
+            self.assertEqual(rows, expected)
+        self.assertIsNone(url)
+
+    def test_malformed_cursors_are_not_found(self):
+        for value in ('garbage', cursor({}), cursor({'p': ['yesterday', 1]}), cursor({'p': ['2024-01-01T00:00:00']})):
+            with self.subTest(cursor=value), self.assertRaises(NotFound):
+                self.page(KeysetCursorPagination(), f'/listings/?cursor={value}')
+
+    @override_settings(PAGINATION_MAX_PAGE_SIZE=3)
+    def test_page_size_is_capped(self):
+        self.assertEqual(len(self.page(KeysetCursorPagination(), '/listings/?page_size=50')[0]), 3)
+        for page_size in ('0', '-1', 'many'):
+            with self.subTest(page_size=page_size):
+                self.assertEqual(len(self.page(KeysetCursorPagination(), f'/listings/?page_size={page_size}')[0]), 7)
+
+    def test_ranked_pages_carry_an_offset(self):
+        ranked = list(Listing.objects.order_by('created_at', 'id').values_list('pk', flat=True))
+        rows, next_url, previous_url = self.page(RankedCursorPagination('created_at'), '/listings/?page_size=3')
+        self.assertEqual((rows, previous_url), (ranked[:3], None))
+        rows, next_url, previous_url = self.page(RankedCursorPagination('created_at'), next_url)
+        self.assertEqual(rows, ranked[3:6])
+        self.assertEqual(self.page(RankedCursorPagination('created_at'), previous_url)[0], ranked[:3])
+        rows, next_url, _ = self.page(RankedCursorPagination('created_at'), next_url)
+        self.assertEqual((rows, next_url), (ranked[6:], None))
+        for value in ('garbage', cursor({'o': -3})):
+            with self.subTest(cursor=value), self.assertRaises(NotFound):
+                self.page(RankedCursorPagination('created_at'), f'/listings/?cursor={value}')
+
+
+@override_settings(REPLICA_MAX_LAG=30)
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def routed(self, request, copied_ago):
+        copied_at = None if copied_ago is None else time.time() - copied_ago
+        with mock.patch('rentoshare.routers.replica_copied_at', return_value=copied_at):
+            return routers.use_replica(request)
+
+    def test_tests_never_read_from_the_mirror(self):
+        self.assertIsNone(routers.replica_copied_at())
+
+    def test_reads_use_a_fresh_replica(self):
+        self.assertTrue(self.routed(self.factory.get('/'), copied_ago=5))
+        self.assertFalse(self.routed(self.factory.post('/'), copied_ago=5))
+
+    def test_stale_or_missing_replicas_are_skipped(self):
+        self.assertFalse(self.routed(self.factory.get('/'), copied_ago=31))
+        self.assertFalse(self.routed(self.factory.get('/'), copied_ago=None))
+
+    def test_clients_read_their_writes_until_the_replica_has_them(self):
+        request = self.factory.get('/')
+        request.COOKIES[routers.LAST_WRITE_COOKIE] = f'{time.time() - 2}'
+        self.assertFalse(self.routed(request, copied_ago=5))
+        self.assertTrue(self.routed(request, copied_ago=1))
+        request.COOKIES[routers.LAST_WRITE_COOKIE] = 'garbage'
+        self.assertTrue(self.routed(request, copied_ago=5))
+
+    def test_writes_set_the_cookie(self):
+        middleware = routers.ReplicaRoutingMiddleware(lambda request: HttpResponse())
+        self.assertNotIn(routers.LAST_WRITE_COOKIE, middleware(self.factory.get('/')).cookies)
+        before = time.time()
+        cookie = middleware(self.factory.post('/')).cookies[routers.LAST_WRITE_COOKIE]
+        self.assertGreaterEqual(float(cookie.value), before - 0.001)
+        self.assertEqual(cookie['max-age'], 30)
+
+    def test_token_clients_read_their_writes_without_cookies(self):
+        cache.clear()
+        middleware = routers.ReplicaRoutingMiddleware(lambda request: HttpResponse())
+        writer, other = (
+            {'Authorization': f'Bearer {AccessToken.for_user(User(pk=pk))}'} for pk in (1, 2)
+        )
+        response = middleware(self.factory.post('/', headers=writer))
+        # The write is remembered for the user, not for whatever cookie jar sent it
+        self.assertNotIn(routers.LAST_WRITE_COOKIE, response.cookies)
+
+        self.assertFalse(self.routed(self.factory.get('/', headers=writer), copied_ago=5))
+        self.assertTrue(self.routed(self.factory.get('/', headers=other), copied_ago=5))
+        self.assertTrue(self.routed(self.factory.get('/'), copied_ago=5))
+        # Invalid tokens are anonymous
+        self.assertTrue(self.routed(self.factory.get('/', headers={'Authorization': 'Bearer garbage'}), copied_ago=5))
+
+
+# Real database threads: the async views query on connections of their own
+@override_settings(ROOT_URLCONF='rentoshare.urls_async')
+class AsyncReadAuthenticationTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='user@example.com', password=None, full_name='User', phone='0')
+        self.url = f'/api/reviews/user/{self.user.pk}/stats/'
+
+    async def get(self, **headers):
+        return await self.async_client.get(self.url, headers=headers)
+
+    async def test_tokens_of_inactive_users_are_rejected(self):
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        self.assertEqual((await self.get()).status_code, 200)
+        self.assertEqual((await self.get(**headers)).status_code, 200)
+
+        self.user.is_active = False
+        await self.user.asave(update_fields=['is_active'])
+        response = await self.get(**headers)
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('Bearer', response['WWW-Authenticate'])
+        self.assertEqual((await self.get(Authorization='Bearer garbage')).status_code, 401)
+
+    async def test_bad_tokens_are_reported_before_missing_rows(self):
+        url = '/api/listings/api/listings/999999/'
+        response = await self.async_client.get(url, headers={'Authorization': 'Bearer garbage'})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual((await self.async_client.get(url)).status_code, 404)
+
+
+class MetricsTests(TestCase):
+    list_url = '/api/listings/api/listings/'
+    export_url = '/api/disputes/admin/list/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = User.objects.create_user(
+            email='vendor@example.com', password=None, full_name='Vendor', phone='0'
+        )
+        cls.admin = User.objects.create_user(
+            email='admin@example.com', password=None, full_name='Admin', phone='0', is_staff=True
+        )
+        listing = Listing.objects.create(user=cls.vendor, title='Tent', description='-', listing_type='product')
+        booking = Transaction.objects.create(
+            listing=listing, vendor=cls.vendor, consumer=cls.admin,
+            start_date=timezone.now(), end_date=timezone.now(), total_price=10
+        )
+        Dispute.objects.create(transaction=booking, raised_by=cls.admin, reason='Torn')
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.client = APIClient()
+
+    def sample(self, metric, url, status=None):
+        labels = f'endpoint="{resolve(url).view_name}",method="GET"'
+        if status is not None:
+            labels += f',status="{status}"'
+        match = re.search(rf'^rentoshare_{metric}{{{labels}}} (\S+)$', render_metrics(), re.MULTILINE)
+        return match and float(match.group(1))
+
+    def test_requests_are_recorded_per_endpoint(self):
+        self.client.get(self.list_url)
+        self.client.get(self.list_url)
+        self.assertEqual(self.sample('http_request_duration_seconds_count', self.list_url), 2)
+        self.assertEqual(self.sample('http_responses_total', self.list_url, status=200), 2)
+        # The second response came from the cache
+        self.assertEqual(self.sample('http_request_queries_count', self.list_url), 2)
+        self.assertGreaterEqual(self.sample('http_request_queries_sum', self.list_url), 1)
+        self.assertGreater(self.sample('http_response_size_bytes_sum', self.list_url), 0)
+
+    def test_responses_carry_server_timing(self):
+        response = self.client.get(self.list_url)
+        self.assertRegex(response['Server-Timing'], r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="queries: [1-9]\d*"$')
+
+    def test_streaming_responses_leave_out_queries_they_have_not_run(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(self.export_url, {'format': 'csv'})
+        self.assertTrue(response.streaming)
+        self.assertRegex(response['Server-Timing'], r'^app;dur=[\d.]+$')
+        b''.join(response.streaming_content)
+        self.assertEqual(self.sample('http_request_duration_seconds_count', self.export_url), 1)
+        self.assertEqual(self.sample('http_request_queries_count', self.export_url), 0)
+        self.assertEqual(self.sample('http_request_db_seconds_count', self.export_url), 0)
+
+    def test_only_staff_read_metrics(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.client.force_authenticate(self.vendor)
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.client.force_authenticate(self.admin)
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn('# TYPE rentoshare_http_request_duration_seconds histogram', response.content.decode())
+
+
+# The load driver's server threads open connections of their own, so rows must be committed
+class SyntheticDataTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        call_command(
+            'seed_synthetic_data', users=200, admins=2, listings=300, transactions=800, disputes=40,
+            reviews=150, donation_requests=60, kycs=40, seed=1, stdout=io.StringIO(),
+        )
+
+    def test_seeds_the_asked_for_rows_and_rebuilds_derived_tables(self):
+        self.assertEqual(User.objects.count(), 202)
+        self.assertEqual(User.objects.filter(is_staff=True).count(), 2)
+        self.assertEqual(Listing.objects.count(), 300)
+        self.assertEqual(KYC.objects.count(), 40)
+        for model, asked_for in ((Transaction, 800), (Dispute, 40)):
+            # Fewer when the generated rows leave too little to draw on, never none
+            self.assertTrue(0 < model.objects.count() <= asked_for, model)
+
+        # bulk_create skipped the signals, so these only exist because they were rebuilt
+        traders = set(Transaction.objects.values_list('vendor', flat=True)) | set(
+            Transaction.objects.values_list('consumer', flat=True)
+        )
+        self.assertEqual(set(UserTransactionStats.objects.values_list('user', flat=True)), traders)
+        stats = UserTransactionStats.objects.order_by('-consumer_total').first()
+        self.assertEqual(stats.consumer_total, Transaction.objects.filter(consumer=stats.user_id).count())
+        self.assertEqual(find_mismatches(), {})
+        self.assertFalse(Dispute.objects.filter(participants__isnull=True).exists())
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {FTS_TABLE}')
+            self.assertEqual(cursor.fetchone()[0], 300)
+        item = Listing.objects.order_by('pk').first().title.split()[-1]
+        self.assertTrue(search_listings(Listing.objects.all(), item).exists())
+
+    def test_load_test_reads_answer_on_seeded_data(self):
+        # Imported here: building the handler loads the middleware
+        from rentoshare.wsgi import application
+
+        fixture = LoadTestCommand().pick_fixture()
+        reads = [(endpoint.user, endpoint.resolve_path(fixture)) for endpoint in ENDPOINTS] + [
+            (user, path(fixture)) for user, path in READ_SCENARIOS.values()
+        ]
+        for user, path in reads:
+            with self.subTest(path=path):
+                items = gets([path], bearer(fixture[user]) if user else None)
+                latencies, errors, _ = drive_wsgi(application, items, requests=4, clients=2, threads=2)
+                self.assertEqual((len(latencies), errors), (4, 0))
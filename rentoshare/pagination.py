@@ -0,0 +1,219 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from .async_db import db
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Keyset pagination over (timestamp, id), newest first.
+
+    Each page is fetched with a `WHERE (ts, id) < (cursor)` range condition
+    instead of an OFFSET, so page 500 costs the same as page 1 as long as an
+    index on (..., ts, id) backs the queryset. Cursors are opaque base64
+    tokens and the page size can be set per request up to `max_page_size`.
+    """
+    ordering_field = 'created_at'
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.page_size = api_settings.PAGE_SIZE or 20
+        self.max_page_size = getattr(settings, 'PAGINATION_MAX_PAGE_SIZE', 100)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset for async views, fetching the page on a database thread"""
+        return self.set_page(await db(list, self.page_queryset(queryset, request)))
+
+    def page_queryset(self, queryset, request):
+        """The rows of the requested page, plus one extra row if there is another page"""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.position, self.reverse = self.decode_cursor(request)
+
+        field = self.ordering_field
+        position = self.position
+        if self.reverse:
+            queryset = queryset.order_by(field, 'id')
+            if position is not None:
+                queryset = queryset.filter(
+                    Q(**{f'{field}__gt': position[0]}) |
+                    Q(**{field: position[0], 'id__gt': position[1]})
+                )
+        else:
+            queryset = queryset.order_by(f'-{field}', '-id')
+            if position is not None:
+                queryset = queryset.filter(
+                    Q(**{f'{field}__lt': position[0]}) |
+                    Q(**{field: position[0], 'id__lt': position[1]})
+                )
+
+        # Fetch one extra row to find out whether there is another page
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_next = self.position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.position is not None
+
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            value = self.parse_position_value(payload['p'][0])
+            pk = int(payload['p'][1])
+            reverse = bool(payload.get('r', False))
+        except (TypeError, ValueError, KeyError, IndexError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if value is None:
+            raise NotFound(self.invalid_cursor_message)
+        return (value, pk), reverse
+
+    def parse_position_value(self, value):
+        return parse_datetime(value)
+
+    def format_position_value(self, value):
+        return value.isoformat()
+
+    def encode_cursor(self, instance, reverse):
+        payload = {
+            'p': [self.format_position_value(getattr(instance, self.ordering_field)), instance.pk],
+            'r': int(reverse),
+        }
+        encoded = urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class SubmittedAtCursorPagination(KeysetCursorPagination):
+    """Keyset pagination for models stamped with `submitted_at` (KYC)."""
+    ordering_field = 'submitted_at'
+
+
+class PriorityCursorPagination(KeysetCursorPagination):
+    """Keyset pagination over a numeric `priority` score, highest first (dispute queue)."""
+    ordering_field = 'priority'
+
+    def parse_position_value(self, value):
+        return float(value)
+
+    def format_position_value(self, value):
+        return value
+
+
+class RankedCursorPagination(KeysetCursorPagination):
+    """
+    Pagination for relevance-ranked results (e.g. full-text search).
+
+    Results are ordered by `rank_field` (lower is better) and the opaque
+    cursor carries an offset, since relevance scores are not a stable key.
+    """
+    rank_field = 'search_rank'
+
+    def __init__(self, rank_field=None):
+        super().__init__()
+        if rank_field is not None:
+            self.rank_field = rank_field
+
+    def page_queryset(self, queryset, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.offset = self.decode_offset(request)
+
+        queryset = queryset.order_by(self.rank_field, 'id')
+        return queryset[self.offset:self.offset + self.page_size + 1]
+
+    def set_page(self, results):
+        self.has_next = len(results) > self.page_size
+        self.has_previous = self.offset > 0
+        self.page = results[:self.page_size]
+        return self.page
+
+    def decode_offset(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return 0
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            offset = int(payload['o'])
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if offset < 0:
+            raise NotFound(self.invalid_cursor_message)
+        return offset
+
+    def encode_offset(self, offset):
+        encoded = urlsafe_b64encode(json.dumps({'o': offset}).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_offset(self.offset + self.page_size)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_offset(max(self.offset - self.page_size, 0))
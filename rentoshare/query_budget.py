@@ -0,0 +1,268 @@
+"""
+Query budget harness.
+
+Renders endpoints at several table sizes and records how many SQL queries
+each request ran. An endpoint passes when its query count is the same at
+every size (no N+1 on relations) and stays within its fixed budget.
+Endpoints marked `seek_only` must also have no full table or index SCAN in
+the EXPLAIN QUERY PLAN of any query they run. Requests authenticate with a
+real bearer token. Budgets leave out the user lookup, which the per-process
+user cache saves; where that cache is off (see
+accounts.authentication.user_cache_enabled) it counts on top.
+
+Each app's tests.py checks its own ENDPOINTS with a QueryBudgetTestCase.
+"""
+from contextlib import ExitStack
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.authentication import user_cache_enabled
+from accounts.models import User
+from disputes.models import Dispute
+from disputes.participants import rebuild_participants
+from donations.models import DonationRequest
+from kyc.models import KYC
+from listings.models import Listing
+from reviews.models import Review
+from transactions.models import Transaction
+
+ROW_COUNTS = (1, 10, 1000)
+
+
+class EndpointBudget:
+    """
+    One endpoint under budget.
+
+    `path` may be a string or a callable taking the seed fixture, and
+    `user` names the fixture entry to authenticate as (None for anonymous).
+    """
+
+    def __init__(self, name, path, budget, user=None, seek_only=False):
+        self.name = name
+        self.path = path
+        self.budget = budget
+        self.user = user
+        self.seek_only = seek_only
+
+    def resolve_path(self, fixture):
+        return self.path(fixture) if callable(self.path) else self.path
+
+    def expected_queries(self):
+        """The budget plus the user lookup, when authenticated users are not cached"""
+        return self.budget + (1 if self.user and not user_cache_enabled() else 0)
+
+
+PAGE = '?page_size=100'
+
+ENDPOINTS = [
+    EndpointBudget('listing-list', '/api/listings/api/listings/' + PAGE, 1),
+    EndpointBudget('listing-detail', lambda f: f"/api/listings/api/listings/{f['listing'].pk}/", 1),
+    EndpointBudget('listing-mine', '/api/listings/api/listings/my_listings/' + PAGE, 1, user='vendor'),
+    EndpointBudget('transaction-list', '/api/transactions/' + PAGE, 1, user='consumer', seek_only=True),
+    EndpointBudget('transaction-detail', lambda f: f"/api/transactions/{f['transaction'].pk}/", 1, user='consumer', seek_only=True),
+    EndpointBudget('transaction-stats', '/api/transactions/stats/', 1, user='vendor'),
+    EndpointBudget('admin-transaction-list', '/api/transactions/admin/list/' + PAGE, 1, user='admin'),
+    EndpointBudget('dispute-list', '/api/disputes/' + PAGE, 1, user='consumer', seek_only=True),
+    EndpointBudget('dispute-detail', lambda f: f"/api/disputes/{f['dispute'].pk}/", 1, user='consumer', seek_only=True),
+    EndpointBudget('admin-dispute-list', '/api/disputes/admin/list/' + PAGE, 1, user='admin'),
+    EndpointBudget('dispute-stats', '/api/disputes/stats/', 2, user='consumer', seek_only=True),
+    EndpointBudget('admin-dispute-queue', '/api/disputes/admin/queue/' + PAGE, 1, user='admin', seek_only=True),
+    EndpointBudget('admin-dispute-detail', lambda f: f"/api/disputes/admin/{f['dispute'].pk}/", 1, user='admin'),
+    EndpointBudget('donation-request-list', '/api/donations/' + PAGE, 1, user='consumer'),
+    EndpointBudget('donation-request-detail', lambda f: f"/api/donations/{f['donation_request'].pk}/", 1, user='vendor', seek_only=True),
+    EndpointBudget('received-donation-requests', '/api/donations/received/' + PAGE, 1, user='vendor'),
+    EndpointBudget('donation-stats', '/api/donations/stats/', 2, user='vendor'),
+    EndpointBudget('listing-donation-requests', lambda f: f"/api/donations/listing/{f['listing'].pk}/", 1),
+    EndpointBudget('review-list', '/api/reviews/' + PAGE, 1, user='consumer'),
+    EndpointBudget('my-reviews-received', '/api/reviews/received/' + PAGE, 1, user='vendor'),
+    EndpointBudget('user-reviews', lambda f: f"/api/reviews/user/{f['vendor'].pk}/" + PAGE, 1),
+    EndpointBudget('user-rating-stats', lambda f: f"/api/reviews/user/{f['vendor'].pk}/stats/", 1),
+    EndpointBudget('admin-kyc-list', '/api/kyc/admin/list/' + PAGE, 1, user='admin'),
+    EndpointBudget('kyc-public-status', lambda f: f"/api/kyc/public/{f['reviewers'][0].pk}/", 1),
+    EndpointBudget('user-badges', lambda f: '/api/accounts/badges/?ids=' + ','.join(
+        str(user.pk) for user in f['reviewers'][:100]), 2),
+]
+
+
+class Seeder:
+    """Grows one shared data set so every endpoint above has `rows` rows to render"""
+
+    def __init__(self):
+        self.rows = 0
+        self.fixture = {
+            'vendor': self.make_users('vendor', 1, role='vendor')[0],
+            'consumer': self.make_users('consumer', 1)[0],
+            'admin': self.make_users('admin', 1, is_staff=True, is_superuser=True)[0],
+            'reviewers': [],
+        }
+
+    def make_users(self, prefix, count, **extra):
+        start = User.objects.count()
+        users = [
+            User(email=f'{prefix}-{start + i}@budget.test', full_name=f'{prefix} {i}',
+                 phone='0', password='!', **extra)
+            for i in range(count)
+        ]
+        return User.objects.bulk_create(users)
+
+    def __call__(self, rows):
+        missing = rows - self.rows
+        if missing <= 0:
+            return self.fixture
+        vendor = self.fixture['vendor']
+        consumer = self.fixture['consumer']
+        admin = self.fixture['admin']
+        now = timezone.now()
+
+        listings = Listing.objects.bulk_create([
+            Listing(user=vendor, title=f'Listing {self.rows + i}', description='Budget listing',
+                    listing_type='donation', price_per_day=10)
+            for i in range(missing)
+        ])
+        transactions = Transaction.objects.bulk_create([
+            Transaction(listing=listing, vendor=vendor, consumer=consumer,
+                        start_date=now, end_date=now + timedelta(days=1), total_price=10)
+            for listing in listings
+        ])
+        disputes = Dispute.objects.bulk_create([
+            Dispute(transaction=transaction, raised_by=consumer, reason='Budget dispute',
+                    resolved_by=admin)
+            for transaction in transactions
+        ])
+        rebuild_participants()
+        donation_requests = DonationRequest.objects.bulk_create([
+            DonationRequest(listing=listing, user=consumer, status='accepted')
+            for listing in listings
+        ])
+        # The first listing also needs `rows` accepted requests for its public view
+        requesters = self.make_users('requester', missing)
+        DonationRequest.objects.bulk_create([
+            DonationRequest(listing=listings[0] if self.rows == 0 else self.fixture['listing'],
+                            user=user, status='accepted')
+            for user in requesters
+        ])
+        reviewers = self.make_users('reviewer', missing)
+        Review.objects.bulk_create(
+            [Review(reviewer=user, reviewed=vendor, rating=4) for user in reviewers] +
+            [Review(reviewer=consumer, reviewed=user, rating=4) for user in reviewers]
+        )
+        KYC.objects.bulk_create([
+            KYC(user=user, gov_id_number=f'BUDGET-{user.pk}', document_type='national_id',
+                document_front_picture='front.jpg', permanent_address='Budget street',
+                verified_by=admin)
+            for user in reviewers
+        ])
+
+        self.fixture.setdefault('listing', listings[0])
+        self.fixture.setdefault('transaction', transactions[0])
+        self.fixture.setdefault('dispute', disputes[0])
+        self.fixture.setdefault('donation_request', donation_requests[0])
+        self.fixture['reviewers'] += reviewers
+        self.rows = rows
+        return self.fixture
+
+
+def endpoints_named(*names):
+    by_name = {endpoint.name: endpoint for endpoint in ENDPOINTS}
+    return [by_name[name] for name in names]
+
+
+def full_scans(sql):
+    """Steps of the SQLite query plan for `sql` that walk a whole table or index"""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall() if row[-1].startswith('SCAN ')]
+
+
+def warm_authentication(headers):
+    """Authenticate once outside the measurement, as any returning client already has"""
+    request = RequestFactory().get('/', headers=headers)
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        authentication_class().authenticate(request)
+
+
+def budget_client(user=None):
+    """An API client for measuring one request, authenticated as `user` if given"""
+    # Measure the uncached path; cached responses would hide regressions
+    cache.clear()
+    client = APIClient()
+    if user is not None:
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+        client.credentials(HTTP_AUTHORIZATION=headers['Authorization'])
+        warm_authentication(headers)
+    return client
+
+
+def capture_queries(path, user=None):
+    """GET `path` and return (status_code, SQL of every query run)"""
+    client = budget_client(user)
+    # Reads may be routed to the replica, so count the queries of every database
+    with ExitStack() as stack:
+        contexts = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+        response = client.get(path)
+    return response.status_code, [query['sql'] for context in contexts for query in context.captured_queries]
+
+
+def check_query_budgets(endpoints, seed, row_counts=ROW_COUNTS):
+    """
+    Measure every endpoint after seeding each row count in turn.
+
+    `seed(n)` must grow the data so each endpoint has at least `n` rows to
+    render, and return the fixture the endpoint paths and users refer to.
+    Returns one result dict per endpoint with the per-size query counts
+    and, for `seek_only` endpoints, the full scans found in their plans.
+    """
+    results = {
+        endpoint.name: {'endpoint': endpoint, 'counts': {}, 'statuses': {}, 'scans': set()}
+        for endpoint in endpoints
+    }
+    for rows in row_counts:
+        fixture = seed(rows)
+        for endpoint in endpoints:
+            user = fixture[endpoint.user] if endpoint.user else None
+            status_code, queries = capture_queries(endpoint.resolve_path(fixture), user)
+            results[endpoint.name]['counts'][rows] = len(queries)
+            results[endpoint.name]['statuses'][rows] = status_code
+            if endpoint.seek_only:
+                for sql in queries:
+                    results[endpoint.name]['scans'].update(full_scans(sql))
+
+    for result in results.values():
+        counts = set(result['counts'].values())
+        result['ok'] = (
+            len(counts) == 1 and
+            max(counts) <= result['endpoint'].expected_queries() and
+            not result['scans'] and
+            all(status_code == 200 for status_code in result['statuses'].values())
+        )
+    return list(results.values())
+
+
+class QueryBudgetTestCase(TestCase):
+    """
+    Checks that each of `endpoints` runs exactly its budget of queries at every
+    size in ROW_COUNTS, and that `seek_only` ones never scan a table.
+    """
+    endpoints = ()
+
+    def test_query_budgets(self):
+        seed = Seeder()
+        for rows in ROW_COUNTS:
+            fixture = seed(rows)
+            for endpoint in self.endpoints:
+                with self.subTest(endpoint=endpoint.name, rows=rows):
+                    client = budget_client(fixture[endpoint.user] if endpoint.user else None)
+                    with self.assertNumQueries(endpoint.expected_queries()) as context:
+                        response = client.get(endpoint.resolve_path(fixture))
+                    self.assertEqual(response.status_code, 200)
+                    if endpoint.seek_only:
+                        scans = [scan for query in context.captured_queries for scan in full_scans(query['sql'])]
+                        self.assertEqual(scans, [])
@@ -0,0 +1,42 @@
+import os
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS
+
+from .routers import REPLICA_DB_ALIAS, replica_stamp_path
+
+
+def refresh_replica():
+    """
+    Copy the primary SQLite database over the replica file; returns seconds taken.
+
+    The online backup API reads one consistent snapshot of the primary while
+    writers carry on, and writes the replica in place: the copy keeps the
+    primary's WAL mode, so replica connections that are already open keep
+    reading and see the new data from their next transaction on. The copy
+    time is then stamped on a file next to the replica, for the router.
+    """
+    if REPLICA_DB_ALIAS not in settings.DATABASES:
+        raise ImproperlyConfigured(f"No '{REPLICA_DB_ALIAS}' database is configured.")
+    primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+    replica = settings.DATABASES[REPLICA_DB_ALIAS]
+    timeout = primary.get('OPTIONS', {}).get('timeout', 5)
+
+    started = time.perf_counter()
+    copied_at = time.time()
+    source = sqlite3.connect(primary['NAME'], timeout=timeout)
+    target = sqlite3.connect(replica['NAME'], timeout=timeout)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    stamp = replica_stamp_path(replica['NAME'])
+    with open(stamp, 'a'):
+        pass
+    # The snapshot is as of when the backup started
+    os.utime(stamp, (copied_at, copied_at))
+    return time.perf_counter() - started
@@ -0,0 +1,197 @@
+"""
+Read/write splitting between the primary database and a read-only replica.
+
+ReplicaRoutingMiddleware decides per request where reads go: GET, HEAD and
+OPTIONS requests read from the replica when its copy of the primary is
+newer than the client's last write and at most REPLICA_MAX_LAG seconds
+old. Every other request records the time it wrote, so clients read their
+own writes on whichever process serves them next: per user id in the
+shared cache for bearer-token clients (which often keep no cookies), and
+in a cookie for anonymous ones. Outside requests (commands, shells, the
+sweeper) everything uses the primary.
+
+Code that fills a shared cache from the database reads inside
+`primary_reads()`: a stale replica row cached for minutes would outlive
+the replica lag by far.
+"""
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+REPLICA_DB_ALIAS = 'replica'
+
+# Set on responses to anonymous writes: when the client last wrote (Unix time)
+LAST_WRITE_COOKIE = 'primary_write'
+
+_read_alias = contextvars.ContextVar('read_alias', default=DEFAULT_DB_ALIAS)
+# Set once the current request writes; its later reads must see that write
+_wrote = contextvars.ContextVar('wrote', default=False)
+
+
+def replica_stamp_path(name):
+    """File whose modification time is when the replica at `name` was copied (see rentoshare.replica)"""
+    return f'{name}-copied'
+
+
+def replica_copied_at():
+    """When the replica's data was copied from the primary (Unix time), or None if reads cannot go there"""
+    if REPLICA_DB_ALIAS not in connections.settings:
+        return None
+    name = connections[REPLICA_DB_ALIAS].settings_dict['NAME']
+    # Test databases mirror the primary, and the test case only opens the primary
+    if name == connections[DEFAULT_DB_ALIAS].settings_dict['NAME']:
+        return None
+    try:
+        return os.stat(replica_stamp_path(name)).st_mtime
+    except OSError:
+        # Not refreshed yet
+        return None
+
+
+def replica_available():
+    return replica_copied_at() is not None
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside this block, whatever the request is routed to"""
+    token = _read_alias.set(DEFAULT_DB_ALIAS)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def _last_write_key(user_id):
+    return f'routers:user:{user_id}:last_write'
+
+
+def token_user_id(request):
+    """
+    The user id of the request's bearer token, or None without a valid one.
+
+    DRF authenticates inside the view, after routing is decided, so this
+    checks the token's signature itself; it needs no query.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = header and authentication.get_raw_token(header)
+    if not raw_token:
+        return None
+    try:
+        return authentication.get_validated_token(raw_token).get(api_settings.USER_ID_CLAIM)
+    except (InvalidToken, TokenError):
+        return None
+
+
+def last_write(request):
+    """When the client behind `request` last wrote (Unix time), 0 if not recently"""
+    user_id = token_user_id(request)
+    if user_id is not None:
+        return cache.get(_last_write_key(user_id), 0)
+    try:
+        return float(request.COOKIES.get(LAST_WRITE_COOKIE, 0))
+    except ValueError:
+        return 0
+
+
+def use_replica(request):
+    """Whether `request` can read from the replica and still see everything it needs to"""
+    if request.method not in SAFE_METHODS:
+        return False
+    copied_at = replica_copied_at()
+    # Too stale (say refresh_replica stopped), or older than the client's own last write
+    return (
+        copied_at is not None and
+        time.time() - copied_at <= settings.REPLICA_MAX_LAG and
+        copied_at > last_write(request)
+    )
+
+
+class ReplicaRoutingMiddleware:
+    # Async-capable, so ASGI requests to async views never detour through a thread
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        tokens = self.route(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.reset(tokens)
+        self.remember_write(request, response)
+        return response
+
+    async def __acall__(self, request):
+        tokens = self.route(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.reset(tokens)
+        self.remember_write(request, response)
+        return response
+
+    def route(self, request):
+        return (
+            _read_alias.set(REPLICA_DB_ALIAS if use_replica(request) else DEFAULT_DB_ALIAS),
+            _wrote.set(False),
+        )
+
+    def reset(self, tokens):
+        alias_token, wrote_token = tokens
+        _read_alias.reset(alias_token)
+        _wrote.reset(wrote_token)
+
+    def remember_write(self, request, response):
+        # Taken after the write committed; only ever sends the client to the primary, so it needs no signature
+        if request.method in SAFE_METHODS:
+            return
+        user_id = token_user_id(request)
+        if user_id is not None:
+            cache.set(_last_write_key(user_id), time.time(), timeout=settings.REPLICA_MAX_LAG)
+        else:
+            response.set_cookie(
+                LAST_WRITE_COOKIE, f'{time.time():.3f}', max_age=settings.REPLICA_MAX_LAG,
+                httponly=True, samesite='Lax',
+            )
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # Users stay on the primary so a just-registered account can sign in at once;
+        # authentication caches them per process anyway (accounts.authentication)
+        if model is get_user_model() or _wrote.get():
+            return DEFAULT_DB_ALIAS
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        # The rest of this request reads what it just wrote
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica is a copy of the primary, so objects from either may be related
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -50,6 +50,7 @@ INSTALLED_APPS = [
     'reviews',
     'disputes',
     'donations',
+    'rentoshare.ops',
 ]
 
 
@@ -74,24 +75,32 @@ DJOSER = {
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
-    ]
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'rentoshare.pagination.KeysetCursorPagination',
+    'PAGE_SIZE': 20,
 }
 
+# Upper bound for the `page_size` query parameter on list endpoints
+PAGINATION_MAX_PAGE_SIZE = 100
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
 }
 
 MIDDLEWARE = [
+    # First, so its timings cover every other middleware (see rentoshare.metrics)
+    'rentoshare.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'rentoshare.routers.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -121,11 +130,92 @@ WSGI_APPLICATION = 'rentoshare.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # SQLite in WAL mode with server pragmas (see rentoshare.db.base)
+        'ENGINE': 'rentoshare.db',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Keep each thread's connection (and its pragmas and page cache) across requests
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Blocks that must hold the write lock from the start use
+            # rentoshare.db.locking.write_atomic (bookings, donations, ...)
+            'timeout': 20,
+        },
+        # On disk rather than in memory, so concurrency tests run with WAL and
+        # the busy timeout as in production
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+    },
+    # Read-only copy of the primary, refreshed by `manage.py refresh_replica --loop`
+    # (see rentoshare.routers for which reads go here)
+    'replica': {
+        'ENGINE': 'rentoshare.db',
+        'NAME': BASE_DIR / 'db.replica.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,
+            'pragmas': {'query_only': 'ON'},
+        },
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+DATABASE_ROUTERS = ['rentoshare.routers.PrimaryReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Listing versions live here, so deployments with several worker processes
+# need a shared backend (file-based, Redis, ...) instead of locmem.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'rentoshare',
     }
 }
 
+# Seconds a rendered listing response stays cached (it is also invalidated on every change)
+LISTING_CACHE_TIMEOUT = 300
+
+# Seconds a user's dispute and donation stats stay cached between status changes
+USER_STATS_CACHE_TIMEOUT = 60
+
+# Seconds the public KYC status of a user stays cached (it is also refreshed on every change),
+# and the shorter time a "no KYC" answer is remembered
+KYC_PUBLIC_CACHE_TIMEOUT = 300
+KYC_PUBLIC_NOT_FOUND_CACHE_TIMEOUT = 60
+
+# KYC duplicate detection: local directory document paths are resolved against,
+# processes hashing images, and most differing hash bits (0-3) still flagged as a duplicate
+KYC_DOCUMENT_ROOT = BASE_DIR / 'media'
+KYC_HASH_WORKERS = 2
+KYC_DUPLICATE_MAX_DISTANCE = 3
+
+# Authenticated users kept per process (0 disables the cache), and the most seconds
+# one is reused; saving a user retires their cached copy immediately. Only used
+# with a cache backend shared by all processes, so with the LocMemCache above
+# the user cache is off and every request loads its user
+AUTH_USER_CACHE_SIZE = 10000
+AUTH_USER_CACHE_TIMEOUT = 300
+
+# Seconds between replica refreshes, and the oldest copy reads may still be
+# served from; past it (say the refresh loop stopped) reads use the primary
+REPLICA_REFRESH_INTERVAL = 5
+REPLICA_MAX_LAG = 30
+
+# Threads that run the queries of async views under ASGI, each keeping its own connections
+ASYNC_DB_THREADS = 16
+
+# Seconds an admin's claim on a dispute lasts before others may take it over
+DISPUTE_CLAIM_TIMEOUT = 30 * 60
+
+# Donation allocation: most donations one user may be allocated within the window
+DONATION_ALLOCATION_USER_CAP = 3
+DONATION_ALLOCATION_CAP_WINDOW_DAYS = 30
+# Waiting queue entries one user may hold for one listing
+DONATION_QUEUE_ENTRY_LIMIT = 3
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -0,0 +1,51 @@
+"""
+Change detection for rows that derived data is kept in sync with.
+
+A model lists in `snapshot_fields` the fields some derived data depends
+on: the stats counters (transactions, reviews), the dispute participant
+index or the KYC document hashes. Rows remember the values they were
+loaded or last saved with, so a post_save receiver can tell whether that
+data needs updating without querying for the old row.
+"""
+
+
+class SnapshotMixin:
+    # Attribute names (`user_id` rather than `user`) of the tracked fields
+    snapshot_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if all(field in field_names for field in cls.snapshot_fields):
+            instance._snapshot = instance.snapshot()
+        return instance
+
+    def snapshot(self):
+        """The current values of `snapshot_fields`"""
+        return tuple(getattr(self, field) for field in self.snapshot_fields)
+
+    @property
+    def has_snapshot(self):
+        return hasattr(self, '_snapshot')
+
+    @property
+    def saved_snapshot(self):
+        """The values the row was loaded or last saved with; None for new rows and deferred loads"""
+        return getattr(self, '_snapshot', None)
+
+    def remember_snapshot(self):
+        """Record the current values as what the database now holds"""
+        self._snapshot = self.snapshot()
+
+    def refresh_snapshot(self, lock=False):
+        """
+        Re-read the saved snapshot from the database and return it.
+
+        With `lock`, the row stays locked until the transaction ends, so the
+        snapshot cannot go stale before the derived data follows the save.
+        """
+        rows = type(self)._base_manager.filter(pk=self.pk)
+        if lock:
+            rows = rows.select_for_update()
+        self._snapshot = None if self.pk is None else rows.values_list(*self.snapshot_fields).first()
+        return self._snapshot
@@ -0,0 +1,548 @@
+"""
+Synthetic data at production scale.
+
+SyntheticData bulk-generates users, listings, transactions, disputes,
+reviews, donation requests and KYCs with plausible shapes:
+- signups grow over time
+- popularity is long tailed (lognormal): a few vendors own many listings
+  and a few listings get most of the bookings and requests
+- listings cluster around a handful of cities
+- the bookings of a listing never overlap, and take their status from
+  where they fall relative to now
+- ratings lean towards five stars
+- donation listings are settled the way accepting a request settles them
+The same options and seed generate the same rows.
+
+bulk_create skips save() and the signals that maintain the derived tables,
+so `rebuild_derived()` recomputes those afterwards. The listing search
+index is kept up to date by triggers. KYC documents point at URLs, which
+the duplicate index does not hash (see kyc.duplicates).
+"""
+import heapq
+import math
+import random
+import uuid
+from array import array
+from bisect import bisect
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from accounts.models import User
+from disputes.models import Dispute, DisputeStatus
+from disputes.participants import rebuild_participants
+from disputes.queue import rebuild_priorities
+from donations.models import DonationRequest, RequestStatus
+from kyc.models import KYC, DocumentType, KYCStatus
+from listings.geo import grid_cell
+from listings.models import Listing
+from rentoshare.bulk import chunked
+from reviews.models import Review
+from reviews.stats import rebuild_summaries
+from transactions.models import Transaction, TransactionStatus
+from transactions.stats import rebuild_user_stats
+
+DAY = 24 * 60 * 60
+
+# Picks that may fail (a listing booked solid, a duplicate pair) before a generator gives up, per row asked for
+MAX_ATTEMPTS = 20
+
+VENDOR_SHARE = 0.25
+
+FIRST_NAMES = (
+    'Aarav', 'Anisha', 'Bibek', 'Bikash', 'Deepa', 'Dipesh', 'Gita', 'Kabita', 'Kiran', 'Manish',
+    'Nabin', 'Nisha', 'Pooja', 'Prakash', 'Rajesh', 'Ramesh', 'Rina', 'Sabina', 'Sagar', 'Sanjay',
+    'Sarita', 'Shristi', 'Sita', 'Sujan', 'Suman', 'Sunita', 'Ujjwal',
+)
+LAST_NAMES = (
+    'Adhikari', 'Basnet', 'Bhandari', 'Chaudhary', 'Gurung', 'Karki', 'Khadka', 'Lama', 'Magar',
+    'Maharjan', 'Pandey', 'Poudel', 'Rai', 'Shakya', 'Sharma', 'Shrestha', 'Tamang', 'Thapa', 'Yadav',
+)
+RELATIONS = ('Father', 'Mother', 'Brother', 'Sister', 'Spouse', 'Friend')
+OCCUPATIONS = ('Student', 'Teacher', 'Engineer', 'Shopkeeper', 'Farmer', 'Nurse', 'Driver', 'Accountant', 'Freelancer')
+
+# (city, latitude, longitude, neighbourhoods), weighted by their share of listings
+CITIES = (
+    (('Kathmandu', 27.7172, 85.3240, ('Baneshwor', 'Thamel', 'Koteshwor', 'Chabahil', 'Kalanki', 'Maharajgunj')), 45),
+    (('Lalitpur', 27.6644, 85.3188, ('Jawalakhel', 'Kupondole', 'Satdobato', 'Imadol')), 15),
+    (('Pokhara', 28.2096, 83.9856, ('Lakeside', 'Mahendrapool', 'Bagar', 'Chipledhunga')), 15),
+    (('Biratnagar', 26.4525, 87.2718, ('Traffic Chowk', 'Bargachhi', 'Tinpaini')), 9),
+    (('Bhaktapur', 27.6710, 85.4298, ('Suryabinayak', 'Kamalbinayak', 'Thimi')), 8),
+    (('Butwal', 27.7006, 83.4484, ('Golpark', 'Milanchowk', 'Devinagar')), 8),
+)
+# Degrees listings stray from their city centre (standard deviation)
+CITY_SPREAD_DEG = 0.04
+UNLOCATED_SHARE = 0.15
+
+CATALOG = {
+    'product': (
+        'electric drill', 'camping tent', 'DSLR camera', 'mountain bike', 'projector', 'pressure washer',
+        'ladder', 'sleeping bag', 'trekking poles', 'party speaker', 'generator', 'sewing machine',
+        'guitar', 'baby stroller', 'drone', 'gaming console', 'wedding lehenga', 'water purifier',
+    ),
+    'service': (
+        'plumbing repair', 'house cleaning', 'maths tutoring', 'event photography', 'bike servicing',
+        'moving help', 'laptop repair', 'catering', 'guitar lessons', 'garden maintenance',
+    ),
+    'donation': (
+        'school books', 'winter clothes', 'baby clothes', 'old laptop', 'study table', 'kitchen utensils',
+        'bicycle', 'blankets', 'toys', 'mattress',
+    ),
+}
+QUALIFIERS = ('Almost new', 'Well kept', 'Heavy duty', 'Compact', 'Professional', 'Affordable', 'Reliable', 'Lightweight')
+CONDITIONS = ('new', 'like new', 'good', 'fair')
+LISTING_TYPES = (('product', 60), ('service', 25), ('donation', 15))
+# Median price per day and the spread (sigma) of its lognormal distribution
+PRICES = {'product': (15, 0.8), 'service': (40, 0.6)}
+
+# Booking timeline: each listing is booked backwards from a random day up to BOOKING_HORIZON_DAYS ahead
+BOOKING_HORIZON_DAYS = 30
+BOOKING_DAYS_MEAN = 3
+BOOKING_GAP_DAYS_MEAN = 10
+BOOKING_LEAD_DAYS_MAX = 14
+CANCELLED_SHARE = 0.15
+
+DISPUTE_STATUSES = ((DisputeStatus.OPEN, 30), (DisputeStatus.RESOLVED, 50), (DisputeStatus.REJECTED, 20))
+DISPUTE_REASONS = (
+    'Item was damaged when returned', 'Item did not match the description', 'Vendor did not show up',
+    'Returned late', 'Charged more than agreed', 'Service was left unfinished',
+)
+RESOLUTION_NOTES = ('Partial refund issued', 'Full refund issued', 'No evidence of the claim', 'Parties settled between themselves')
+
+RATINGS = ((5, 52), (4, 24), (3, 9), (2, 5), (1, 10))
+REVIEW_COMMENTS = {
+    5: ('Excellent, would rent again!', 'Everything was perfect.', 'Very friendly and on time.'),
+    4: ('Good experience overall.', 'Worked well, minor wear.', 'Would recommend.'),
+    3: ('It was okay.', 'Did the job, nothing special.'),
+    2: ('Not as described.', 'Late and hard to reach.'),
+    1: ('Terrible experience.', 'Broken on arrival.', 'Never again.'),
+}
+COMMENT_SHARE = 0.6
+
+DONATION_STATUSES = ((RequestStatus.PENDING, 62), (RequestStatus.REJECTED, 30), (RequestStatus.ACCEPTED, 8))
+DONATION_MESSAGES = (
+    'I would really appreciate this for my kids.', 'I can pick it up any time this week.',
+    'This would help our community library.', 'Please consider my request, thank you!',
+)
+
+DOCUMENT_TYPES = (
+    (DocumentType.NATIONAL_ID, 35), (DocumentType.LICENSE, 25), (DocumentType.PASSPORT, 15),
+    (DocumentType.VOTER_ID, 10), (DocumentType.PAN_CARD, 10), (DocumentType.OTHER, 5),
+)
+KYC_STATUSES = (
+    (KYCStatus.APPROVED, 70), (KYCStatus.PENDING, 12), (KYCStatus.UNDER_REVIEW, 6), (KYCStatus.REJECTED, 12),
+)
+REJECTION_REASONS = ('Document is blurry', 'Name does not match the document', 'Document has expired')
+
+
+def _table(pairs):
+    values, weights = zip(*pairs)
+    return values, list(accumulate(weights))
+
+
+def _choose(rng, table):
+    values, cum_weights = table
+    return rng.choices(values, cum_weights=cum_weights)[0]
+
+
+def _datetime(timestamp):
+    return datetime.fromtimestamp(timestamp, dt_timezone.utc)
+
+
+def _money(value):
+    return Decimal(f'{value:.2f}')
+
+
+class Popularity:
+    """Picks positions 0..count-1, each with a lognormal weight, so a few are picked far more often than most"""
+
+    def __init__(self, rng, count, sigma):
+        self.rng = rng
+        self.cum_weights = list(accumulate(rng.lognormvariate(0, sigma) for _ in range(count)))
+
+    def pick(self):
+        position = bisect(self.cum_weights, self.rng.random() * self.cum_weights[-1])
+        return min(position, len(self.cum_weights) - 1)
+
+
+@contextmanager
+def backdated(model):
+    """Let bulk_create keep the created/updated times it is given, instead of auto_now(_add) setting them"""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class SyntheticData:
+    """
+    Generates one data set into the default database, model by model.
+
+    Call the create_* methods in order: each draws on the rows the earlier
+    ones made in this instance (not on what the database already held) and
+    returns how many rows it created, which may fall short of the count
+    asked for when there is nothing left to draw on. Then call
+    rebuild_derived().
+    """
+
+    def __init__(self, seed=None, days=730, password='rentoshare', batch_size=5000, stdout=None):
+        self.rng = random.Random(seed)
+        self.now = timezone.now().timestamp()
+        self.origin = self.now - days * DAY
+        self.password = password
+        self.batch_size = batch_size
+        self.stdout = stdout
+        # Emails stay unique however many times the same seed is loaded
+        self.domain = f'{uuid.uuid4().hex[:8]}.example.com'
+        self.cities = _table(CITIES)
+
+        self.user_ids = array('q')
+        self.user_created = array('d')
+        self.admin_ids = []
+        self.vendors = []  # Positions in user_ids
+        self.members = []  # Positions in user_ids of every non-staff user
+
+        self.listing_ids = array('q')
+        self.listing_owner = array('q')
+        self.listing_created = array('d')
+        self.listing_price = array('d')
+        self.rentable = []  # Positions in listing_ids of products and services
+        self.donated = []  # Positions in listing_ids of donations
+
+        self.txn_ids = array('q')
+        self.txn_vendor = array('q')
+        self.txn_consumer = array('q')
+        self.txn_start = array('d')
+        self.txn_end = array('d')
+        self.txn_status = []
+
+    def _create(self, model, objects):
+        """bulk_create `objects` in batches, one transaction each, yielding every created batch"""
+        total = 0
+        with backdated(model):
+            for batch in chunked(objects, self.batch_size):
+                with db_transaction.atomic():
+                    created = model.objects.bulk_create(batch)
+                total += len(created)
+                if self.stdout is not None:
+                    self.stdout.write(f'Created {total} {model._meta.verbose_name_plural}')
+                yield created
+
+    def _count(self, model, objects):
+        return sum(len(batch) for batch in self._create(model, objects))
+
+    def _address(self):
+        city, _, _, areas = _choose(self.rng, self.cities)
+        return f'{self.rng.choice(areas)}, {city}'
+
+    def _phone(self):
+        return f'98{self.rng.randrange(10 ** 8):08d}'
+
+    def create_users(self, count, admins=0):
+        """`admins` staff accounts, then `count` users; every account gets the same password"""
+        rng = self.rng
+        # Hashing is slow by design, so hash once and share the result
+        password = make_password(self.password)
+        span = self.now - self.origin
+
+        def rows():
+            for i in range(admins + count):
+                staff = i < admins
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                # Signups grow linearly over time: more recent accounts are more likely
+                created = self.origin if staff else self.origin + span * math.sqrt(rng.random())
+                role = 'vendor' if not staff and rng.random() < VENDOR_SHARE else 'consumer'
+                position = len(self.user_created)
+                self.user_created.append(created)
+                if role == 'vendor':
+                    self.vendors.append(position)
+                if not staff:
+                    self.members.append(position)
+                yield User(
+                    email=f'{first}.{last}.{position}@{self.domain}'.lower(), full_name=f'{first} {last}',
+                    phone=self._phone(), role=role, password=password, is_verified=staff,
+                    is_staff=staff, is_superuser=staff, created_at=_datetime(created),
+                )
+
+        for batch in self._create(User, rows()):
+            self.user_ids.extend(user.pk for user in batch)
+        self.admin_ids = list(self.user_ids[:admins])
+        return len(self.members)
+
+    def create_listings(self, count):
+        if not self.vendors:
+            return 0
+        rng = self.rng
+        owners = Popularity(rng, len(self.vendors), 1.2)
+        listing_types = _table(LISTING_TYPES)
+
+        def rows():
+            for _ in range(count):
+                owner = self.vendors[owners.pick()]
+                created = self.user_created[owner] + rng.random() * (self.now - self.user_created[owner])
+                listing_type = _choose(rng, listing_types)
+                item = rng.choice(CATALOG[listing_type])
+                price = None
+                if listing_type in PRICES:
+                    median, sigma = PRICES[listing_type]
+                    price = round(rng.lognormvariate(math.log(median), sigma), 2)
+
+                location = latitude = longitude = None
+                if rng.random() >= UNLOCATED_SHARE:
+                    city, latitude, longitude, areas = _choose(rng, self.cities)
+                    location = f'{rng.choice(areas)}, {city}'
+                    latitude = round(latitude + rng.gauss(0, CITY_SPREAD_DEG), 6)
+                    longitude = round(longitude + rng.gauss(0, CITY_SPREAD_DEG), 6)
+
+                position = len(self.listing_created)
+                self.listing_owner.append(self.user_ids[owner])
+                self.listing_created.append(created)
+                self.listing_price.append(price or 0)
+                (self.donated if listing_type == 'donation' else self.rentable).append(position)
+                title = f'Free {item}' if listing_type == 'donation' else f'{rng.choice(QUALIFIERS)} {item}'
+                yield Listing(
+                    user_id=self.user_ids[owner], title=title, listing_type=listing_type, price_per_day=price,
+                    description=f'{item.capitalize()} in {rng.choice(CONDITIONS)} condition. Message me for details.',
+                    location=location, latitude=latitude, longitude=longitude,
+                    # bulk_create skips Listing.save(), which sets the cell
+                    geo_cell=grid_cell(latitude, longitude),
+                    images=[f'listings/{uuid.UUID(int=rng.getrandbits(128)).hex}.jpg' for _ in range(rng.randint(0, 4))],
+                    is_active=rng.random() < 0.9, created_at=_datetime(created),
+                )
+
+        for batch in self._create(Listing, rows()):
+            self.listing_ids.extend(listing.pk for listing in batch)
+        return len(self.listing_ids)
+
+    def create_transactions(self, count):
+        if not self.rentable or not self.members:
+            return 0
+        rng = self.rng
+        listings = Popularity(rng, len(self.rentable), 1.0)
+        consumers = Popularity(rng, len(self.members), 1.0)
+        # Each listing is booked backwards in time from its cursor, so its bookings never overlap
+        cursors = {}
+
+        def rows():
+            made = attempts = 0
+            while made < count and attempts < count * MAX_ATTEMPTS:
+                attempts += 1
+                listing = self.rentable[listings.pick()]
+                consumer = self.members[consumers.pick()]
+                vendor_id = self.listing_owner[listing]
+                consumer_id = self.user_ids[consumer]
+                if consumer_id == vendor_id:
+                    continue
+                cursor = cursors.get(listing)
+                if cursor is None:
+                    # Start anywhere from the day it was listed to the booking horizon
+                    listed = self.listing_created[listing]
+                    cursor = listed + rng.random() * (self.now + BOOKING_HORIZON_DAYS * DAY - listed)
+                end = cursor - rng.expovariate(1 / BOOKING_GAP_DAYS_MEAN) * DAY
+                days = 1 + min(int(rng.expovariate(1 / BOOKING_DAYS_MEAN)), 29)
+                start = end - days * DAY
+                if start <= self.listing_created[listing]:
+                    # Booked solid back to the day it was listed
+                    cursors[listing] = start
+                    continue
+                if start <= self.user_created[consumer]:
+                    continue
+                cursors[listing] = start
+
+                booked_by = min(start, self.now)
+                floor = max(self.listing_created[listing], self.user_created[consumer])
+                created = booked_by - rng.random() * min(BOOKING_LEAD_DAYS_MAX * DAY, booked_by - floor)
+                if start > self.now:
+                    status = TransactionStatus.CANCELLED if rng.random() < CANCELLED_SHARE else TransactionStatus.PENDING
+                elif end > self.now:
+                    status = TransactionStatus.ACTIVE
+                else:
+                    status = TransactionStatus.CANCELLED if rng.random() < CANCELLED_SHARE else TransactionStatus.COMPLETED
+
+                self.txn_vendor.append(vendor_id)
+                self.txn_consumer.append(consumer_id)
+                self.txn_start.append(start)
+                self.txn_end.append(end)
+                self.txn_status.append(status)
+                made += 1
+                yield Transaction(
+                    listing_id=self.listing_ids[listing], vendor_id=vendor_id, consumer_id=consumer_id,
+                    start_date=_datetime(start), end_date=_datetime(end),
+                    total_price=_money(self.listing_price[listing] * days), status=status,
+                    is_refunded=status == TransactionStatus.CANCELLED and rng.random() < 0.5,
+                    created_at=_datetime(created),
+                )
+
+        for batch in self._create(Transaction, rows()):
+            self.txn_ids.extend(transaction.pk for transaction in batch)
+        return len(self.txn_ids)
+
+    def create_disputes(self, count):
+        """Disputes over started bookings; a booking whose dispute is still open is marked disputed"""
+        rng = self.rng
+        eligible = [
+            i for i, status in enumerate(self.txn_status)
+            if status in (TransactionStatus.COMPLETED, TransactionStatus.ACTIVE)
+        ]
+        chosen = sorted(rng.sample(eligible, min(count, len(eligible))))
+        statuses = _table(DISPUTE_STATUSES)
+        disputed = []
+
+        def rows():
+            for i in chosen:
+                start, end = self.txn_start[i], self.txn_end[i]
+                created = start + rng.random() * (min(end + 7 * DAY, self.now) - start)
+                status = _choose(rng, statuses)
+                resolved_at = resolved_by = notes = None
+                if status == DisputeStatus.OPEN:
+                    disputed.append(self.txn_ids[i])
+                    self.txn_status[i] = TransactionStatus.DISPUTED
+                else:
+                    resolved_at = _datetime(min(created + rng.uniform(0.5, 10) * DAY, self.now))
+                    resolved_by = rng.choice(self.admin_ids) if self.admin_ids else None
+                    notes = rng.choice(RESOLUTION_NOTES)
+                raised_by = self.txn_consumer[i] if rng.random() < 0.8 else self.txn_vendor[i]
+                yield Dispute(
+                    transaction_id=self.txn_ids[i], raised_by_id=raised_by, reason=rng.choice(DISPUTE_REASONS),
+                    status=status, created_at=_datetime(created), resolved_at=resolved_at,
+                    resolved_by_id=resolved_by, resolution_notes=notes,
+                )
+
+        made = self._count(Dispute, rows())
+        for chunk in chunked(disputed):
+            Transaction.objects.filter(pk__in=chunk).update(
+                status=TransactionStatus.DISPUTED
+            )
+        return made
+
+    def create_reviews(self, count):
+        """Reviews after completed bookings, mostly by the consumer of the vendor"""
+        rng = self.rng
+        completed = [i for i, status in enumerate(self.txn_status) if status == TransactionStatus.COMPLETED]
+        rng.shuffle(completed)
+        ratings = _table(RATINGS)
+
+        def rows():
+            pairs = set()
+            for i in completed:
+                if len(pairs) == count:
+                    break
+                vendor_id, consumer_id = self.txn_vendor[i], self.txn_consumer[i]
+                pair = (consumer_id, vendor_id) if rng.random() < 0.85 else (vendor_id, consumer_id)
+                if pair in pairs:
+                    continue
+                pairs.add(pair)
+                stars = _choose(rng, ratings)
+                created = min(self.txn_end[i] + rng.expovariate(1 / 2) * DAY, self.now)
+                yield Review(
+                    reviewer_id=pair[0], reviewed_id=pair[1], rating=Decimal(stars),
+                    comment=rng.choice(REVIEW_COMMENTS[stars]) if rng.random() < COMMENT_SHARE else None,
+                    created_at=_datetime(created),
+                )
+
+        return self._count(Review, rows())
+
+    def create_donation_requests(self, count):
+        """Requests for donation listings; a listing with an accepted request is settled as acceptance does"""
+        if not self.donated or not self.members:
+            return 0
+        rng = self.rng
+        listings = Popularity(rng, len(self.donated), 1.3)
+        requesters = Popularity(rng, len(self.members), 1.0)
+        statuses = _table(DONATION_STATUSES)
+        settled = set()
+
+        def rows():
+            pairs = set()
+            attempts = 0
+            while len(pairs) < count and attempts < count * MAX_ATTEMPTS:
+                attempts += 1
+                listing = self.donated[listings.pick()]
+                user = self.members[requesters.pick()]
+                listing_id, user_id = self.listing_ids[listing], self.user_ids[user]
+                if user_id == self.listing_owner[listing] or (listing_id, user_id) in pairs:
+                    continue
+                pairs.add((listing_id, user_id))
+                floor = max(self.listing_created[listing], self.user_created[user])
+                created = min(floor + rng.expovariate(1 / 5) * DAY, self.now)
+                status = _choose(rng, statuses)
+                if status == RequestStatus.ACCEPTED and listing_id in settled:
+                    status = RequestStatus.REJECTED
+                updated = created if status == RequestStatus.PENDING else min(created + rng.uniform(0.1, 3) * DAY, self.now)
+                if status == RequestStatus.ACCEPTED:
+                    settled.add(listing_id)
+                yield DonationRequest(
+                    listing_id=listing_id, user_id=user_id, status=status,
+                    message=rng.choice(DONATION_MESSAGES) if rng.random() < 0.7 else None,
+                    created_at=_datetime(created), updated_at=_datetime(updated),
+                )
+
+        made = self._count(DonationRequest, rows())
+        # What accepting does: reject the pending siblings and close the listing
+        for chunk in chunked(settled):
+            with db_transaction.atomic():
+                DonationRequest.objects.filter(listing_id__in=chunk, status=RequestStatus.PENDING).update(
+                    status=RequestStatus.REJECTED
+                )
+                Listing.objects.filter(pk__in=chunk).update(is_active=False)
+        return made
+
+    def create_kycs(self, count):
+        """KYCs of `count` users, vendors three times as likely to have one as consumers"""
+        rng = self.rng
+        vendors = set(self.vendors)
+        # Weighted sampling without replacement: the largest random() ** (1 / weight) keys win
+        chosen = heapq.nlargest(
+            count, self.members, key=lambda position: rng.random() ** (1 / (3 if position in vendors else 1))
+        )
+        document_types = _table(DOCUMENT_TYPES)
+        statuses = _table(KYC_STATUSES)
+
+        def rows():
+            for position in sorted(chosen):
+                user_id = self.user_ids[position]
+                submitted = min(self.user_created[position] + rng.expovariate(1 / 10) * DAY, self.now)
+                status = _choose(rng, statuses)
+                reviewed = status in (KYCStatus.APPROVED, KYCStatus.REJECTED)
+                has_back = rng.random() < 0.8
+                yield KYC(
+                    user_id=user_id, gov_id_number=f'{user_id:010d}', document_type=_choose(rng, document_types),
+                    document_front_picture=f'https://documents.example.com/kyc/{user_id}/front.jpg',
+                    document_back_picture=f'https://documents.example.com/kyc/{user_id}/back.jpg' if has_back else None,
+                    kyc_status=status, is_verified=status == KYCStatus.APPROVED,
+                    permanent_address=self._address(),
+                    temp_address=self._address() if rng.random() < 0.3 else None,
+                    date_of_birth=date(1960, 1, 1) + timedelta(days=rng.randrange(45 * 365)),
+                    nationality='Nepali', occupation=rng.choice(OCCUPATIONS),
+                    annual_income=_money(rng.lognormvariate(math.log(600_000), 0.6)) if rng.random() < 0.6 else None,
+                    emergency_contact_name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                    emergency_contact_phone=self._phone(), emergency_contact_relation=rng.choice(RELATIONS),
+                    submitted_at=_datetime(submitted),
+                    verified_at=_datetime(min(submitted + rng.uniform(0.1, 5) * DAY, self.now)) if reviewed else None,
+                    verified_by_id=rng.choice(self.admin_ids) if reviewed and self.admin_ids else None,
+                    rejection_reason=rng.choice(REJECTION_REASONS) if status == KYCStatus.REJECTED else None,
+                )
+
+        return self._count(KYC, rows())
+
+    def rebuild_derived(self):
+        """Recompute the tables the skipped signals would have maintained; returns their row counts"""
+        return {
+            'transaction stats': rebuild_user_stats(),
+            'rating summaries': rebuild_summaries(),
+            'dispute participants': rebuild_participants(),
+            'dispute priorities': rebuild_priorities(),
+        }
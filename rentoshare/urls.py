@@ -17,6 +17,8 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from . import views
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     
@@ -25,10 +27,14 @@ urlpatterns = [
     path('api/auth/', include('djoser.urls.jwt')),  # for token auth
     
     # App endpoints
+    path('api/accounts/', include('accounts.urls')),  # Public user badges
     path('api/listings/', include('listings.urls')),  # Listings management
     path('api/kyc/', include('kyc.urls')),  # KYC verification
     path('api/transactions/', include('transactions.urls')),  # Transaction management
     path('api/reviews/', include('reviews.urls')),  # Review system
     path('api/disputes/', include('disputes.urls')),  # Dispute management
     path('api/donations/', include('donations.urls')),  # Donation requests
+
+    # Per-endpoint request metrics for Prometheus (staff only)
+    path('metrics', views.metrics, name='metrics'),
 ]
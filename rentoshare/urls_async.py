@@ -0,0 +1,22 @@
+"""
+URL configuration served under ASGI.
+
+The same URLs as rentoshare.urls, with the public reads below answered by
+async views (see rentoshare.async_views).
+"""
+from kyc.async_views import kyc_public_status
+from listings.async_views import listing_detail, listing_list
+from reviews.async_views import user_rating_stats, user_reviews
+from rentoshare.async_views import async_urlpatterns
+from rentoshare.urls import urlpatterns as sync_urlpatterns
+
+# URL name -> async view
+ASYNC_VIEWS = {
+    'listing-list': listing_list,
+    'listing-detail': listing_detail,
+    'user-reviews': user_reviews,
+    'user-rating-stats': user_rating_stats,
+    'kyc-public-status': kyc_public_status,
+}
+
+urlpatterns = async_urlpatterns(sync_urlpatterns, ASYNC_VIEWS)
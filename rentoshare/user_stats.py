@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .routers import primary_reads
+
+
+def status_counts(queryset, statuses):
+    """Total plus one count per status, computed in a single aggregate query"""
+    counts = {'total': Count('id')}
+    counts.update({status: Count('id', filter=Q(status=status)) for status in statuses})
+    return queryset.order_by().aggregate(**counts)
+
+
+def _key(namespace, user_id):
+    return f'{namespace}:stats:{user_id}'
+
+
+def cached_user_stats(namespace, user_id, compute):
+    """Return the cached stats of `user_id`, calling `compute()` on a miss"""
+    key = _key(namespace, user_id)
+    stats = cache.get(key)
+    if stats is None:
+        # Cached for a minute: a lagging replica must not feed it
+        with primary_reads():
+            stats = compute()
+        cache.set(key, stats, timeout=settings.USER_STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def invalidate_user_stats(namespace, user_ids):
+    """Drop the cached stats of `user_ids` once the current transaction commits"""
+    keys = [_key(namespace, user_id) for user_id in set(user_ids) if user_id is not None]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
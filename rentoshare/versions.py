@@ -0,0 +1,48 @@
+"""
+Version stamps kept in the default cache.
+
+A stamp is a nanosecond timestamp. Bumping it changes everything derived
+from it, such as ETags, cache keys or per-process copies, which retires
+what was derived from the old one. Stamps are only shared between
+processes when the cache backend is (see `cache_is_shared()`).
+"""
+import time
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+VERSION_TIMEOUT = 24 * 60 * 60
+
+# Backends whose entries are never seen by another process
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def cache_is_shared():
+    """Whether every server process reads and writes the same default cache"""
+    return not isinstance(caches['default'], PROCESS_LOCAL_BACKENDS)
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, timeout=VERSION_TIMEOUT):
+            # Another request stamped it first
+            version = cache.get(key, version)
+    return version
+
+
+async def aget_version(key):
+    version = await cache.aget(key)
+    if version is None:
+        version = time.time_ns()
+        if not await cache.aadd(key, version, timeout=VERSION_TIMEOUT):
+            version = await cache.aget(key, version)
+    return version
+
+
+def bump_versions(*keys):
+    """Give every stamp in `keys` one new version"""
+    now = time.time_ns()
+    cache.set_many({key: now for key in keys}, timeout=VERSION_TIMEOUT)
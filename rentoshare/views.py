@@ -0,0 +1,12 @@
+from django.http import HttpResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+
+from .metrics import CONTENT_TYPE, render_metrics
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics(request):
+    """Per-endpoint request metrics of this process, in the Prometheus text format (staff only)"""
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE)
@@ -0,0 +1,19 @@
+from rest_framework.response import Response
+
+from rentoshare.async_db import db
+from rentoshare.async_views import drf_view
+from .models import UserRatingSummary
+from .views import UserReviewsReceivedView, rating_stats
+
+
+async def user_reviews(request, user_id, **kwargs):
+    """UserReviewsReceivedView, async"""
+    view = drf_view(UserReviewsReceivedView, request, user_id=user_id, **kwargs)
+    page = await view.paginator.apaginate_queryset(view.get_queryset(), view.request, view=view)
+    return view.get_paginated_response(view.get_serializer(page, many=True).data)
+
+
+async def user_rating_stats(request, user_id, **kwargs):
+    """user_rating_stats, async"""
+    summary = await db(UserRatingSummary.objects.filter(user_id=user_id).first)
+    return Response(rating_stats(user_id, summary))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.stats import find_mismatches, rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-user rating summaries from the reviews table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only compare the stored summaries with a full recompute')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of summary rows written per INSERT')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            mismatches = find_mismatches()
+            for user_id, (stored, expected) in sorted(mismatches.items()):
+                self.stdout.write(f'User {user_id}: stored {stored}, expected {expected}')
+            if mismatches:
+                raise CommandError(f'{len(mismatches)} rating summaries are out of date.')
+            self.stdout.write(self.style.SUCCESS('All rating summaries match a full recompute.'))
+            return
+
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive.')
+        count = rebuild_summaries(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rating summaries for {count} users'))
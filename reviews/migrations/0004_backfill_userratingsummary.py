@@ -0,0 +1,42 @@
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+
+# Frozen copy of the summary rules at the time of this migration
+COUNTER_FIELDS = ['review_count', 'rating_sum'] + [f'stars_{stars}' for stars in range(1, 6)]
+
+
+def backfill_summaries(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    UserRatingSummary = apps.get_model('reviews', 'UserRatingSummary')
+
+    histogram = {
+        f'stars_{stars}': Count('id', filter=Q(rating__gte=stars - 0.5, rating__lt=stars + 0.5))
+        for stars in range(1, 6)
+    }
+    aggregates = (
+        Review.objects
+        .order_by()
+        .values('reviewed')
+        .annotate(review_count=Count('id'), rating_sum=Sum('rating'), **histogram)
+    )
+    UserRatingSummary.objects.all().delete()
+    UserRatingSummary.objects.bulk_create(
+        [
+            UserRatingSummary(user_id=aggregate['reviewed'], **{
+                field: aggregate[field] or 0 for field in COUNTER_FIELDS
+            })
+            for aggregate in aggregates
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_userratingsummary'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
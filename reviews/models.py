@@ -1,10 +1,18 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
+from rentoshare.db.locking import write_atomic
+from rentoshare.snapshots import SnapshotMixin
 
 User = get_user_model()
 
-class Review(models.Model):
+# Fields that decide how a review counts towards UserRatingSummary
+SUMMARY_FIELDS = ('reviewed_id', 'rating')
+
+class Review(SnapshotMixin, models.Model):
+    # What the rating summary counts it as (see reviews.stats)
+    snapshot_fields = SUMMARY_FIELDS
+    
     reviewer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reviews_given')
     reviewed = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reviews_received')
     
@@ -20,6 +28,48 @@ class Review(models.Model):
     class Meta:
         unique_together = [['reviewer', 'reviewed']]
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['reviewed', 'created_at', 'id'], name='review_reviewed_created_idx'),
+            models.Index(fields=['reviewer', 'created_at', 'id'], name='review_reviewer_created_idx'),
+        ]
     
     def __str__(self):
         return f"Review by {self.reviewer.email} for {self.reviewed.email} - {self.rating}/5"
+
+    def save(self, *args, **kwargs):
+        # The summary moves from the stored row to this one in the same transaction (see reviews.signals)
+        with write_atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with write_atomic():
+            return super().delete(*args, **kwargs)
+
+class UserRatingSummary(models.Model):
+    """Per-user review count, rating sum and star histogram, kept up to date by reviews.signals"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='rating_summary')
+    
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.DecimalField(max_digits=12, decimal_places=1, default=0)
+    
+    # Histogram buckets: stars_n counts ratings in [n - 0.5, n + 0.5)
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Rating summary for user {self.user_id}"
+    
+    @property
+    def average_rating(self):
+        if not self.review_count:
+            return 0
+        return round(self.rating_sum / self.review_count, 1)
+    
+    @property
+    def rating_distribution(self):
+        return {stars: getattr(self, f'stars_{stars}') for stars in range(1, 6)}
@@ -0,0 +1,36 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Review
+from .stats import apply_review_change
+
+
+@receiver(pre_save, sender=Review)
+def capture_summary_snapshot(sender, instance, raw=False, **kwargs):
+    # Never trust the loaded copy: a concurrent save may have moved the summary since.
+    # Locked, so nothing changes it before the summary follows this save.
+    if raw:
+        return
+    instance.refresh_snapshot(lock=True)
+
+
+@receiver(post_save, sender=Review)
+def update_rating_summary_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else instance.saved_snapshot
+    new = instance.snapshot()
+    if old != new:
+        apply_review_change(old, new)
+    instance.remember_snapshot()
+
+
+@receiver(pre_delete, sender=Review)
+def capture_summary_snapshot_on_delete(sender, instance, **kwargs):
+    instance.refresh_snapshot(lock=True)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_summary_on_delete(sender, instance, **kwargs):
+    if instance.saved_snapshot is not None:
+        apply_review_change(instance.saved_snapshot, None)
@@ -0,0 +1,87 @@
+from decimal import Decimal
+
+from django.db import transaction as db_transaction
+from django.db.models import Count, Q, Sum
+
+from rentoshare.counters import apply_deltas, combine_deltas
+from .models import Review, UserRatingSummary
+
+HISTOGRAM_FIELDS = [f'stars_{stars}' for stars in range(1, 6)]
+COUNTER_FIELDS = ['review_count', 'rating_sum'] + HISTOGRAM_FIELDS
+
+
+def histogram_field(rating):
+    """The stars_n bucket a rating falls into, or None below 0.5"""
+    for stars in range(1, 6):
+        if stars - 0.5 <= rating < stars + 0.5:
+            return f'stars_{stars}'
+    return None
+
+
+def _snapshot_deltas(snapshot, sign):
+    if snapshot is None:
+        return {}
+    user_id, rating = snapshot
+    rating = Decimal(str(rating))
+    deltas = {'review_count': sign, 'rating_sum': sign * rating}
+    bucket = histogram_field(rating)
+    if bucket is not None:
+        deltas[bucket] = sign
+    return {user_id: deltas}
+
+
+def apply_review_change(old, new):
+    """
+    Move the summary rows from counting snapshot `old` to counting `new`.
+
+    Snapshots are Review.snapshot() tuples; pass None for a review that is
+    being created (old) or deleted (new).
+    """
+    apply_deltas(UserRatingSummary, combine_deltas(_snapshot_deltas(old, -1), _snapshot_deltas(new, 1)))
+
+
+def compute_summaries():
+    """Recompute summary counters for every reviewed user from the reviews table"""
+    histogram = {
+        f'stars_{stars}': Count('id', filter=Q(rating__gte=stars - 0.5, rating__lt=stars + 0.5))
+        for stars in range(1, 6)
+    }
+    aggregates = (
+        Review.objects
+        .order_by()
+        .values('reviewed')
+        .annotate(review_count=Count('id'), rating_sum=Sum('rating'), **histogram)
+    )
+    return {
+        aggregate['reviewed']: {field: aggregate[field] or 0 for field in COUNTER_FIELDS}
+        for aggregate in aggregates
+    }
+
+
+def find_mismatches():
+    """Return {user_id: (stored, expected)} for every summary row that is out of date"""
+    expected = compute_summaries()
+    stored = {
+        row.pop('user'): row
+        for row in UserRatingSummary.objects.values('user', *COUNTER_FIELDS)
+    }
+    empty = {field: 0 for field in COUNTER_FIELDS}
+    mismatches = {}
+    for user_id in expected.keys() | stored.keys():
+        have = stored.get(user_id, empty)
+        want = expected.get(user_id, empty)
+        if any(have[field] != want[field] for field in COUNTER_FIELDS):
+            mismatches[user_id] = (have, want)
+    return mismatches
+
+
+def rebuild_summaries(batch_size=1000):
+    """Replace every summary row with a full recompute; returns the number of rows"""
+    rows = compute_summaries()
+    with db_transaction.atomic():
+        UserRatingSummary.objects.all().delete()
+        UserRatingSummary.objects.bulk_create(
+            [UserRatingSummary(user_id=user_id, **counters) for user_id, counters in rows.items()],
+            batch_size=batch_size,
+        )
+    return len(rows)
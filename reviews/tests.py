@@ -1,3 +1,64 @@
+from decimal import Decimal
+
 from django.test import TestCase
 
-# Create your tests here.
+from accounts.models import User
+from rentoshare import query_budget
+from .models import Review, UserRatingSummary
+from .stats import find_mismatches
+
+
+class RatingSummaryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reviewed = User.objects.create_user(email='vendor@example.com', password=None, full_name='Vendor', phone='0')
+        cls.reviewers = [
+            User.objects.create_user(email=f'reviewer{i}@example.com', password=None, full_name='Reviewer', phone='0')
+            for i in range(3)
+        ]
+
+    def summary(self):
+        return UserRatingSummary.objects.get(user=self.reviewed)
+
+    def test_summary_follows_creates_edits_and_deletes(self):
+        reviews = [
+            Review.objects.create(reviewer=reviewer, reviewed=self.reviewed, rating=rating)
+            for reviewer, rating in zip(self.reviewers, (5, 4, 2))
+        ]
+        summary = self.summary()
+        self.assertEqual((summary.review_count, summary.rating_sum), (3, Decimal('11')))
+        self.assertEqual((summary.stars_5, summary.stars_4, summary.stars_2), (1, 1, 1))
+
+        # A deferred load has no snapshot; the old rating is read before the save
+        review = Review.objects.only('id').get(pk=reviews[2].pk)
+        review.rating = Decimal('4.5')
+        review.save()
+        reviews[0].delete()
+
+        summary = self.summary()
+        self.assertEqual((summary.review_count, summary.rating_sum), (2, Decimal('8.5')))
+        self.assertEqual((summary.stars_5, summary.stars_4, summary.stars_2), (1, 1, 0))
+        self.assertEqual(find_mismatches(), {})
+
+    def test_stale_copies_do_not_count_a_change_twice(self):
+        review = Review.objects.create(reviewer=self.reviewers[0], reviewed=self.reviewed, rating=2)
+        first, second = Review.objects.get(pk=review.pk), Review.objects.get(pk=review.pk)
+        first.rating = second.rating = Decimal('5')
+        first.save()
+        second.save()
+
+        summary = self.summary()
+        self.assertEqual((summary.review_count, summary.rating_sum), (1, Decimal('5')))
+        self.assertEqual((summary.stars_2, summary.stars_5), (0, 1))
+
+        first.delete()
+        second.delete()
+        summary = self.summary()
+        self.assertEqual((summary.review_count, summary.rating_sum, summary.stars_5), (0, Decimal('0'), 0))
+        self.assertEqual(find_mismatches(), {})
+
+
+class ReviewQueryBudgetTests(query_budget.QueryBudgetTestCase):
+    endpoints = query_budget.endpoints_named(
+        'review-list', 'my-reviews-received', 'user-reviews', 'user-rating-stats',
+    )
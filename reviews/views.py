@@ -2,8 +2,7 @@ from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
-from django.db.models import Avg
-from .models import Review
+from .models import Review, UserRatingSummary
 from .serializers import (
     ReviewSerializer, ReviewCreateSerializer, 
     ReviewDetailSerializer, ReviewPublicSerializer
@@ -22,14 +21,14 @@ class ReviewListView(generics.ListAPIView):
     
     def get_queryset(self):
         user = self.request.user
-        return Review.objects.filter(reviewer=user).order_by('-created_at')
+        return Review.objects.filter(reviewer=user).select_related('reviewer', 'reviewed').order_by('-created_at')
 
 class ReviewDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ReviewDetailSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return Review.objects.filter(reviewer=self.request.user)
+        return Review.objects.filter(reviewer=self.request.user).select_related('reviewer', 'reviewed')
 
 class UserReviewsReceivedView(generics.ListAPIView):
     serializer_class = ReviewPublicSerializer
@@ -37,45 +36,36 @@ class UserReviewsReceivedView(generics.ListAPIView):
     
     def get_queryset(self):
         user_id = self.kwargs.get('user_id')
-        return Review.objects.filter(reviewed_id=user_id).order_by('-created_at')
+        return Review.objects.filter(reviewed_id=user_id).select_related('reviewer').order_by('-created_at')
 
 class MyReviewsReceivedView(generics.ListAPIView):
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return Review.objects.filter(reviewed=self.request.user).order_by('-created_at')
+        return Review.objects.filter(reviewed=self.request.user).select_related('reviewer', 'reviewed').order_by('-created_at')
+
+def rating_stats(user_id, summary):
+    if summary is None:
+        summary = UserRatingSummary(user_id=user_id)
+    return {
+        'average_rating': summary.average_rating,
+        'total_reviews': summary.review_count,
+        'rating_distribution': summary.rating_distribution
+    }
+
+def rating_stats_response(user_id):
+    # Counters are maintained incrementally by reviews.signals
+    return Response(rating_stats(user_id, UserRatingSummary.objects.filter(user_id=user_id).first()))
 
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def user_rating_stats(request, user_id):
     """Get rating statistics for a user"""
-    reviews = Review.objects.filter(reviewed_id=user_id)
-    
-    if not reviews.exists():
-        return Response({
-            'average_rating': 0,
-            'total_reviews': 0,
-            'rating_distribution': {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-        })
-    
-    avg_rating = reviews.aggregate(avg=Avg('rating'))['avg']
-    total_reviews = reviews.count()
-    
-    # Rating distribution
-    rating_distribution = {}
-    for i in range(1, 6):
-        rating_distribution[i] = reviews.filter(rating__gte=i-0.5, rating__lt=i+0.5).count()
-    
-    return Response({
-        'average_rating': round(avg_rating, 1) if avg_rating else 0,
-        'total_reviews': total_reviews,
-        'rating_distribution': rating_distribution
-    })
+    return rating_stats_response(user_id)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def my_rating_stats(request):
     """Get rating statistics for the authenticated user"""
-    user_id = request.user.id
-    return user_rating_stats(request, user_id)
+    return rating_stats_response(request.user.id)
@@ -0,0 +1,81 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from listings.models import Listing
+from rentoshare.db.locking import write_atomic
+from .models import Transaction, TransactionStatus
+
+
+class BookingConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'This listing is already booked for the requested dates.'
+    default_code = 'booking_conflict'
+
+
+def lock_listing(listing_id):
+    """
+    Serialize bookings for one listing.
+
+    Called first inside write_atomic(): backends with row locks take
+    `SELECT ... FOR UPDATE` on the listing row, while SQLite already holds
+    its database write lock by then.
+    """
+    Listing.objects.select_for_update().only('id').get(pk=listing_id)
+
+
+def has_conflicting_booking(listing_id, start_date, end_date, exclude=None):
+    """
+    Whether a booking other than `exclude` holds the listing during [start_date, end_date).
+
+    One range probe on the (listing, start_date, end_date, status) index.
+    """
+    bookings = (
+        Transaction.objects
+        .filter(listing_id=listing_id, start_date__lt=end_date, end_date__gt=start_date)
+        .exclude(status=TransactionStatus.CANCELLED)
+    )
+    if exclude is not None:
+        bookings = bookings.exclude(pk=exclude)
+    return bookings.exists()
+
+
+def create_booking(serializer, consumer):
+    """Save a validated TransactionCreateSerializer unless its period is taken"""
+    listing = serializer.validated_data['listing']
+    start_date = serializer.validated_data['start_date']
+    end_date = serializer.validated_data['end_date']
+
+    # Calculate total price
+    days = (end_date - start_date).days
+    total_price = listing.price_per_day * days if listing.price_per_day else 0
+
+    with write_atomic():
+        lock_listing(listing.pk)
+        if has_conflicting_booking(listing.pk, start_date, end_date):
+            raise BookingConflict()
+        return serializer.save(
+            consumer=consumer,
+            vendor=listing.user,
+            total_price=total_price
+        )
+
+
+def update_booking_status(serializer):
+    """
+    Save a validated TransactionStatusUpdateSerializer.
+
+    A cancelled booking no longer holds its period, so it is only taken
+    back out of `cancelled` if no other booking has claimed it since.
+    """
+    booking = serializer.instance
+    new_status = serializer.validated_data.get('status', booking.status)
+    with write_atomic():
+        lock_listing(booking.listing_id)
+        # Re-read under the lock: another request may have changed it since the view loaded it
+        current_status = Transaction.objects.select_for_update().values_list('status', flat=True).get(pk=booking.pk)
+        if (
+            current_status == TransactionStatus.CANCELLED and new_status != TransactionStatus.CANCELLED and
+            has_conflicting_booking(booking.listing_id, booking.start_date, booking.end_date, exclude=booking.pk)
+        ):
+            raise BookingConflict()
+        return serializer.save()
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.stats import rebuild_user_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-user transaction stats table from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of stats rows written per INSERT')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive.')
+
+        count = rebuild_user_stats(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt transaction stats for {count} users'))
@@ -0,0 +1,44 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rentoshare.metrics import render_metrics
+from transactions.sweeper import sweep_expired_holds
+
+
+class Command(BaseCommand):
+    help = 'Cancel pending transactions whose payment hold has expired'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Transactions cancelled per UPDATE statement')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep sweeping every --interval seconds instead of exiting')
+        parser.add_argument('--interval', type=float, default=30.0,
+                            help='Seconds between sweeps when --loop is given')
+        parser.add_argument('--metrics-file', metavar='PATH',
+                            help="Rewrite this file with the process's metrics after each sweep, "
+                                 'for a Prometheus textfile collector')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive.')
+        if options['interval'] <= 0:
+            raise CommandError('--interval must be positive.')
+
+        while True:
+            cancelled = sweep_expired_holds(batch_size=options['batch_size'])
+            self.stdout.write(f'Cancelled {cancelled} expired payment holds')
+            if options['metrics_file']:
+                self.write_metrics(options['metrics_file'])
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def write_metrics(self, path):
+        # Replaced in one step so a scrape never reads a half-written file
+        partial = f'{path}.partial'
+        with open(partial, 'w') as metrics_file:
+            metrics_file.write(render_metrics())
+        os.replace(partial, path)
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0004_listing_geo_cell_listing_latitude_listing_longitude_and_more'),
+        ('transactions', '0002_transaction_txn_created_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['listing', 'start_date', 'end_date', 'status'], name='txn_listing_period_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_users_created_idx'),
+        ('transactions', '0003_transaction_txn_listing_period_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTransactionStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='transaction_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('vendor_total', models.PositiveIntegerField(default=0)),
+                ('vendor_active', models.PositiveIntegerField(default=0)),
+                ('vendor_completed', models.PositiveIntegerField(default=0)),
+                ('vendor_earnings', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('consumer_total', models.PositiveIntegerField(default=0)),
+                ('consumer_active', models.PositiveIntegerField(default=0)),
+                ('consumer_completed', models.PositiveIntegerField(default=0)),
+                ('consumer_spent', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,51 @@
+from collections import defaultdict
+
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+
+# Frozen copy of the stats rules at the time of this migration
+ACTIVE = 'active'
+COMPLETED = 'completed'
+
+
+def backfill_stats(apps, schema_editor):
+    Transaction = apps.get_model('transactions', 'Transaction')
+    UserTransactionStats = apps.get_model('transactions', 'UserTransactionStats')
+
+    rows = defaultdict(dict)
+    for role, amount_field in (('vendor', 'vendor_earnings'), ('consumer', 'consumer_spent')):
+        aggregates = (
+            Transaction.objects
+            .order_by()
+            .values(role)
+            .annotate(
+                total=Count('id'),
+                active=Count('id', filter=Q(status=ACTIVE)),
+                completed=Count('id', filter=Q(status=COMPLETED)),
+                amount=Sum('total_price', filter=Q(status=COMPLETED)),
+            )
+        )
+        for aggregate in aggregates:
+            rows[aggregate[role]].update({
+                f'{role}_total': aggregate['total'],
+                f'{role}_active': aggregate['active'],
+                f'{role}_completed': aggregate['completed'],
+                amount_field: aggregate['amount'] or 0,
+            })
+
+    UserTransactionStats.objects.all().delete()
+    UserTransactionStats.objects.bulk_create(
+        [UserTransactionStats(user_id=user_id, **counters) for user_id, counters in rows.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0004_usertransactionstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0004_listing_geo_cell_listing_latitude_listing_longitude_and_more'),
+        ('transactions', '0005_backfill_usertransactionstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['status', 'payment_hold_expires'], name='txn_status_hold_idx'),
+        ),
+    ]
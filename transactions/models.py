@@ -1,9 +1,14 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from listings.models import Listing
+from rentoshare.db.locking import write_atomic
+from rentoshare.snapshots import SnapshotMixin
 
 User = get_user_model()
 
+# Fields that decide how a transaction counts towards UserTransactionStats
+STATS_FIELDS = ('vendor_id', 'consumer_id', 'status', 'total_price')
+
 class TransactionStatus(models.TextChoices):
     PENDING = 'pending', 'Pending'
     ACTIVE = 'active', 'Active'
@@ -11,7 +16,10 @@ class TransactionStatus(models.TextChoices):
     CANCELLED = 'cancelled', 'Cancelled'
     DISPUTED = 'disputed', 'Disputed'
 
-class Transaction(models.Model):
+class Transaction(SnapshotMixin, models.Model):
+    # What the stats tables count it as (see transactions.stats)
+    snapshot_fields = STATS_FIELDS
+    
     listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='transactions')
     vendor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='vendor_transactions')
     consumer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='consumer_transactions')
@@ -28,10 +36,42 @@ class Transaction(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='txn_created_idx'),
+            models.Index(fields=['status', 'created_at', 'id'], name='txn_status_created_idx'),
+            models.Index(fields=['vendor', 'created_at', 'id'], name='txn_vendor_created_idx'),
+            models.Index(fields=['consumer', 'created_at', 'id'], name='txn_consumer_created_idx'),
+            models.Index(fields=['listing', 'start_date', 'end_date', 'status'], name='txn_listing_period_idx'),
+            models.Index(fields=['status', 'payment_hold_expires'], name='txn_status_hold_idx'),
+        ]
     
     def __str__(self):
         return f"Transaction {self.id} - {self.listing.title} ({self.status})"
     
+    def save(self, *args, **kwargs):
+        # The stats move from the stored row to this one in the same transaction (see transactions.signals)
+        with write_atomic():
+            super().save(*args, **kwargs)
+    
     @property
     def duration_days(self):
         return (self.end_date - self.start_date).days
+
+class UserTransactionStats(models.Model):
+    """Per-user transaction counters, kept up to date by transactions.signals"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='transaction_stats')
+    
+    vendor_total = models.PositiveIntegerField(default=0)
+    vendor_active = models.PositiveIntegerField(default=0)
+    vendor_completed = models.PositiveIntegerField(default=0)
+    vendor_earnings = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    consumer_total = models.PositiveIntegerField(default=0)
+    consumer_active = models.PositiveIntegerField(default=0)
+    consumer_completed = models.PositiveIntegerField(default=0)
+    consumer_spent = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Transaction stats for user {self.user_id}"
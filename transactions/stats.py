@@ -0,0 +1,77 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction as db_transaction
+from django.db.models import Count, Q, Sum
+
+from rentoshare.counters import apply_deltas, combine_deltas
+from .models import Transaction, TransactionStatus, UserTransactionStats
+
+CENTS = Decimal('0.01')
+
+
+def _contribution(role, status, total_price):
+    """Counter increments a single transaction adds for one of its participants"""
+    amount_field = 'vendor_earnings' if role == 'vendor' else 'consumer_spent'
+    deltas = {f'{role}_total': 1}
+    if status == TransactionStatus.ACTIVE:
+        deltas[f'{role}_active'] = 1
+    elif status == TransactionStatus.COMPLETED:
+        deltas[f'{role}_completed'] = 1
+        deltas[amount_field] = Decimal(str(total_price or 0)).quantize(CENTS)
+    return deltas
+
+
+def _snapshot_deltas(snapshot, sign):
+    per_user = defaultdict(lambda: defaultdict(int))
+    if snapshot is None:
+        return per_user
+    vendor_id, consumer_id, status, total_price = snapshot
+    for role, user_id in (('vendor', vendor_id), ('consumer', consumer_id)):
+        for field, value in _contribution(role, status, total_price).items():
+            per_user[user_id][field] += sign * value
+    return per_user
+
+
+def apply_transaction_change(old, new):
+    """
+    Move the stats rows from counting snapshot `old` to counting `new`.
+
+    Snapshots are Transaction.snapshot() tuples; pass None for a
+    transaction that is being created (old) or deleted (new). Both users'
+    rows change or neither; inside the save of the transaction, together
+    with it.
+    """
+    apply_deltas(UserTransactionStats, combine_deltas(_snapshot_deltas(old, -1), _snapshot_deltas(new, 1)))
+
+
+def rebuild_user_stats(batch_size=1000):
+    """Recompute every stats row from the transactions table; returns the number of rows"""
+    rows = defaultdict(dict)
+    for role, amount_field in (('vendor', 'vendor_earnings'), ('consumer', 'consumer_spent')):
+        aggregates = (
+            Transaction.objects
+            .order_by()
+            .values(role)
+            .annotate(
+                total=Count('id'),
+                active=Count('id', filter=Q(status=TransactionStatus.ACTIVE)),
+                completed=Count('id', filter=Q(status=TransactionStatus.COMPLETED)),
+                amount=Sum('total_price', filter=Q(status=TransactionStatus.COMPLETED)),
+            )
+        )
+        for aggregate in aggregates:
+            rows[aggregate[role]].update({
+                f'{role}_total': aggregate['total'],
+                f'{role}_active': aggregate['active'],
+                f'{role}_completed': aggregate['completed'],
+                amount_field: aggregate['amount'] or 0,
+            })
+
+    with db_transaction.atomic():
+        UserTransactionStats.objects.all().delete()
+        UserTransactionStats.objects.bulk_create(
+            [UserTransactionStats(user_id=user_id, **counters) for user_id, counters in rows.items()],
+            batch_size=batch_size,
+        )
+    return len(rows)
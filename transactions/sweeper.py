@@ -0,0 +1,49 @@
+import logging
+import time
+
+from django.utils import timezone
+
+from rentoshare.metrics import registry
+
+from .models import Transaction, TransactionStatus
+
+logger = logging.getLogger(__name__)
+
+
+def sweep_expired_holds(batch_size=1000, now=None):
+    """
+    Cancel pending transactions whose payment hold has expired.
+
+    Each batch is one `UPDATE ... WHERE id IN (SELECT ... LIMIT n)` served by
+    the (status, payment_hold_expires) index, so no rows are loaded into
+    Python. Signals are skipped on purpose: pending -> cancelled does not
+    change any UserTransactionStats counter. Each sweep is recorded as the
+    `payment_hold_sweep` job in the metrics registry. Returns the number cancelled.
+    """
+    now = now or timezone.now()
+    started = time.perf_counter()
+    total = 0
+    batches = 0
+    while True:
+        expired = (
+            Transaction.objects
+            .filter(status=TransactionStatus.PENDING, payment_hold_expires__lte=now)
+            .order_by('payment_hold_expires')
+            .values('pk')[:batch_size]
+        )
+        cancelled = Transaction.objects.filter(
+            pk__in=expired, status=TransactionStatus.PENDING
+        ).update(status=TransactionStatus.CANCELLED)
+        total += cancelled
+        batches += 1
+        if cancelled < batch_size:
+            break
+
+    seconds = time.perf_counter() - started
+    registry.record_job('payment_hold_sweep', seconds, total)
+    logger.info(
+        'payment_hold_sweep cancelled=%d batches=%d duration_ms=%.1f',
+        total, batches, seconds * 1000,
+        extra={'cancelled': total, 'batches': batches},
+    )
+    return total
@@ -1,3 +1,188 @@
-from django.test import TestCase
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from accounts.models import User
+from listings.models import Listing
+from rentoshare import query_budget
+from rentoshare.metrics import registry, render_metrics
+from .models import Transaction, TransactionStatus, UserTransactionStats
+from .sweeper import sweep_expired_holds
+from .views import TransactionCreateView
+
+CREATE_URL = '/api/transactions/create/'
+
+
+def day(offset):
+    return timezone.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=offset)
+
+
+def create_parties():
+    vendor = User.objects.create_user(
+        email='vendor@example.com', password=None, full_name='Vendor', phone='0', role='vendor'
+    )
+    consumer = User.objects.create_user(email='consumer@example.com', password=None, full_name='Consumer', phone='0')
+    listing = Listing.objects.create(
+        user=vendor, title='Tent', description='Two person', listing_type='product', price_per_day=10
+    )
+    return vendor, consumer, listing
+
+
+class BookingConflictTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor, cls.consumer, cls.listing = create_parties()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def book(self, start, end, status=TransactionStatus.PENDING):
+        return Transaction.objects.create(
+            listing=self.listing, vendor=self.vendor, consumer=self.consumer,
+            start_date=day(start), end_date=day(end), total_price=10, status=status
+        )
+
+    def request_booking(self, start, end):
+        self.client.force_authenticate(self.consumer)
+        return self.client.post(CREATE_URL, {
+            'listing': self.listing.pk, 'start_date': day(start).isoformat(), 'end_date': day(end).isoformat(),
+        }, format='json')
+
+    def set_status(self, booking, status):
+        self.client.force_authenticate(self.vendor)
+        return self.client.patch(f'/api/transactions/{booking.pk}/status/', {'status': status}, format='json')
+
+    def test_overlapping_periods_are_rejected(self):
+        self.book(1, 10)
+        self.book(4, 6, status=TransactionStatus.CANCELLED)
+        for start, end in ((0, 2), (5, 6), (9, 12), (0, 12)):
+            with self.subTest(start=start, end=end):
+                self.assertEqual(self.request_booking(start, end).status_code, 409)
+
+    def test_adjacent_and_cancelled_periods_are_free(self):
+        self.book(3, 5)
+        self.book(6, 8, status=TransactionStatus.CANCELLED)
+        self.assertEqual(self.request_booking(1, 3).status_code, 201)
+        self.assertEqual(self.request_booking(5, 8).status_code, 201)
+
+    def test_reopening_a_cancelled_booking_needs_its_period_free(self):
+        cancelled = self.book(1, 4, status=TransactionStatus.CANCELLED)
+        taken = self.book(2, 3)
+        self.assertEqual(self.set_status(cancelled, TransactionStatus.PENDING).status_code, 409)
+        cancelled.refresh_from_db()
+        self.assertEqual(cancelled.status, TransactionStatus.CANCELLED)
+
+        self.assertEqual(self.set_status(taken, TransactionStatus.CANCELLED).status_code, 200)
+        self.assertEqual(self.set_status(cancelled, TransactionStatus.PENDING).status_code, 200)
+
+    def test_status_changes_of_held_bookings_are_not_checked(self):
+        booking = self.book(1, 4)
+        self.assertEqual(self.set_status(booking, TransactionStatus.ACTIVE).status_code, 200)
+
+
+class TransactionStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor, cls.consumer, cls.listing = create_parties()
+
+    def stats(self, user):
+        return UserTransactionStats.objects.get(user=user)
+
+    def test_stale_copies_do_not_count_a_change_twice(self):
+        booking = Transaction.objects.create(
+            listing=self.listing, vendor=self.vendor, consumer=self.consumer,
+            start_date=day(1), end_date=day(3), total_price=20
+        )
+        first, second = Transaction.objects.get(pk=booking.pk), Transaction.objects.get(pk=booking.pk)
+        first.status = second.status = TransactionStatus.COMPLETED
+        first.save()
+        second.save()
+
+        vendor_stats = self.stats(self.vendor)
+        self.assertEqual((vendor_stats.vendor_total, vendor_stats.vendor_completed), (1, 1))
+        self.assertEqual(vendor_stats.vendor_earnings, 20)
+        self.assertEqual(self.stats(self.consumer).consumer_completed, 1)
+
+        second.delete()
+        self.assertEqual(self.stats(self.vendor).vendor_total, 0)
+        self.assertEqual(self.stats(self.consumer).consumer_spent, 0)
+
+
+class PaymentHoldSweepTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor, cls.consumer, cls.listing = create_parties()
+
+    def setUp(self):
+        registry.reset()
+
+    def hold(self, start, expires):
+        return Transaction.objects.create(
+            listing=self.listing, vendor=self.vendor, consumer=self.consumer,
+            start_date=day(start), end_date=day(start + 1), total_price=10,
+            payment_hold_expires=timezone.now() + timedelta(minutes=expires)
+        )
+
+    def test_sweeps_expired_holds_and_records_the_run(self):
+        expired = [self.hold(start, -5) for start in range(3)]
+        live = self.hold(5, 5)
+        self.assertEqual(sweep_expired_holds(batch_size=2), 3)
+
+        statuses = dict(Transaction.objects.values_list('pk', 'status'))
+        self.assertEqual({statuses[booking.pk] for booking in expired}, {TransactionStatus.CANCELLED})
+        self.assertEqual(statuses[live.pk], TransactionStatus.PENDING)
+        metrics = render_metrics()
+        self.assertIn('rentoshare_job_items_total{job="payment_hold_sweep"} 3', metrics)
+        self.assertIn('rentoshare_job_duration_seconds_count{job="payment_hold_sweep"} 1', metrics)
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    """Parallel booking requests for one listing never produce overlapping bookings"""
+    requests = 240
+    workers = 24
+
+    def test_parallel_bookings_do_not_overlap(self):
+        _, consumer, listing = create_parties()
+        rng = random.Random(4)
+        periods = []
+        for _ in range(self.requests):
+            start = day(1 + rng.randrange(20))
+            periods.append((start, start + timedelta(days=rng.randint(1, 3))))
+
+        factory = APIRequestFactory()
+        view = TransactionCreateView.as_view()
+
+        def book(period):
+            request = factory.post(CREATE_URL, {
+                'listing': listing.pk, 'start_date': period[0].isoformat(), 'end_date': period[1].isoformat(),
+            }, format='json')
+            force_authenticate(request, user=consumer)
+            try:
+                return view(request).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            codes = list(pool.map(book, periods))
+
+        self.assertEqual(set(codes) - {201, 409}, set())
+        bookings = list(
+            Transaction.objects.filter(listing=listing).order_by('start_date').values_list('start_date', 'end_date')
+        )
+        self.assertEqual(len(bookings), codes.count(201))
+        self.assertEqual(UserTransactionStats.objects.get(user=consumer).consumer_total, len(bookings))
+        for previous, current in zip(bookings, bookings[1:]):
+            self.assertGreaterEqual(current[0], previous[1])
+
+
+class TransactionQueryBudgetTests(query_budget.QueryBudgetTestCase):
+    endpoints = query_budget.endpoints_named(
+        'transaction-list', 'transaction-detail', 'transaction-stats', 'admin-transaction-list',
+    )
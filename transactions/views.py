@@ -3,7 +3,10 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.db.models import Q
-from .models import Transaction
+from rentoshare.exports import StreamingExportMixin
+from rentoshare.filters import filter_date_range
+from .booking import create_booking, update_booking_status
+from .models import Transaction, UserTransactionStats
 from .serializers import (
     TransactionSerializer, TransactionCreateSerializer, 
     TransactionDetailSerializer, TransactionStatusUpdateSerializer
@@ -14,19 +17,8 @@ class TransactionCreateView(generics.CreateAPIView):
     permission_classes = [IsAuthenticated]
     
     def perform_create(self, serializer):
-        listing = serializer.validated_data['listing']
-        
-        # Calculate total price
-        start_date = serializer.validated_data['start_date']
-        end_date = serializer.validated_data['end_date']
-        days = (end_date - start_date).days
-        total_price = listing.price_per_day * days if listing.price_per_day else 0
-        
-        serializer.save(
-            consumer=self.request.user,
-            vendor=listing.user,
-            total_price=total_price
-        )
+        # Rejects the booking with 409 if the period overlaps an existing one
+        create_booking(serializer, consumer=self.request.user)
 
 class TransactionListView(generics.ListAPIView):
     serializer_class = TransactionSerializer
@@ -36,7 +28,7 @@ class TransactionListView(generics.ListAPIView):
         user = self.request.user
         return Transaction.objects.filter(
             Q(vendor=user) | Q(consumer=user)
-        ).order_by('-created_at')
+        ).select_related('listing', 'vendor', 'consumer').order_by('-created_at')
 
 class TransactionDetailView(generics.RetrieveAPIView):
     serializer_class = TransactionDetailSerializer
@@ -46,7 +38,7 @@ class TransactionDetailView(generics.RetrieveAPIView):
         user = self.request.user
         return Transaction.objects.filter(
             Q(vendor=user) | Q(consumer=user)
-        )
+        ).select_related('listing__user', 'vendor', 'consumer')
 
 class TransactionStatusUpdateView(generics.UpdateAPIView):
     serializer_class = TransactionStatusUpdateSerializer
@@ -55,40 +47,60 @@ class TransactionStatusUpdateView(generics.UpdateAPIView):
     def get_queryset(self):
         user = self.request.user
         return Transaction.objects.filter(vendor=user)
+    
+    def perform_update(self, serializer):
+        # Rejects reopening a cancelled booking with 409 if its period was taken meanwhile
+        update_booking_status(serializer)
 
-class AdminTransactionListView(generics.ListAPIView):
-    queryset = Transaction.objects.all()
+class AdminTransactionListView(StreamingExportMixin, generics.ListAPIView):
+    queryset = Transaction.objects.select_related('listing', 'vendor', 'consumer')
     serializer_class = TransactionSerializer
     permission_classes = [IsAdminUser]
+    export_filename = 'transactions'
+    export_fields = (
+        ('id', 'id'),
+        ('listing', 'listing_id'),
+        ('listing_title', 'listing__title'),
+        ('vendor', 'vendor_id'),
+        ('vendor_email', 'vendor__email'),
+        ('consumer', 'consumer_id'),
+        ('consumer_email', 'consumer__email'),
+        ('start_date', 'start_date'),
+        ('end_date', 'end_date'),
+        ('total_price', 'total_price'),
+        ('status', 'status'),
+        ('is_refunded', 'is_refunded'),
+        ('payment_hold_expires', 'payment_hold_expires'),
+        ('created_at', 'created_at'),
+    )
     
     def get_queryset(self):
         queryset = super().get_queryset()
         transaction_status = self.request.query_params.get('status', None)
         if transaction_status:
             queryset = queryset.filter(status=transaction_status)
-        return queryset
+        return filter_date_range(queryset, self.request.query_params)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def user_transaction_stats(request):
     """Get transaction statistics for the authenticated user"""
-    user = request.user
-    vendor_transactions = Transaction.objects.filter(vendor=user)
-    consumer_transactions = Transaction.objects.filter(consumer=user)
+    # Counters are maintained incrementally by transactions.signals
+    stats = UserTransactionStats.objects.filter(user=request.user).first()
+    if stats is None:
+        stats = UserTransactionStats(user=request.user)
     
-    stats = {
+    return Response({
         'vendor_stats': {
-            'total': vendor_transactions.count(),
-            'active': vendor_transactions.filter(status='active').count(),
-            'completed': vendor_transactions.filter(status='completed').count(),
-            'total_earnings': sum(t.total_price for t in vendor_transactions.filter(status='completed'))
+            'total': stats.vendor_total,
+            'active': stats.vendor_active,
+            'completed': stats.vendor_completed,
+            'total_earnings': stats.vendor_earnings
         },
         'consumer_stats': {
-            'total': consumer_transactions.count(),
-            'active': consumer_transactions.filter(status='active').count(),
-            'completed': consumer_transactions.filter(status='completed').count(),
-            'total_spent': sum(t.total_price for t in consumer_transactions.filter(status='completed'))
+            'total': stats.consumer_total,
+            'active': stats.consumer_active,
+            'completed': stats.consumer_completed,
+            'total_spent': stats.consumer_spent
         }
-    }
-    
-    return Response(stats)
+    })